@@ -0,0 +1,164 @@
+"""
+In-process read-through cache for the API reads
+LRU bounded in entries with a TTL per table. Each entry is tagged with the
+(table, partition key) it was read from, so a write to a partition drops every
+cached read of it. Ingestion runs in other processes: it bumps an epoch file whose
+change makes every API process clear its cache (checked every few seconds).
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() on a miss (None is a valid cached value)
+MISS = object()
+
+
+class QueryCache:
+    """
+    LRU + TTL cache of query results keyed by (statement name, params)
+    """
+
+    def __init__(self, max_entries: int, ttl: Dict[str, float], epoch_file: str = None,
+                 epoch_check: float = 5.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = dict(ttl)
+        self.epoch_file = epoch_file
+        self.epoch_check = epoch_check
+        self.clock = clock
+
+        # Bumped by every invalidation: a read that started before one is not cached
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Tuple[str, tuple], Any]]' = OrderedDict()
+        self._tags: Dict[Tuple[str, tuple], set] = {}
+        self._lock = threading.Lock()
+        self._epoch = self._read_epoch()
+        self._epoch_checked = clock()
+
+    def tag_of(self, prepared, params) -> Optional[Tuple[str, tuple]]:
+        """
+        (table, partition key values) a bound statement reads or writes, from the
+        prepared statement's metadata; None when the table has no TTL (not cached)
+        or the partition key is not fully bound
+        """
+        if not prepared.column_metadata or prepared.routing_key_indexes is None:
+            return None
+        table = prepared.column_metadata[0].table_name
+        if table not in self.ttl:
+            return None
+        return table, tuple(params[i] for i in prepared.routing_key_indexes)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Cached value of key, or MISS (counts a hit or a miss)
+        """
+        self._check_epoch()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return MISS
+
+    def put(self, key: Hashable, tag: Tuple[str, tuple], value: Any, version: int = None) -> None:
+        """
+        Cache a value read under `version` (skipped if something was invalidated since)
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl[tag[0]], tag, value)
+            self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag: Tuple[str, tuple]) -> None:
+        """
+        Drop every cached read of one (table, partition key)
+        """
+        with self._lock:
+            self.version += 1
+            keys = self._tags.pop(tag, ())
+            for key in list(keys):
+                self._entries.pop(key, None)
+            self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.version += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def bump_epoch(self) -> None:
+        """
+        Clear this cache and tell the other processes to clear theirs (after ingestion)
+        """
+        self.clear()
+        if not self.epoch_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.epoch_file)), exist_ok=True)
+            tmp_path = f"{self.epoch_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(str(time.time_ns()))
+            os.replace(tmp_path, self.epoch_file)
+            self._epoch = self._read_epoch()
+        except OSError as e:
+            logger.warning(f"Could not update cache epoch file {self.epoch_file}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "ttl": self.ttl
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, tag, _ = self._entries.pop(key)
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def _read_epoch(self) -> Optional[str]:
+        if not self.epoch_file:
+            return None
+        try:
+            with open(self.epoch_file) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _check_epoch(self) -> None:
+        if not self.epoch_file or self.clock() - self._epoch_checked < self.epoch_check:
+            return
+        self._epoch_checked = self.clock()
+        epoch = self._read_epoch()
+        if epoch != self._epoch:
+            self._epoch = epoch
+            logger.info("Cache epoch changed (ingestion ran): clearing the query cache")
+            self.clear()
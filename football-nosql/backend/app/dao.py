@@ -2,14 +2,23 @@
 Data Access Object (DAO) for Cassandra operations
 Handles connection, keyspace creation, and provides prepared statements
 """
-from cassandra.cluster import Cluster
+from cassandra.cluster import Cluster, ExecutionProfile, EXEC_PROFILE_DEFAULT
 from cassandra.auth import PlainTextAuthProvider
-from cassandra import ConsistencyLevel
-from cassandra.query import BatchStatement, SimpleStatement, PreparedStatement
-from cassandra.policies import DCAwareRoundRobinPolicy
+from cassandra import ConsistencyLevel, InvalidRequest
+from cassandra.query import BatchStatement, BatchType, SimpleStatement, PreparedStatement, tuple_factory
+from cassandra.policies import DCAwareRoundRobinPolicy, TokenAwarePolicy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import heapq
+import json
 import logging
 import base64
-from typing import Optional, List, Dict, Any, Tuple
+import queue
+import re
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterator, AsyncIterator
 import os
 import sys
 
@@ -18,10 +27,57 @@ backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(backend_path)
 
 import settings
+from app.cache import MISS, QueryCache
+from app.serialization import RowEncoder
+from app.topk import TopK, transfer_rank
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Murmur3Partitioner token ring bounds
+MIN_TOKEN = -2 ** 63
+MAX_TOKEN = 2 ** 63 - 1
+
+# Marker put on the scan queue when a token range is exhausted
+_RANGE_DONE = object()
+
+# Execution profile returning rows as plain tuples (tuple_factory): no namedtuple class
+# is built per page, for reads serialized by position (RowEncoder)
+ROW_TUPLES = 'tuples'
+
+
+def execution_profiles() -> Dict[Any, ExecutionProfile]:
+    """
+    Execution profiles of the cluster: the default one (rows as named tuples) and
+    ROW_TUPLES, both token aware
+    """
+    return {
+        EXEC_PROFILE_DEFAULT: ExecutionProfile(
+            load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy())
+        ),
+        ROW_TUPLES: ExecutionProfile(
+            load_balancing_policy=TokenAwarePolicy(DCAwareRoundRobinPolicy()),
+            row_factory=tuple_factory
+        )
+    }
+
+
+def _table_name(ddl: str) -> str:
+    """
+    Name of the table created by a CREATE TABLE statement
+    """
+    return re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", ddl).group(1)
+
+
+async def _next_rows(pages: AsyncIterator[list]) -> Optional[list]:
+    """
+    Next non-empty page of a DAO._pages iterator, None once it is exhausted
+    """
+    async for rows in pages:
+        if rows:
+            return rows
+    return None
+
 
 class CassandraDAO:
     """
@@ -33,31 +89,47 @@ class CassandraDAO:
         self.cluster = None
         self.session = None
         self.prepared_statements = {}
+        # CQL of every named statement, kept to prepare lazily and to re-prepare
+        self.queries = {}
+        self._prepare_lock = threading.Lock()
+        # (statement name, columns) -> (prepared statement, RowEncoder of its result)
+        self._row_encoders = {}
+        # season -> [asyncio lock, updates holding or waiting for it] (update_top_transfers)
+        self._top_transfer_locks = {}
+        self.cache = QueryCache(
+            settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL,
+            settings.CACHE_EPOCH_FILE, settings.CACHE_EPOCH_CHECK
+        ) if settings.CACHE_ENABLED else None
         
-    def connect(self):
+    def connect(self, create_schema: bool = True):
         """
         Establish connection to Cassandra cluster and create keyspace if needed
+        
+        Args:
+            create_schema: create keyspace and tables (skip when another process already did)
         """
         try:
             # Connect to cluster
             self.cluster = Cluster(
                 settings.CASSANDRA_HOSTS,
                 port=settings.CASSANDRA_PORT,
-                load_balancing_policy=DCAwareRoundRobinPolicy()
+                execution_profiles=execution_profiles()
             )
             
             self.session = self.cluster.connect()
             logger.info(f"Connected to Cassandra at {settings.CASSANDRA_HOSTS}")
             
             # Create keyspace if it doesn't exist
-            self._create_keyspace()
+            if create_schema:
+                self._create_keyspace()
             
             # Use the keyspace
             self.session.set_keyspace(settings.KEYSPACE)
             logger.info(f"Using keyspace: {settings.KEYSPACE}")
             
             # Create tables if they don't exist
-            self._create_tables()
+            if create_schema:
+                self.create_tables()
             
             # Prepare common statements
             self._prepare_statements()
@@ -77,9 +149,12 @@ class CassandraDAO:
         self.session.execute(create_keyspace)
         logger.info(f"Keyspace {settings.KEYSPACE} ensured")
     
-    def _create_tables(self):
+    def create_tables(self, names: Optional[List[str]] = None):
         """
-        Create all necessary tables programmatically
+        Create all necessary tables programmatically (single source of the DDL)
+        
+        Args:
+            names: only create these tables (all of them by default)
         """
         try:
             tables = [
@@ -271,6 +346,108 @@ class CassandraDAO:
                 )
                 """,
                 
+                # Multi-filter search: (position, nationality) and team partitions
+                """
+                CREATE TABLE IF NOT EXISTS players_by_position_nationality (
+                  position text,
+                  nationality text,
+                  player_id text,
+                  player_name text,
+                  team_id text,
+                  team_name text,
+                  birth_date date,
+                  market_value_eur bigint,
+                  PRIMARY KEY ((position, nationality), player_id)
+                )
+                """,
+                
+                """
+                CREATE TABLE IF NOT EXISTS players_search_by_team (
+                  team_id text,
+                  player_id text,
+                  player_name text,
+                  position text,
+                  nationality text,
+                  team_name text,
+                  birth_date date,
+                  market_value_eur bigint,
+                  PRIMARY KEY (team_id, player_id)
+                )
+                """,
+                
+                # Position partitions clustered by market value (range slices, sort)
+                """
+                CREATE TABLE IF NOT EXISTS players_by_position_value (
+                  position text,
+                  market_value_eur bigint,
+                  player_id text,
+                  player_name text,
+                  nationality text,
+                  team_id text,
+                  team_name text,
+                  birth_date date,
+                  PRIMARY KEY (position, market_value_eur, player_id)
+                ) WITH CLUSTERING ORDER BY (market_value_eur DESC, player_id ASC)
+                """,
+                
+                # Position partitions clustered by birth year (age ranges)
+                """
+                CREATE TABLE IF NOT EXISTS players_by_position_birth_year (
+                  position text,
+                  birth_year int,
+                  player_id text,
+                  player_name text,
+                  nationality text,
+                  team_id text,
+                  team_name text,
+                  birth_date date,
+                  market_value_eur bigint,
+                  PRIMARY KEY (position, birth_year, player_id)
+                ) WITH CLUSTERING ORDER BY (birth_year ASC, player_id ASC)
+                """,
+                
+                # Nationality partitions clustered by market value (range slices, sort)
+                """
+                CREATE TABLE IF NOT EXISTS players_by_nationality_value (
+                  nationality text,
+                  market_value_eur bigint,
+                  player_id text,
+                  player_name text,
+                  position text,
+                  team_id text,
+                  team_name text,
+                  birth_date date,
+                  PRIMARY KEY (nationality, market_value_eur, player_id)
+                ) WITH CLUSTERING ORDER BY (market_value_eur DESC, player_id ASC)
+                """,
+                
+                # Nationality partitions clustered by birth year (age ranges)
+                """
+                CREATE TABLE IF NOT EXISTS players_by_nationality_birth_year (
+                  nationality text,
+                  birth_year int,
+                  player_id text,
+                  player_name text,
+                  position text,
+                  team_id text,
+                  team_name text,
+                  birth_date date,
+                  market_value_eur bigint,
+                  PRIMARY KEY (nationality, birth_year, player_id)
+                ) WITH CLUSTERING ORDER BY (birth_year ASC, player_id ASC)
+                """,
+                
+                # Player counts per position, nationality and team (search suggestions)
+                """
+                CREATE TABLE IF NOT EXISTS search_facets (
+                  scope text,
+                  facet text,
+                  value text,
+                  player_count counter,
+                  PRIMARY KEY (scope, facet, value)
+                )
+                """,
+                
                 """
                 CREATE TABLE IF NOT EXISTS players_search_index (
                   search_partition text,
@@ -288,6 +465,9 @@ class CassandraDAO:
                 """
             ]
             
+            if names is not None:
+                tables = [table for table in tables if _table_name(table) in names]
+            
             for table in tables:
                 try:
                     self.session.execute(table.strip())
@@ -433,48 +613,504 @@ class CassandraDAO:
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
             
+            'insert_player_by_position_nationality': """
+                INSERT INTO players_by_position_nationality 
+                (position, nationality, player_id, player_name, team_id, team_name, birth_date, market_value_eur)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'insert_player_search_by_team': """
+                INSERT INTO players_search_by_team 
+                (team_id, player_id, player_name, position, nationality, team_name, birth_date, market_value_eur)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'insert_players_by_position_value': """
+                INSERT INTO players_by_position_value 
+                (position, market_value_eur, player_id, player_name, nationality, team_id, team_name, birth_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'insert_players_by_position_birth_year': """
+                INSERT INTO players_by_position_birth_year 
+                (position, birth_year, player_id, player_name, nationality, team_id, team_name, birth_date, market_value_eur)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'insert_players_by_nationality_value': """
+                INSERT INTO players_by_nationality_value 
+                (nationality, market_value_eur, player_id, player_name, position, team_id, team_name, birth_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'insert_players_by_nationality_birth_year': """
+                INSERT INTO players_by_nationality_birth_year 
+                (nationality, birth_year, player_id, player_name, position, team_id, team_name, birth_date, market_value_eur)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            'increment_search_facet': """
+                UPDATE search_facets SET player_count = player_count + ?
+                WHERE scope = ? AND facet = ? AND value = ?
+            """,
+            
             'insert_player_search_index': """
                 INSERT INTO players_search_index 
                 (search_partition, player_name_lower, player_id, player_name, position, nationality, team_id, team_name, birth_date, market_value_eur)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            
+            # API reads (every query of app/main.py)
+            'get_players_by_team': """
+                SELECT player_id, player_name, position, nationality
+                FROM players_by_team 
+                WHERE team_id = ? 
+                LIMIT ?
+            """,
+            
+            'get_latest_market_value': """
+                SELECT player_id, as_of_date, market_value_eur, source
+                FROM latest_market_value_by_player 
+                WHERE player_id = ?
+            """,
+            
+            'get_latest_market_date': """
+                SELECT as_of_date FROM latest_market_value_by_player WHERE player_id = ?
+            """,
+            
+            'get_transfers': """
+                SELECT transfer_date, from_team_id, to_team_id, fee_eur, contract_years
+                FROM transfers_by_player 
+                WHERE player_id = ?
+                LIMIT ?
+            """,
+            
+            'get_top_transfers': """
+                SELECT fee_eur, player_id, to_team_id, from_team_id, transfer_date
+                FROM top_transfers_by_season 
+                WHERE season = ?
+                LIMIT ?
+            """,
+            
+            'get_top_transfer_keys': """
+                SELECT fee_eur, player_id FROM top_transfers_by_season WHERE season = ?
+            """,
+            
+            'get_injuries': """
+                SELECT start_date, injury_type, end_date, games_missed
+                FROM injuries_by_player 
+                WHERE player_id = ?
+                LIMIT ?
+            """,
+            
+            'get_club_performances': """
+                SELECT season, team_id, matches, goals, assists, minutes
+                FROM club_performances_by_player_season 
+                WHERE player_id = ?
+            """,
+            
+            'get_club_performances_season': """
+                SELECT season, team_id, matches, goals, assists, minutes
+                FROM club_performances_by_player_season 
+                WHERE player_id = ? AND season = ?
+            """,
+            
+            'get_national_performances': """
+                SELECT season, national_team, matches, goals, assists, minutes
+                FROM national_performances_by_player_season 
+                WHERE player_id = ?
+            """,
+            
+            'get_national_performances_season': """
+                SELECT season, national_team, matches, goals, assists, minutes
+                FROM national_performances_by_player_season 
+                WHERE player_id = ? AND season = ?
+            """,
+            
+            'get_teammates': """
+                SELECT teammate_id, teammate_name, matches_together
+                FROM teammates_by_player 
+                WHERE player_id = ?
+                LIMIT ?
+            """,
+            
+            'get_team_details': """
+                SELECT team_id, team_name, country, city, founded
+                FROM team_details_by_id 
+                WHERE team_id = ?
+            """,
+            
+            'get_team_children': """
+                SELECT child_team_id, child_team_name, relation
+                FROM team_children_by_parent 
+                WHERE parent_team_id = ?
+            """,
+            
+            'get_team_competitions': """
+                SELECT season, competition
+                FROM team_competitions_by_team_season 
+                WHERE team_id = ?
+            """,
+            
+            'get_team_competitions_season': """
+                SELECT season, competition
+                FROM team_competitions_by_team_season 
+                WHERE team_id = ? AND season = ?
+            """,
+            
+            'get_search_facets': """
+                SELECT facet, value, player_count
+                FROM search_facets 
+                WHERE scope = ?
+            """,
+            
+            'search_by_position': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_position 
+                WHERE position = ?
+            """,
+            
+            'search_by_nationality': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_nationality 
+                WHERE nationality = ?
+            """,
+            
+            'search_by_position_nationality': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_position_nationality 
+                WHERE position = ? AND nationality = ?
+            """,
+            
+            'search_by_team': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_search_by_team 
+                WHERE team_id = ?
+            """,
+            
+            'search_by_position_value': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_position_value 
+                WHERE position = ? AND market_value_eur >= ? AND market_value_eur <= ?
+            """,
+            
+            'search_by_position_birth_year': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_position_birth_year 
+                WHERE position = ? AND birth_year >= ? AND birth_year <= ?
+            """,
+            
+            'search_by_nationality_value': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_nationality_value 
+                WHERE nationality = ? AND market_value_eur >= ? AND market_value_eur <= ?
+            """,
+            
+            'search_by_nationality_birth_year': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_by_nationality_birth_year 
+                WHERE nationality = ? AND birth_year >= ? AND birth_year <= ?
+            """,
+            
+            'get_search_record_by_position': """
+                SELECT player_id, player_name, nationality, team_id, team_name, birth_date, market_value_eur
+                FROM players_by_position 
+                WHERE position = ? AND player_id = ?
+            """,
+            
+            'search_by_name_prefix': """
+                SELECT player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_search_index 
+                WHERE search_partition = ? AND player_name_lower >= ? AND player_name_lower < ?
+            """,
+            
+            # One bucket of players_search_index after a (name, id) cursor, bounded or not
+            'search_bucket_range': """
+                SELECT player_name_lower, player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_search_index 
+                WHERE search_partition = ? AND (player_name_lower, player_id) > (?, ?)
+                  AND (player_name_lower, player_id) < (?, ?)
+            """,
+            
+            'search_bucket_after': """
+                SELECT player_name_lower, player_id, player_name, position, nationality, team_id, team_name, 
+                       birth_date, market_value_eur
+                FROM players_search_index 
+                WHERE search_partition = ? AND (player_name_lower, player_id) > (?, ?)
             """
         }
         
-        for name, stmt in statements.items():
+        self.queries.update(statements)
+        for name in statements:
             try:
-                self.prepared_statements[name] = self.session.prepare(stmt)
+                self.reprepare(name)
             except Exception as e:
+                # Left unprepared: statement() retries on first use
                 logger.error(f"Failed to prepare statement {name}: {e}")
         
         logger.info(f"Prepared {len(self.prepared_statements)} statements")
     
-    def execute_batch(self, statements_with_params: List[Tuple[str, tuple]]) -> None:
+    def register(self, name: str, query: str) -> None:
+        """
+        Add a named statement to the registry, prepared on first use
+        """
+        with self._prepare_lock:
+            if self.queries.get(name) != query:
+                self.queries[name] = query
+                self.prepared_statements.pop(name, None)
+    
+    def statement(self, name: str) -> PreparedStatement:
+        """
+        Prepared statement registered under name (prepared on first use)
+        """
+        prepared = self.prepared_statements.get(name)
+        if prepared is not None:
+            return prepared
+        if name not in self.queries:
+            raise ValueError(f"Unknown prepared statement: {name}")
+        with self._prepare_lock:
+            if name not in self.prepared_statements:
+                self.prepared_statements[name] = self.session.prepare(self.queries[name])
+            return self.prepared_statements[name]
+    
+    def reprepare(self, name: str = None) -> None:
+        """
+        Prepare again one registered statement (or all of them), e.g. after a schema change
+        
+        The driver already re-prepares statements a node has evicted, but a statement
+        prepared before an ALTER/DROP keeps its old bind and result metadata until it
+        is prepared again.
+        """
+        names = [name] if name else list(self.queries)
+        with self._prepare_lock:
+            for stmt_name in names:
+                self.prepared_statements.pop(stmt_name, None)
+                self.prepared_statements[stmt_name] = self.session.prepare(self.queries[stmt_name])
+    
+    def row_encoder(self, stmt_name: str, columns: Tuple[str, ...] = None) -> RowEncoder:
+        """
+        RowEncoder of a registered SELECT, built from its result metadata once per
+        preparation (a re-prepared statement gets a new one)
+        """
+        prepared = self.statement(stmt_name)
+        key = (stmt_name, columns)
+        cached = self._row_encoders.get(key)
+        if cached is None or cached[0] is not prepared:
+            metadata = [(column[2], column[3]) for column in prepared.result_metadata]
+            cached = (prepared, RowEncoder(metadata, columns))
+            self._row_encoders[key] = cached
+        return cached[1]
+    
+    def _execute(self, stmt_name: str, params: tuple = None, **options) -> Any:
+        """
+        Execute a registered statement, re-preparing it once if the schema changed under it
+        """
+        try:
+            result = self.session.execute(self.statement(stmt_name), params, **options)
+        except InvalidRequest as e:
+            logger.warning(f"Re-preparing {stmt_name} after error: {e}")
+            self.reprepare(stmt_name)
+            result = self.session.execute(self.statement(stmt_name), params, **options)
+        self._invalidate_written(self.statement(stmt_name), params)
+        return result
+    
+    def _invalidate_written(self, prepared: PreparedStatement, params) -> None:
+        """
+        Drop the cached reads of the partition a write statement touched
+        """
+        if self.cache is None or prepared.query_string.lstrip()[:6].upper() == 'SELECT':
+            return
+        tag = self.cache.tag_of(prepared, params)
+        if tag is not None:
+            self.cache.invalidate(tag)
+    
+    def execute_batch(self, statements_with_params: List[Tuple[str, tuple]], mode: str = None) -> None:
         """
         Execute multiple statements in a batch for better performance
         
+        In "partition" mode (settings.BATCH_MODE), statements are grouped by table and
+        partition key and each group is sent as an UNLOGGED batch (split at
+        settings.BATCH_MAX_BYTES), routed to a replica by the token-aware policy.
+        "logged" mode sends everything as a single LOGGED batch.
+        
         Args:
             statements_with_params: List of (statement_name, params) tuples
+            mode: "partition" or "logged" (defaults to settings.BATCH_MODE)
         """
         if not statements_with_params:
             return
+        
+        mode = mode or settings.BATCH_MODE
+        
+        if mode == 'logged':
+            batch = BatchStatement(consistency_level=ConsistencyLevel.LOCAL_QUORUM)
+            
+            for stmt_name, params in statements_with_params:
+                if stmt_name in self.queries:
+                    batch.add(self.statement(stmt_name), params)
             
-        batch = BatchStatement(consistency_level=ConsistencyLevel.LOCAL_QUORUM)
+            if batch._statements_and_parameters:
+                self.session.execute(batch)
+            return
         
+        if mode != 'partition':
+            raise ValueError(f"Unknown batch mode: {mode}")
+        
+        # Group bound statements by (table, partition key)
+        groups = {}
         for stmt_name, params in statements_with_params:
-            if stmt_name in self.prepared_statements:
-                batch.add(self.prepared_statements[stmt_name], params)
+            if stmt_name in self.queries:
+                bound = self.bind_statement(stmt_name, params)
+                groups.setdefault(self._partition_of(bound), []).append(bound)
+        
+        # Send every group concurrently, then wait for all of them
+        futures = [
+            self.session.execute_async(statement)
+            for bounds in groups.values()
+            for statement in self._size_capped_batches(bounds)
+        ]
+        for future in futures:
+            future.result()
+    
+    @staticmethod
+    def _partition_of(bound) -> Tuple[Optional[str], Any]:
+        """
+        Return the (table, routing_key) a bound statement writes to
+        Statements without a routing key are never grouped together
+        """
+        metadata = bound.prepared_statement.column_metadata
+        table = metadata[0].table_name if metadata else None
+        routing_key = bound.routing_key
+        return table, routing_key if routing_key is not None else id(bound)
+    
+    @staticmethod
+    def _bound_size(bound) -> int:
+        """
+        Serialized size of the values bound to a statement
+        """
+        return sum(len(value) for value in bound.values if isinstance(value, bytes))
+    
+    def _size_capped_batches(self, bounds: list) -> list:
+        """
+        Split statements for one partition into UNLOGGED batches under settings.BATCH_MAX_BYTES
+        Single statements are sent as-is
+        """
+        chunks = []
+        current, current_size = [], 0
+        for bound in bounds:
+            size = self._bound_size(bound)
+            if current and current_size + size > settings.BATCH_MAX_BYTES:
+                chunks.append(current)
+                current, current_size = [], 0
+            current.append(bound)
+            current_size += size
+        if current:
+            chunks.append(current)
+        
+        statements = []
+        for chunk in chunks:
+            if len(chunk) == 1:
+                statements.append(chunk[0])
+                continue
+            batch = BatchStatement(batch_type=BatchType.UNLOGGED,
+                                   consistency_level=ConsistencyLevel.LOCAL_QUORUM)
+            for bound in chunk:
+                batch.add(bound)
+            statements.append(batch)
+        return statements
+    
+    def bind_statement(self, stmt_name: str, params: tuple,
+                       consistency_level: int = ConsistencyLevel.LOCAL_QUORUM):
+        """
+        Bind parameters to a prepared statement (routing key is set for token-aware routing)
+        """
+        bound = self.statement(stmt_name).bind(params)
+        bound.consistency_level = consistency_level
+        return bound
+    
+    def prepare_delete(self, table: str, key_columns: List[str]) -> str:
+        """
+        Prepare (once) a DELETE by primary key for a table and return its statement name
+        """
+        stmt_name = f"delete_{table}"
+        where = " AND ".join(f"{column} = ?" for column in key_columns)
+        self.register(stmt_name, f"DELETE FROM {table} WHERE {where}")
+        return stmt_name
+    
+    def writer(self, mode: str = None, **options) -> 'BatchWriter':
+        """
+        Create a writer for ingestion, selected by settings.WRITE_MODE
         
-        if batch._statements_and_parameters:
-            self.session.execute(batch)
+        Usage:
+            with dao.writer() as writer:
+                writer.submit('insert_injury', params)
+        """
+        mode = mode or settings.WRITE_MODE
+        if mode == 'async':
+            return AsyncWriter(self, **options)
+        if mode == 'batch':
+            return BatchWriter(self, **options)
+        raise ValueError(f"Unknown write mode: {mode}")
     
     def execute_statement(self, stmt_name: str, params: tuple) -> Any:
         """
         Execute a single prepared statement
         """
-        if stmt_name in self.prepared_statements:
-            return self.session.execute(self.prepared_statements[stmt_name], params)
-        else:
-            raise ValueError(f"Unknown prepared statement: {stmt_name}")
+        return self._execute(stmt_name, params)
+    
+    async def update_top_transfers(self, row: tuple, k: int = None) -> bool:
+        """
+        Add a (season, fee_eur, player_id, to_team_id, from_team_id, transfer_date) row to
+        top_transfers_by_season if it ranks in the season's top k, deleting the entries it
+        pushes out (and any overflow left from before) so the partition stays at k rows
+        
+        Updates of the same season run one at a time (per API process): two of them
+        reading the same top k would each delete only what their own row evicts
+        
+        Returns:
+            True when the row made the top k
+        """
+        season = row[0]
+        entry = self._top_transfer_locks.setdefault(season, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._update_top_transfers(row, k)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._top_transfer_locks[season]
+    
+    async def _update_top_transfers(self, row: tuple, k: int = None) -> bool:
+        season = row[0]
+        top_k = TopK(k or settings.TOP_TRANSFERS_K, key=transfer_rank)
+        current = await self.execute_statement_async('get_top_transfer_keys', (season,), cache=False)
+        
+        evicted = []
+        for existing in current:
+            evicted.extend(top_k.push(season, (season, existing.fee_eur, existing.player_id))[1])
+        
+        admitted, pushed_out = top_k.push(season, row)
+        evicted.extend(pushed_out)
+        
+        writes = []
+        if admitted:
+            writes.append(self.execute_statement_async('insert_top_transfer', row))
+        delete_stmt = self.prepare_delete('top_transfers_by_season', ['season', 'fee_eur', 'player_id'])
+        writes.extend(self.execute_statement_async(delete_stmt, entry[:3]) for entry in evicted)
+        await asyncio.gather(*writes)
+        
+        return admitted
     
     def get_paginated_results(self, query: str, params: tuple = None, 
                             page_size: int = settings.DEFAULT_PAGE_SIZE,
@@ -482,36 +1118,523 @@ class CassandraDAO:
         """
         Execute a paginated query and return results with next page token
         
+        Args:
+            query: name of a registered statement (raw CQL is registered under its own text)
+        
         Returns:
             Tuple of (results_list, next_paging_state_base64_or_none)
         """
-        # Prepare statement for better performance and correct parameter handling
-        prepared_stmt = self.session.prepare(query)
-        prepared_stmt.fetch_size = page_size
+        decoded_paging_state = self._decode_paging_state(paging_state)
         
-        # Decode paging state if provided
-        decoded_paging_state = None
+        # Execute with paging state
+        try:
+            result = self.session.execute(self._bind_page(query, params, page_size),
+                                          paging_state=decoded_paging_state)
+        except InvalidRequest as e:
+            logger.warning(f"Re-preparing {query} after error: {e}")
+            self.reprepare(query)
+            result = self.session.execute(self._bind_page(query, params, page_size),
+                                          paging_state=decoded_paging_state)
+        
+        return list(result.current_rows), self._encode_paging_state(result.paging_state)
+    
+    def _bind_page(self, query: str, params: tuple, page_size: int):
+        """
+        Bind a paginated query (raw CQL is registered under its own text)
+        """
+        if query not in self.queries:
+            self.register(query, query)
+        
+        # The page size is set on the bound statement: the prepared one is shared
+        bound = self.statement(query).bind(params or ())
+        bound.fetch_size = page_size
+        return bound
+    
+    @staticmethod
+    def _decode_paging_state(paging_state: Optional[str]) -> Optional[bytes]:
         if paging_state:
             try:
-                decoded_paging_state = base64.b64decode(paging_state)
+                return base64.b64decode(paging_state)
             except Exception:
                 logger.warning(f"Invalid paging state: {paging_state}")
+        return None
+    
+    @staticmethod
+    def _encode_paging_state(paging_state: Optional[bytes]) -> Optional[str]:
+        if paging_state:
+            return base64.b64encode(paging_state).decode('utf-8')
+        return None
+    
+    @classmethod
+    def encode_page_cursor(cls, paging_state: Optional[bytes], offset: int = 0,
+                           fetch_size: int = None) -> str:
+        """
+        Cursor of a row inside a page: paging state that fetches the page (None for the
+        first one), number of rows of that page already returned and fetch size the
+        page was read with ("<state>:<offset>:<fetch_size>"). The offset only points at
+        the same row when the page is read again with the same fetch size
+        """
+        cursor = f"{cls._encode_paging_state(paging_state) or ''}:{offset}"
+        return f"{cursor}:{fetch_size}" if fetch_size else cursor
+    
+    @classmethod
+    def decode_page_cursor(cls, cursor: Optional[str]) -> Tuple[Optional[bytes], int, Optional[int]]:
+        """
+        (paging state, offset, fetch size) of a page cursor; a plain paging state means
+        offset 0, a cursor without fetch size gives None
+        """
+        if not cursor:
+            return None, 0, None
+        state, offset, fetch_size = (cursor.split(':') + ['0', ''])[:3]
+        try:
+            return cls._decode_paging_state(state), max(int(offset), 0), int(fetch_size) if fetch_size else None
+        except ValueError:
+            logger.warning(f"Invalid cursor: {cursor}")
+            return None, 0, None
+    
+    @staticmethod
+    def encode_key_cursor(key: Optional[tuple]) -> Optional[str]:
+        """
+        Opaque cursor holding the clustering key of the last row returned
+        (pagination of merged partitions, where no single paging state applies)
+        """
+        if key is None:
+            return None
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_key_cursor(cursor: Optional[str]) -> Optional[tuple]:
+        if cursor:
+            try:
+                return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii'))))
+            except Exception:
+                logger.warning(f"Invalid cursor: {cursor}")
+        return None
+    
+    # ----------------------------------------
+    # asyncio query path (for the FastAPI endpoints)
+    # ----------------------------------------
+    
+    async def _pages(self, response_future) -> AsyncIterator[list]:
+        """
+        Await the pages of an execute_async ResponseFuture without blocking the event loop
         
-        # Execute with paging state
-        if params:
-            result = self.session.execute(prepared_stmt, params, paging_state=decoded_paging_state)
+        The driver calls back from its I/O thread once per page; each page resolves an
+        asyncio future on the loop, and the next page is only requested once the
+        consumer asks for it.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = [loop.create_future()]
+        
+        def resolve(method, value):
+            if not waiter[0].done():
+                getattr(waiter[0], method)(value)
+        
+        response_future.add_callbacks(
+            lambda rows: loop.call_soon_threadsafe(resolve, 'set_result', rows),
+            lambda error: loop.call_soon_threadsafe(resolve, 'set_exception', error)
+        )
+        while True:
+            rows = await waiter[0]
+            yield rows or []
+            if not response_future.has_more_pages:
+                return
+            waiter[0] = loop.create_future()
+            response_future.start_fetching_next_page()
+    
+    @staticmethod
+    def _row_options(tuples: bool) -> Dict[str, Any]:
+        """
+        execute_async options selecting the row factory
+        """
+        return {'execution_profile': ROW_TUPLES} if tuples else {}
+    
+    async def _first_page(self, stmt_name: str, bind: Callable[[], Any], **options):
+        """
+        Send a statement with execute_async and await its first page
+        (re-preparing it once if the schema changed under it)
+        
+        Returns:
+            (ResponseFuture, async page iterator positioned after the first page, first page rows)
+        """
+        for attempt in (0, 1):
+            response_future = self.session.execute_async(bind(), **options)
+            pages = self._pages(response_future)
+            try:
+                return response_future, pages, await pages.__anext__()
+            except InvalidRequest as e:
+                if attempt:
+                    raise
+                logger.warning(f"Re-preparing {stmt_name} after error: {e}")
+                self.reprepare(stmt_name)
+    
+    async def execute_statement_async(self, stmt_name: str, params: tuple = (),
+                                      cache: bool = True, tuples: bool = False) -> List[Any]:
+        """
+        Execute a registered statement without blocking the event loop
+        
+        SELECTs on a table of settings.CACHE_TTL are served from the query cache when
+        possible (cache=False forces a read, e.g. before a read-modify-write); writes
+        drop the cached reads of their partition.
+        
+        Returns:
+            Every row of the result (further pages are fetched asynchronously), as
+            plain tuples if tuples=True (ROW_TUPLES profile)
+        """
+        prepared = self.statement(stmt_name)
+        tag = self.cache.tag_of(prepared, params) if self.cache is not None else None
+        cached_read = tag is not None and cache and prepared.query_string.lstrip()[:6].upper() == 'SELECT'
+        if cached_read:
+            key = (stmt_name, tuple(params), tuples)
+            value = self.cache.get(key)
+            if value is not MISS:
+                return list(value)
+            version = self.cache.version
+        
+        _, pages, rows = await self._first_page(stmt_name, lambda: self.statement(stmt_name).bind(params),
+                                                **self._row_options(tuples))
+        rows = list(rows)
+        async for page in pages:
+            rows.extend(page)
+        
+        if cached_read:
+            self.cache.put(key, tag, tuple(rows), version)
         else:
-            result = self.session.execute(prepared_stmt, paging_state=decoded_paging_state)
+            self._invalidate_written(prepared, params)
+        return rows
+    
+    async def lookup_many(self, stmt_name: str, keys: List[Any], concurrency: int = None,
+                          tuples: bool = False) -> Dict[Any, Optional[Any]]:
+        """
+        Single-partition lookup of many keys, at most `concurrency` reads in flight
+        
+        One token-aware query per key rather than an IN clause: each read goes to a
+        replica of its own partition instead of making one coordinator gather them all.
+        
+        Returns:
+            {key: first row or None}, in the order of keys (duplicates are read once)
+        """
+        slots = asyncio.Semaphore(concurrency or settings.BULK_CONCURRENCY)
+        keys = list(dict.fromkeys(keys))
+        
+        async def lookup(key):
+            async with slots:
+                rows = await self.execute_statement_async(stmt_name, (key,), tuples=tuples)
+            return rows[0] if rows else None
+        
+        rows = await asyncio.gather(*(lookup(key) for key in keys))
+        return dict(zip(keys, rows))
+    
+    async def merge_partitions_async(self, stmt_name: str, param_sets: List[tuple],
+                                     key: Callable[[Any], Any], fetch_size: int,
+                                     concurrency: int = None) -> AsyncIterator[Any]:
+        """
+        Run one paginated statement per partition in parallel and merge the results
+        
+        Each execution must return its rows sorted by `key` (clustering order), e.g.
+        the buckets of a sharded index. The first pages are read concurrently, then a
+        partition's next page is only requested once the merge has consumed its rows,
+        so every row is read once however far the caller iterates.
+        
+        Yields:
+            Rows of all partitions, in key order
+        """
+        slots = asyncio.Semaphore(concurrency or settings.BULK_CONCURRENCY)
+        # Small pages per partition: a page of the merge takes a few rows from each
+        per_partition = min(fetch_size, max(2 * fetch_size // max(len(param_sets), 1), 16))
+        
+        async def open_partition(params):
+            async with slots:
+                _, pages, rows = await self._first_page(
+                    stmt_name, lambda: self._bind_page(stmt_name, params, per_partition)
+                )
+                if not rows:
+                    rows = await _next_rows(pages)
+            return pages, rows
+        
+        partitions = await asyncio.gather(*(open_partition(params) for params in param_sets))
+        try:
+            heap = [(key(rows[0]), i, 0) for i, (_, rows) in enumerate(partitions) if rows]
+            heapq.heapify(heap)
+            while heap:
+                _, i, position = heap[0]
+                pages, rows = partitions[i]
+                yield rows[position]
+                position += 1
+                if position == len(rows):
+                    rows = await _next_rows(pages)
+                    partitions[i] = (pages, rows)
+                    position = 0
+                if rows:
+                    heapq.heapreplace(heap, (key(rows[position]), i, position))
+                else:
+                    heapq.heappop(heap)
+        finally:
+            for pages, _ in partitions:
+                await pages.aclose()
+    
+    async def get_paginated_results_async(self, query: str, params: tuple = None,
+                                          page_size: int = settings.DEFAULT_PAGE_SIZE,
+                                          paging_state: str = None,
+                                          tuples: bool = False) -> Tuple[List[Any], Optional[str]]:
+        """
+        Awaitable get_paginated_results: one page and the token of the next one
+        (rows as plain tuples if tuples=True)
+        """
+        response_future, pages, rows = await self._first_page(
+            query, lambda: self._bind_page(query, params, page_size),
+            paging_state=self._decode_paging_state(paging_state), **self._row_options(tuples)
+        )
+        await pages.aclose()
+        # The future is done: result() returns the current page without blocking
+        return list(rows), self._encode_paging_state(response_future.result().paging_state)
+    
+    async def fill_page_async(self, query: str, params: tuple, transform: Callable[[Any], Any],
+                              page_size: int, cursor: str = None, fetch_size: int = None,
+                              budget: int = None) -> Tuple[List[Any], Optional[str]]:
+        """
+        Page of rows filtered client-side: driver pages are read one after the other
+        until `page_size` rows pass `transform` (rows it maps to None are dropped) or
+        `budget` rows were examined
         
-        # Convert to list
-        rows = list(result.current_rows)
+        The cursor points at the first row not examined (page cursor, see
+        encode_page_cursor), so rows read but not returned are read again by the
+        next call instead of being skipped. It also holds the fetch size of its page:
+        a resumed call reads with that fetch size, whatever its own page_size.
         
-        # Encode next paging state if available
-        next_paging_state = None
-        if result.paging_state:
-            next_paging_state = base64.b64encode(result.paging_state).decode('utf-8')
+        Returns:
+            (transformed rows, cursor of the next call or None at the end of the results)
+        """
+        paging_state, offset, cursor_fetch_size = self.decode_page_cursor(cursor)
+        fetch_size = cursor_fetch_size or fetch_size or page_size
+        budget = budget or settings.SEARCH_SCAN_BUDGET
+        response_future, pages, rows = await self._first_page(
+            query, lambda: self._bind_page(query, params, fetch_size),
+            paging_state=paging_state
+        )
+        results, examined = [], 0
+        try:
+            while True:
+                # State of the page after this one (None on the last page)
+                next_state = response_future.result().paging_state
+                for i in range(offset, len(rows)):
+                    examined += 1
+                    item = transform(rows[i])
+                    if item is not None:
+                        results.append(item)
+                    if len(results) >= page_size or examined >= budget:
+                        if i + 1 < len(rows):
+                            return results, self.encode_page_cursor(paging_state, i + 1, fetch_size)
+                        return results, self.encode_page_cursor(next_state, 0, fetch_size) if next_state else None
+                if not next_state:
+                    return results, None
+                paging_state, offset = next_state, 0
+                rows = await pages.__anext__()
+        finally:
+            await pages.aclose()
+    
+    async def fill_merged_page_async(self, stmt_name: str, param_sets: Callable[[tuple], List[tuple]],
+                                     key: Callable[[Any], tuple], transform: Callable[[Any], Any],
+                                     page_size: int, cursor: str = None, start: tuple = None,
+                                     fetch_size: int = None, budget: int = None) -> Tuple[List[Any], Optional[str]]:
+        """
+        fill_page_async over merged partitions (merge_partitions_async), resuming
+        after the key of the last row examined
+        
+        Args:
+            param_sets: key after which to read -> parameters of each partition's query
+            key: clustering key of a row (what the key cursor holds)
+            start: key to read after when there is no cursor
+        
+        Returns:
+            (transformed rows, key cursor of the next call or None at the end of the results)
+        """
+        after = self.decode_key_cursor(cursor) or start
+        budget = budget or settings.SEARCH_SCAN_BUDGET
+        rows = self.merge_partitions_async(stmt_name, param_sets(after), key, fetch_size or page_size)
+        results, examined = [], 0
+        try:
+            async for row in rows:
+                examined += 1
+                item = transform(row)
+                if item is not None:
+                    results.append(item)
+                if len(results) >= page_size or examined >= budget:
+                    # More rows after this one? (usually already buffered)
+                    async for _ in rows:
+                        return results, self.encode_key_cursor(key(row))
+                    return results, None
+            return results, None
+        finally:
+            await rows.aclose()
+    
+    async def scan_table_async(self, table: str, columns: List[str], partition_key: List[str],
+                               splits: int = None, distinct: bool = False) -> AsyncIterator[Any]:
+        """
+        Asynchronous scan_table: token sub-ranges are read with execute_async, at most
+        settings.SCAN_CONCURRENCY at a time, and their pages streamed through a bounded
+        queue. Closing the generator early (await rows.aclose()) cancels the remaining
+        sub-ranges.
+        
+        Yields:
+            Rows in no particular order
+        """
+        splits = splits or settings.SCAN_SPLITS
+        statement = self._scan_statement(table, columns, partition_key, distinct)
+        ranges = self.token_ranges(splits)
+        pages = asyncio.Queue(maxsize=settings.SCAN_CONCURRENCY * 2)
+        slots = asyncio.Semaphore(settings.SCAN_CONCURRENCY)
+        
+        async def read_range(start, end):
+            async with slots:
+                try:
+                    async for page in self._pages(self.session.execute_async(statement, (start, end))):
+                        await pages.put(page)
+                except Exception as e:
+                    await pages.put(e)
+                    return
+            await pages.put(_RANGE_DONE)
+        
+        tasks = [asyncio.ensure_future(read_range(start, end)) for start, end in ranges]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                page = await pages.get()
+                if page is _RANGE_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    for row in page:
+                        yield row
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def prepare_cached(self, name: str, query: str) -> PreparedStatement:
+        """
+        Register a statement under name and return it prepared (once)
+        """
+        self.register(name, query)
+        return self.statement(name)
+    
+    @staticmethod
+    def token_ranges(splits: int) -> List[Tuple[int, int]]:
+        """
+        Split the Murmur3 token ring into `splits` contiguous (start, end] ranges
+        """
+        step = (MAX_TOKEN - MIN_TOKEN) // splits
+        bounds = [MIN_TOKEN + i * step for i in range(splits)] + [MAX_TOKEN]
+        return list(zip(bounds[:-1], bounds[1:]))
+    
+    def _scan_statement(self, table: str, columns: List[str], partition_key: List[str],
+                        distinct: bool = False) -> PreparedStatement:
+        """
+        Prepared token-range SELECT used by the parallel scanners
+        """
+        partition_key = ", ".join(partition_key)
+        select = ("DISTINCT " if distinct else "") + ", ".join(columns)
+        return self.prepare_cached(
+            f"scan:{table}:{select}",
+            f"SELECT {select} FROM {table} "
+            f"WHERE token({partition_key}) > ? AND token({partition_key}) <= ?"
+        )
+    
+    def scan_table(self, table: str, columns: List[str], partition_key: List[str],
+                   splits: int = None, distinct: bool = False):
+        """
+        Full-table scan split into token sub-ranges read concurrently
+        
+        Each sub-range is queried with token(pk) > ? AND token(pk) <= ? by a worker
+        thread and its pages are streamed back through a bounded queue, so the scan
+        is spread over every node and memory stays bounded. Stopping the iteration
+        early cancels the remaining sub-ranges.
+        
+        Args:
+            distinct: SELECT DISTINCT (columns must then be the partition key)
+        
+        Yields:
+            Rows in no particular order
+        """
+        splits = splits or settings.SCAN_SPLITS
+        statement = self._scan_statement(table, columns, partition_key, distinct)
+        
+        ranges = self.token_ranges(splits)
+        pages = queue.Queue(maxsize=settings.SCAN_CONCURRENCY * 2)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=min(settings.SCAN_CONCURRENCY, len(ranges)))
+        
+        for start, end in ranges:
+            pool.submit(self._scan_range, statement, start, end, pages, stop)
+        
+        remaining = len(ranges)
+        try:
+            while remaining:
+                page = pages.get()
+                if page is _RANGE_DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+    
+    def scan_aggregate(self, table: str, columns: List[str], partition_key: List[str],
+                       aggregator: Callable[[Iterator[Any]], Any], splits: int = None,
+                       distinct: bool = False) -> List[Any]:
+        """
+        Token-range parallel scan handing each sub-range to a per-range aggregator
+        
+        aggregator(rows) runs in a worker thread with an iterator over the rows of
+        one sub-range (further pages are fetched as it is consumed) and returns a
+        partial result. Combining the partials is left to the caller.
+        
+        Returns:
+            List of partial results, one per sub-range
+        """
+        splits = splits or settings.SCAN_SPLITS
+        statement = self._scan_statement(table, columns, partition_key, distinct)
+        ranges = self.token_ranges(splits)
+        
+        def aggregate_range(start, end):
+            return aggregator(iter(self.session.execute(statement, (start, end))))
+        
+        with ThreadPoolExecutor(max_workers=min(settings.SCAN_CONCURRENCY, len(ranges))) as pool:
+            futures = [pool.submit(aggregate_range, start, end) for start, end in ranges]
+            return [future.result() for future in futures]
+    
+    def count_rows(self, table: str, partition_key: List[str], splits: int = None) -> int:
+        """
+        Exact row count of a table: one COUNT(*) per token sub-range, run in parallel
+        """
+        partials = self.scan_aggregate(table, ['COUNT(*)'], partition_key,
+                                       lambda rows: next(rows).count, splits)
+        return sum(partials)
+    
+    def _scan_range(self, statement: PreparedStatement, start: int, end: int,
+                    pages: queue.Queue, stop: threading.Event) -> None:
+        """
+        Read one token range page by page into the scan queue (worker thread)
+        """
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
         
-        return rows, next_paging_state
+        try:
+            result = self.session.execute(statement, (start, end))
+            while put(result.current_rows) and result.has_more_pages:
+                result.fetch_next_page()
+        except Exception as e:
+            put(e)
+        finally:
+            put(_RANGE_DONE)
     
     def close(self):
         """
@@ -522,5 +1645,158 @@ class CassandraDAO:
             logger.info("Cassandra connection closed")
 
 
+class BatchWriter:
+    """
+    Writer that accumulates statements and sends them through execute_batch
+    """
+    
+    def __init__(self, dao: CassandraDAO, batch_size: int = None):
+        self.dao = dao
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        self.pending = []
+        self.submitted = 0
+    
+    def submit(self, stmt_name: str, params: tuple) -> None:
+        """
+        Queue a statement, sending the batch when it reaches batch_size
+        """
+        self.pending.append((stmt_name, params))
+        self.submitted += 1
+        if len(self.pending) >= self.batch_size:
+            self._send_pending()
+    
+    def submit_many(self, statements_with_params: List[Tuple[str, tuple]]) -> None:
+        """
+        Queue several (statement_name, params) tuples
+        """
+        for stmt_name, params in statements_with_params:
+            self.submit(stmt_name, params)
+    
+    def _send_pending(self) -> None:
+        if self.pending:
+            self.dao.execute_batch(self.pending)
+            self.pending = []
+    
+    def flush(self) -> None:
+        """
+        Send everything still queued
+        """
+        self._send_pending()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            # Clear the API query caches once ingestion wrote something
+            if self.submitted and self.dao.cache is not None:
+                self.dao.cache.bump_epoch()
+        return False
+
+
+class AsyncWriter(BatchWriter):
+    """
+    Pipelined writer based on session.execute_async
+    Keeps at most `concurrency` requests in flight and retries failed writes with exponential backoff
+    """
+    
+    def __init__(self, dao: CassandraDAO, concurrency: int = None,
+                 max_retries: int = None, retry_delay: float = None):
+        super().__init__(dao)
+        self.concurrency = concurrency or settings.WRITE_CONCURRENCY
+        self.max_retries = settings.WRITE_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.WRITE_RETRY_DELAY if retry_delay is None else retry_delay
+        
+        self.completed = 0
+        self.retried = 0
+        self.failures = []
+        
+        self._slots = threading.Semaphore(self.concurrency)
+        self._state = threading.Condition()
+        self._in_flight = 0
+        self._retries = deque()
+    
+    def submit(self, stmt_name: str, params: tuple) -> None:
+        """
+        Send a statement asynchronously, blocking only while the in-flight window is full
+        """
+        self._resubmit_failed()
+        self.submitted += 1
+        self._send(stmt_name, params, 0)
+    
+    def _send(self, stmt_name: str, params: tuple, attempt: int) -> None:
+        statement = self.dao.bind_statement(stmt_name, params)
+        
+        self._slots.acquire()
+        with self._state:
+            self._in_flight += 1
+        
+        try:
+            future = self.dao.session.execute_async(statement)
+        except Exception as e:
+            self._on_error(e, stmt_name, params, attempt)
+            return
+        
+        future.add_callbacks(
+            self._on_success, self._on_error,
+            errback_args=(stmt_name, params, attempt)
+        )
+    
+    def _on_success(self, _result) -> None:
+        # Runs on the driver event loop thread
+        with self._state:
+            self.completed += 1
+            self._in_flight -= 1
+            self._state.notify_all()
+        self._slots.release()
+    
+    def _on_error(self, error: Exception, stmt_name: str, params: tuple, attempt: int) -> None:
+        # Runs on the driver event loop thread - retries are re-sent from the caller thread
+        with self._state:
+            if attempt < self.max_retries:
+                self._retries.append((stmt_name, params, attempt + 1, error))
+            else:
+                self.failures.append((stmt_name, params, error))
+            self._in_flight -= 1
+            self._state.notify_all()
+        self._slots.release()
+    
+    def _resubmit_failed(self) -> None:
+        while True:
+            with self._state:
+                if not self._retries:
+                    return
+                stmt_name, params, attempt, error = self._retries.popleft()
+            
+            delay = self.retry_delay * (2 ** (attempt - 1))
+            logger.warning(f"Retrying {stmt_name} (attempt {attempt}/{self.max_retries}) in {delay:.2f}s: {error}")
+            time.sleep(delay)
+            self.retried += 1
+            self._send(stmt_name, params, attempt)
+    
+    def flush(self) -> None:
+        """
+        Wait for every in-flight write (including retries) to complete
+        Raises RuntimeError if some writes still failed after max_retries
+        """
+        while True:
+            with self._state:
+                while self._in_flight and not self._retries:
+                    self._state.wait()
+                if not self._in_flight and not self._retries:
+                    break
+            self._resubmit_failed()
+        
+        if self.failures:
+            stmt_name, _, error = self.failures[0]
+            raise RuntimeError(
+                f"{len(self.failures)} writes failed after {self.max_retries} retries "
+                f"(first: {stmt_name}: {error})"
+            )
+
+
 # Global DAO instance
 dao = CassandraDAO()
\ No newline at end of file
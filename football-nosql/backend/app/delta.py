@@ -0,0 +1,142 @@
+"""
+Incremental (delta) ingestion support
+Keeps a local manifest of row fingerprints per target table so re-runs only write
+new or changed rows, and optionally delete rows that vanished from the source
+"""
+import logging
+import os
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path for imports
+backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_path)
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Stored for keys that appeared several times in one run: every occurrence is
+# rewritten next time so the last one still wins
+DUPLICATE_KEY_HASH = np.uint64(0)
+
+
+def _fingerprint(frame: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash of every row of frame (values only, index ignored)
+    """
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+class DeltaManifest:
+    """
+    Row fingerprints of the last successful ingestion into one table
+
+    Rows are identified by the table's primary-key columns. filter() can be called
+    once per DataFrame or once per chunk; save() must only be called after the
+    writes succeeded.
+    """
+
+    def __init__(self, table: str, key_columns: List[str], enabled: Optional[bool] = None):
+        self.table = table
+        self.key_columns = list(key_columns)
+        self.enabled = settings.DELTA_MODE if enabled is None else enabled
+        self.path = os.path.join(settings.DELTA_MANIFEST_DIR, f"{table}.pkl")
+
+        self.written = 0
+        self.unchanged = 0
+        self._seen = []
+        self._previous = self._load() if self.enabled else None
+
+    def _load(self) -> Optional[pd.DataFrame]:
+        if not os.path.exists(self.path):
+            logger.info(f"No manifest for {self.table}, every row will be written")
+            return None
+
+        previous = pd.read_pickle(self.path)
+        if list(previous.columns[:-2]) != self.key_columns:
+            logger.warning(f"Manifest for {self.table} has different key columns, ignoring it")
+            return None
+        return previous
+
+    def filter(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return the rows of frame that are new or changed since the last run
+        Columns of frame must be named after the table columns
+        """
+        if not self.enabled:
+            self.written += len(frame)
+            return frame
+
+        key_hash = _fingerprint(frame[self.key_columns])
+        row_hash = _fingerprint(frame)
+
+        self._seen.append(pd.DataFrame({
+            **{column: frame[column].to_numpy() for column in self.key_columns},
+            'key_hash': key_hash,
+            'row_hash': row_hash
+        }))
+
+        if self._previous is None:
+            changed = np.ones(len(frame), dtype=bool)
+        else:
+            positions = pd.Index(self._previous['key_hash']).get_indexer(key_hash)
+            previous_hash = self._previous['row_hash'].to_numpy()[positions]
+            changed = (positions == -1) | (previous_hash != row_hash)
+
+        self.written += int(changed.sum())
+        self.unchanged += int(len(frame) - changed.sum())
+        return frame[changed]
+
+    def _current(self) -> pd.DataFrame:
+        if not self._seen:
+            return pd.DataFrame(columns=self.key_columns + ['key_hash', 'row_hash'])
+
+        current = pd.concat(self._seen, ignore_index=True)
+        duplicated = current['key_hash'].duplicated(keep=False)
+        current.loc[duplicated, 'row_hash'] = DUPLICATE_KEY_HASH
+        return current.drop_duplicates('key_hash', keep='last')
+
+    def removed_keys(self) -> List[tuple]:
+        """
+        Primary keys present in the previous run but absent from this one
+        """
+        if not self.enabled or self._previous is None:
+            return []
+
+        current = self._current()
+        removed = self._previous[~self._previous['key_hash'].isin(current['key_hash'])]
+        return list(removed[self.key_columns].itertuples(index=False, name=None))
+
+    def submit_deletes(self, writer) -> int:
+        """
+        Queue deletes for vanished rows on a dao writer (only when settings.DELTA_DELETES)
+        """
+        if not settings.DELTA_DELETES:
+            return 0
+
+        removed = self.removed_keys()
+        if removed:
+            stmt_name = writer.dao.prepare_delete(self.table, self.key_columns)
+            for key in removed:
+                writer.submit(stmt_name, key)
+            logger.info(f"Deleted {len(removed)} vanished rows from {self.table}")
+        return len(removed)
+
+    def save(self) -> None:
+        """
+        Persist the fingerprints of this run (call after the writes succeeded)
+        """
+        if not self.enabled:
+            return
+
+        os.makedirs(settings.DELTA_MANIFEST_DIR, exist_ok=True)
+        current = self._current()
+        tmp_path = f"{self.path}.tmp"
+        current[self.key_columns + ['key_hash', 'row_hash']].to_pickle(tmp_path)
+        os.replace(tmp_path, self.path)
+
+        logger.info(f"Delta {self.table}: {self.written} written, {self.unchanged} unchanged")
@@ -6,6 +6,7 @@ from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+import asyncio
 import logging
 import sys
 import os
@@ -17,6 +18,9 @@ sys.path.append(backend_path)
 
 import settings
 from app.dao import dao
+from app.search_index import FACET_SCOPE, SORT_MARKET_VALUE_DESC, plan_search, refresh_player
+from app.serialization import FastJSONResponse
+from app.team_index import TeamNameIndex, normalize
 from app.utils import *
 
 logging.basicConfig(level=logging.INFO)
@@ -90,15 +94,62 @@ class InjuryAdd(BaseModel):
     games_missed: Optional[int] = None
     ttl_seconds: Optional[int] = None  # For TTL demonstration
 
+class PlayerIds(BaseModel):
+    player_ids: List[str]
+
+class TeamIds(BaseModel):
+    team_ids: List[str]
+
 class PaginatedResponse(BaseModel):
     data: List[Dict[str, Any]]
     paging_state: Optional[str] = None
     has_more: bool = False
 
+# ========================================
+# ROW FORMATTERS
+# ========================================
+
+# Les lignes sont converties par l'encodeur de leur requête (app/serialization.py) :
+# clés = colonnes du SELECT, dates au format ISO. Avec settings.FAST_JSON, elles sont
+# lues en tuples et les réponses sont encodées directement (orjson si installé)
+
+MARKET_VALUE_COLUMNS = ('as_of_date', 'market_value_eur', 'source')
+
+def rows_json(stmt_name: str, rows, columns: tuple = None) -> List[Dict[str, Any]]:
+    """Lignes d'une requête en dicts JSON"""
+    return dao.row_encoder(stmt_name, columns).many(rows)
+
+def row_json(stmt_name: str, row, columns: tuple = None) -> Optional[Dict[str, Any]]:
+    """Ligne d'une requête en dict JSON (None si pas de ligne)"""
+    return dao.row_encoder(stmt_name, columns)(row) if row is not None else None
+
+def json_response(content: Dict[str, Any]):
+    """Contenu déjà JSON : encodé directement si settings.FAST_JSON, sinon par FastAPI"""
+    return FastJSONResponse(content) if settings.FAST_JSON else content
+
+def paginated_response(data: List[Dict[str, Any]], paging_state: Optional[str]):
+    """Page de résultats (PaginatedResponse, validée par pydantic sans settings.FAST_JSON)"""
+    if settings.FAST_JSON:
+        return FastJSONResponse({"data": data, "paging_state": paging_state, "has_more": paging_state is not None})
+    return PaginatedResponse(data=data, paging_state=paging_state, has_more=paging_state is not None)
+
 # ========================================
 # STARTUP/SHUTDOWN EVENTS
 # ========================================
 
+# Index des noms d'équipes (/teams/search), construit en tâche de fond au démarrage
+team_index = TeamNameIndex()
+background_tasks = []
+
+async def maintain_team_index():
+    """Construit l'index des équipes puis le met à jour périodiquement (différences seulement)"""
+    while True:
+        try:
+            await team_index.refresh(dao)
+        except Exception as e:
+            logger.error(f"Échec de la mise à jour de l'index des équipes : {e}")
+        await asyncio.sleep(settings.TEAM_INDEX_REFRESH)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialise la connexion à la base de données au démarrage"""
@@ -108,10 +159,13 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Échec de connexion à la base de données : {e}")
         raise
+    background_tasks.append(asyncio.create_task(maintain_team_index()))
 
 @app.on_event("shutdown") 
 async def shutdown_event():
     """Ferme la connexion à la base de données lors de l'arrêt"""
+    for task in background_tasks:
+        task.cancel()
     dao.close()
     logger.info("Connexion à la base de données fermée")
 
@@ -124,6 +178,13 @@ async def health_check():
     """Point de contrôle de santé de l'API"""
     return {"status": "healthy", "message": "API Football NoSQL opérationnelle"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Compteurs du cache de lecture (hits, misses, évictions) pour le dimensionner"""
+    if dao.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **dao.cache.stats()}
+
 # ========================================
 # TEAM & PLAYER LOOKUPS
 # ========================================
@@ -137,25 +198,10 @@ async def get_players_by_team(
     Récupère les joueurs par équipe (démontre l'utilisation des clés de partition)
     """
     try:
-        query = """
-        SELECT player_id, player_name, position, nationality 
-        FROM players_by_team 
-        WHERE team_id = ? 
-        LIMIT ?
-        """
+        result = await dao.execute_statement_async('get_players_by_team', (team_id, limit), tuples=settings.FAST_JSON)
+        players = rows_json('get_players_by_team', result)
         
-        result = dao.session.execute(dao.session.prepare(query), (team_id, limit))
-        players = []
-        
-        for row in result:
-            players.append({
-                "player_id": row.player_id,
-                "player_name": row.player_name,
-                "position": row.position,
-                "nationality": row.nationality
-            })
-        
-        return {"team_id": team_id, "players": players}
+        return json_response({"team_id": team_id, "players": players})
         
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des joueurs par équipe : {e}")
@@ -167,24 +213,12 @@ async def get_player_profile(player_id: str):
     Get player profile (demonstrates single partition lookup)
     """
     try:
-        result = dao.execute_statement('get_player_profile', (player_id,))
-        rows = list(result)
+        rows = await dao.execute_statement_async('get_player_profile', (player_id,), tuples=settings.FAST_JSON)
         
         if not rows:
             raise HTTPException(status_code=404, detail="Joueur non trouvé")
         
-        row = rows[0]
-        
-        return {
-            "player_id": row.player_id,
-            "player_name": row.player_name,
-            "nationality": row.nationality,
-            "birth_date": row.birth_date.date().isoformat() if row.birth_date else None,
-            "height_cm": row.height_cm,
-            "preferred_foot": row.preferred_foot,
-            "main_position": row.main_position,
-            "current_team_id": row.current_team_id
-        }
+        return json_response(row_json('get_player_profile', rows[0]))
         
     except HTTPException:
         raise
@@ -192,6 +226,32 @@ async def get_player_profile(player_id: str):
         logger.error(f"Error getting player profile: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def check_bulk_ids(ids: List[str]) -> None:
+    """Refuse les requêtes groupées vides ou trop grandes"""
+    if not ids:
+        raise HTTPException(status_code=400, detail="Liste d'identifiants vide")
+    if len(ids) > settings.BULK_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Au plus {settings.BULK_MAX_IDS} identifiants par requête")
+
+@app.post("/players/profiles")
+async def get_player_profiles(request: PlayerIds):
+    """
+    Profils de plusieurs joueurs en une requête (lectures de partition concurrentes, sans IN)
+    Les identifiants inconnus valent null et sont listés dans "missing"
+    """
+    check_bulk_ids(request.player_ids)
+    try:
+        rows = await dao.lookup_many('get_player_profile', request.player_ids, tuples=settings.FAST_JSON)
+        
+        return json_response({
+            "players": {player_id: row_json('get_player_profile', row) for player_id, row in rows.items()},
+            "missing": [player_id for player_id, row in rows.items() if row is None]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting player profiles: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 # ========================================
 # MARKET VALUES (TIME-SERIES & PAGINATION)
 # ========================================
@@ -202,26 +262,12 @@ async def get_latest_market_value(player_id: str):
     Get latest market value (demonstrates materialized view pattern)
     """
     try:
-        query = """
-        SELECT player_id, as_of_date, market_value_eur, source
-        FROM latest_market_value_by_player 
-        WHERE player_id = ?
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query), (player_id,))
-        rows = list(result)
+        rows = await dao.execute_statement_async('get_latest_market_value', (player_id,), tuples=settings.FAST_JSON)
         
         if not rows:
             return {"player_id": player_id, "market_value": None}
         
-        row = rows[0]
-        
-        return {
-            "player_id": row.player_id,
-            "as_of_date": row.as_of_date.date().isoformat() if row.as_of_date else None,
-            "market_value_eur": row.market_value_eur,
-            "source": row.source
-        }
+        return json_response(row_json('get_latest_market_value', rows[0]))
         
     except Exception as e:
         logger.error(f"Error getting latest market value: {e}")
@@ -237,29 +283,11 @@ async def get_market_value_history(
     Get market value history with pagination (demonstrates NoSQL pagination with paging_state)
     """
     try:
-        query = """
-        SELECT as_of_date, market_value_eur, source
-        FROM market_value_by_player 
-        WHERE player_id = ?
-        """
-        
-        rows, next_paging_state = dao.get_paginated_results(
-            query, (player_id,), page_size, paging_state
+        rows, next_paging_state = await dao.get_paginated_results_async(
+            'get_market_history', (player_id,), page_size, paging_state, tuples=settings.FAST_JSON
         )
         
-        data = []
-        for row in rows:
-            data.append({
-                "as_of_date": row.as_of_date.date().isoformat() if row.as_of_date else None,
-                "market_value_eur": row.market_value_eur,
-                "source": row.source
-            })
-        
-        return PaginatedResponse(
-            data=data,
-            paging_state=next_paging_state,
-            has_more=next_paging_state is not None
-        )
+        return paginated_response(rows_json('get_market_history', rows), next_paging_state)
         
     except Exception as e:
         logger.error(f"Error getting market value history: {e}")
@@ -273,29 +301,29 @@ async def add_market_value(player_id: str, market_value: MarketValueAdd):
     try:
         # Insert with optional TTL
         if market_value.ttl_seconds:
-            dao.execute_statement('insert_market_value_ttl', (
+            await dao.execute_statement_async('insert_market_value_ttl', (
                 player_id, market_value.as_of_date, market_value.market_value_eur,
                 market_value.source, market_value.ttl_seconds
             ))
         else:
-            dao.execute_statement('insert_market_value', (
+            await dao.execute_statement_async('insert_market_value', (
                 player_id, market_value.as_of_date, market_value.market_value_eur,
                 market_value.source
             ))
         
         # Check if this is now the latest value and update materialized view
-        latest_query = """
-        SELECT as_of_date FROM latest_market_value_by_player WHERE player_id = ?
-        """
-        result = dao.session.execute(dao.session.prepare(latest_query), (player_id,))
+        result = await dao.execute_statement_async('get_latest_market_date', (player_id,), cache=False)
         latest_rows = list(result)
         
-        if not latest_rows or market_value.as_of_date > latest_rows[0].as_of_date:
+        # as_of_date lu est une cassandra.util.Date : comparaison sur sa date Python
+        if not latest_rows or market_value.as_of_date > latest_rows[0].as_of_date.date():
             # Update latest market value
-            dao.execute_statement('upsert_latest_market_value', (
+            await dao.execute_statement_async('upsert_latest_market_value', (
                 player_id, market_value.as_of_date, market_value.market_value_eur,
                 market_value.source
             ))
+            # Tables de recherche (valeur marchande dénormalisée)
+            await refresh_player(dao, player_id)
         
         return {"message": "Market value added successfully", "ttl_applied": market_value.ttl_seconds is not None}
         
@@ -316,26 +344,10 @@ async def get_player_transfers(
     Get player transfer history (demonstrates time-series with DESC clustering)
     """
     try:
-        query = """
-        SELECT transfer_date, from_team_id, to_team_id, fee_eur, contract_years
-        FROM transfers_by_player 
-        WHERE player_id = ?
-        LIMIT ?
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query), (player_id, limit))
-        transfers = []
+        result = await dao.execute_statement_async('get_transfers', (player_id, limit), tuples=settings.FAST_JSON)
+        transfers = rows_json('get_transfers', result)
         
-        for row in result:
-            transfers.append({
-                "transfer_date": row.transfer_date.date().isoformat() if row.transfer_date else None,
-                "from_team_id": row.from_team_id,
-                "to_team_id": row.to_team_id,
-                "fee_eur": row.fee_eur,
-                "contract_years": row.contract_years
-            })
-        
-        return {"player_id": player_id, "transfers": transfers}
+        return json_response({"player_id": player_id, "transfers": transfers})
         
     except Exception as e:
         logger.error(f"Error getting player transfers: {e}")
@@ -350,26 +362,10 @@ async def get_top_transfers_by_season(
     Get top transfers by season (demonstrates pre-aggregation pattern)
     """
     try:
-        query = """
-        SELECT fee_eur, player_id, to_team_id, from_team_id, transfer_date
-        FROM top_transfers_by_season 
-        WHERE season = ?
-        LIMIT ?
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query), (season, limit))
-        transfers = []
-        
-        for row in result:
-            transfers.append({
-                "fee_eur": row.fee_eur,
-                "player_id": row.player_id,
-                "to_team_id": row.to_team_id,
-                "from_team_id": row.from_team_id,
-                "transfer_date": row.transfer_date.date().isoformat() if row.transfer_date else None
-            })
+        result = await dao.execute_statement_async('get_top_transfers', (season, limit), tuples=settings.FAST_JSON)
+        transfers = rows_json('get_top_transfers', result)
         
-        return {"season": season, "top_transfers": transfers}
+        return json_response({"season": season, "top_transfers": transfers})
         
     except Exception as e:
         logger.error(f"Error getting top transfers: {e}")
@@ -382,19 +378,21 @@ async def add_transfer(player_id: str, transfer: TransferAdd):
     """
     try:
         # Insert into main transfer table
-        dao.execute_statement('insert_transfer', (
+        await dao.execute_statement_async('insert_transfer', (
             player_id, transfer.transfer_date, transfer.from_team_id,
             transfer.to_team_id, transfer.fee_eur, transfer.contract_years
         ))
         
-        # Update pre-aggregation if season provided and fee > 0
+        # Update pre-aggregation if season provided and fee > 0: the season keeps
+        # exactly its top settings.TOP_TRANSFERS_K transfers
+        pre_aggregated = False
         if transfer.season and transfer.fee_eur > 0:
-            dao.execute_statement('insert_top_transfer', (
+            pre_aggregated = await dao.update_top_transfers((
                 transfer.season, transfer.fee_eur, player_id,
                 transfer.to_team_id, transfer.from_team_id, transfer.transfer_date
             ))
         
-        return {"message": "Transfer added successfully", "pre_aggregated": bool(transfer.season and transfer.fee_eur > 0)}
+        return {"message": "Transfer added successfully", "pre_aggregated": pre_aggregated}
         
     except Exception as e:
         logger.error(f"Error adding transfer: {e}")
@@ -413,25 +411,10 @@ async def get_player_injuries(
     Get player injury history (demonstrates time-series)
     """
     try:
-        query = """
-        SELECT start_date, injury_type, end_date, games_missed
-        FROM injuries_by_player 
-        WHERE player_id = ?
-        LIMIT ?
-        """
+        result = await dao.execute_statement_async('get_injuries', (player_id, limit), tuples=settings.FAST_JSON)
+        injuries = rows_json('get_injuries', result)
         
-        result = dao.session.execute(dao.session.prepare(query), (player_id, limit))
-        injuries = []
-        
-        for row in result:
-            injuries.append({
-                "start_date": row.start_date.date().isoformat() if row.start_date else None,
-                "injury_type": row.injury_type,
-                "end_date": row.end_date.date().isoformat() if row.end_date else None,
-                "games_missed": row.games_missed
-            })
-        
-        return {"player_id": player_id, "injuries": injuries}
+        return json_response({"player_id": player_id, "injuries": injuries})
         
     except Exception as e:
         logger.error(f"Error getting player injuries: {e}")
@@ -444,12 +427,12 @@ async def add_injury(player_id: str, injury: InjuryAdd):
     """
     try:
         if injury.ttl_seconds:
-            dao.execute_statement('insert_injury_ttl', (
+            await dao.execute_statement_async('insert_injury_ttl', (
                 player_id, injury.start_date, injury.injury_type,
                 injury.end_date, injury.games_missed, injury.ttl_seconds
             ))
         else:
-            dao.execute_statement('insert_injury', (
+            await dao.execute_statement_async('insert_injury', (
                 player_id, injury.start_date, injury.injury_type,
                 injury.end_date, injury.games_missed
             ))
@@ -470,7 +453,7 @@ async def delete_injury(
     WARNING: This creates tombstones - use sparingly in production
     """
     try:
-        dao.execute_statement('delete_injury', (player_id, start_date))
+        await dao.execute_statement_async('delete_injury', (player_id, start_date))
         
         return {
             "message": "Injury deleted (tombstone created)",
@@ -495,32 +478,13 @@ async def get_club_performances(
     """
     try:
         if season:
-            query = """
-            SELECT season, team_id, matches, goals, assists, minutes
-            FROM club_performances_by_player_season 
-            WHERE player_id = ? AND season = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (player_id, season))
+            stmt_name, params = 'get_club_performances_season', (player_id, season)
         else:
-            query = """
-            SELECT season, team_id, matches, goals, assists, minutes
-            FROM club_performances_by_player_season 
-            WHERE player_id = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (player_id,))
-        
-        performances = []
-        for row in result:
-            performances.append({
-                "season": row.season,
-                "team_id": row.team_id,
-                "matches": row.matches,
-                "goals": row.goals,
-                "assists": row.assists,
-                "minutes": row.minutes
-            })
+            stmt_name, params = 'get_club_performances', (player_id,)
+        result = await dao.execute_statement_async(stmt_name, params, tuples=settings.FAST_JSON)
+        performances = rows_json(stmt_name, result)
         
-        return {"player_id": player_id, "club_performances": performances}
+        return json_response({"player_id": player_id, "club_performances": performances})
         
     except Exception as e:
         logger.error(f"Error getting club performances: {e}")
@@ -536,32 +500,13 @@ async def get_national_performances(
     """
     try:
         if season:
-            query = """
-            SELECT season, national_team, matches, goals, assists, minutes
-            FROM national_performances_by_player_season 
-            WHERE player_id = ? AND season = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (player_id, season))
+            stmt_name, params = 'get_national_performances_season', (player_id, season)
         else:
-            query = """
-            SELECT season, national_team, matches, goals, assists, minutes
-            FROM national_performances_by_player_season 
-            WHERE player_id = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (player_id,))
-        
-        performances = []
-        for row in result:
-            performances.append({
-                "season": row.season,
-                "national_team": row.national_team,
-                "matches": row.matches,
-                "goals": row.goals,
-                "assists": row.assists,
-                "minutes": row.minutes
-            })
+            stmt_name, params = 'get_national_performances', (player_id,)
+        result = await dao.execute_statement_async(stmt_name, params, tuples=settings.FAST_JSON)
+        performances = rows_json(stmt_name, result)
         
-        return {"player_id": player_id, "national_performances": performances}
+        return json_response({"player_id": player_id, "national_performances": performances})
         
     except Exception as e:
         logger.error(f"Error getting national performances: {e}")
@@ -580,29 +525,87 @@ async def get_player_teammates(
     Get player teammates
     """
     try:
-        query = """
-        SELECT teammate_id, teammate_name, matches_together
-        FROM teammates_by_player 
-        WHERE player_id = ?
-        LIMIT ?
-        """
+        result = await dao.execute_statement_async('get_teammates', (player_id, limit), tuples=settings.FAST_JSON)
+        teammates = rows_json('get_teammates', result)
         
-        result = dao.session.execute(dao.session.prepare(query), (player_id, limit))
-        teammates = []
-        
-        for row in result:
-            teammates.append({
-                "teammate_id": row.teammate_id,
-                "teammate_name": row.teammate_name,
-                "matches_together": row.matches_together
-            })
-        
-        return {"player_id": player_id, "teammates": teammates}
+        return json_response({"player_id": player_id, "teammates": teammates})
         
     except Exception as e:
         logger.error(f"Error getting teammates: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# ========================================
+# PLAYER DOSSIER (CONCURRENT FAN-OUT)
+# ========================================
+
+DOSSIER_SECTIONS = ['profile', 'market_latest', 'market_history', 'transfers',
+                    'injuries', 'club_perf', 'nat_perf', 'teammates']
+
+async def first_page(stmt_name: str, params: tuple, limit: int) -> List[Any]:
+    """Premières `limit` lignes d'une partition (une seule page, sans LIMIT dans la requête)"""
+    rows, _ = await dao.get_paginated_results_async(stmt_name, params, limit, tuples=settings.FAST_JSON)
+    return rows
+
+@app.get("/player/{player_id}/dossier")
+async def get_player_dossier(
+    player_id: str,
+    include: Optional[str] = Query(None, description="Sections séparées par des virgules (toutes par défaut) : " + ", ".join(DOSSIER_SECTIONS)),
+    market_history_limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    transfers_limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    injuries_limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    club_perf_limit: int = Query(50, ge=1, le=settings.MAX_PAGE_SIZE),
+    nat_perf_limit: int = Query(50, ge=1, le=settings.MAX_PAGE_SIZE),
+    teammates_limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE)
+):
+    """
+    Dossier complet d'un joueur en un seul appel
+    Les lectures de partition de toutes les sections demandées partent en parallèle :
+    la latence est celle de la plus lente, et non leur somme
+    """
+    sections = DOSSIER_SECTIONS
+    if include:
+        sections = list(dict.fromkeys(name.strip() for name in include.split(',') if name.strip()))
+        unknown = [name for name in sections if name not in DOSSIER_SECTIONS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Sections inconnues : {', '.join(unknown)}")
+    
+    try:
+        key = (player_id,)
+        tuples = settings.FAST_JSON
+        reads = {
+            'profile': lambda: dao.execute_statement_async('get_player_profile', key, tuples=tuples),
+            'market_latest': lambda: dao.execute_statement_async('get_latest_market_value', key, tuples=tuples),
+            'market_history': lambda: first_page('get_market_history', key, market_history_limit),
+            'transfers': lambda: dao.execute_statement_async('get_transfers', (player_id, transfers_limit), tuples=tuples),
+            'injuries': lambda: dao.execute_statement_async('get_injuries', (player_id, injuries_limit), tuples=tuples),
+            'club_perf': lambda: first_page('get_club_performances', key, club_perf_limit),
+            'nat_perf': lambda: first_page('get_national_performances', key, nat_perf_limit),
+            'teammates': lambda: dao.execute_statement_async('get_teammates', (player_id, teammates_limit), tuples=tuples)
+        }
+        results = await asyncio.gather(*(reads[name]() for name in sections))
+        
+        formatters = {
+            'profile': lambda rows: row_json('get_player_profile', rows[0]) if rows else None,
+            'market_latest': lambda rows: row_json('get_latest_market_value', rows[0], MARKET_VALUE_COLUMNS) if rows else None,
+            'market_history': lambda rows: rows_json('get_market_history', rows),
+            'transfers': lambda rows: rows_json('get_transfers', rows),
+            'injuries': lambda rows: rows_json('get_injuries', rows),
+            'club_perf': lambda rows: rows_json('get_club_performances', rows),
+            'nat_perf': lambda rows: rows_json('get_national_performances', rows),
+            'teammates': lambda rows: rows_json('get_teammates', rows)
+        }
+        dossier = {"player_id": player_id}
+        for name, rows in zip(sections, results):
+            dossier[name] = formatters[name](rows)
+        
+    except Exception as e:
+        logger.error(f"Error getting player dossier: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    if 'profile' in dossier and dossier['profile'] is None:
+        raise HTTPException(status_code=404, detail="Joueur non trouvé")
+    return json_response(dossier)
+
 # ========================================
 # TEAM DATA
 # ========================================
@@ -616,32 +619,29 @@ async def search_teams(
     Recherche d'équipes par nom (pour l'autocomplétion)
     """
     try:
-        # Récupération de toutes les équipes et filtrage côté application
-        # (alternative à LIKE qui nécessite un index secondaire en Cassandra)
-        query = """
-        SELECT team_id, team_name, country, city
-        FROM team_details_by_id 
-        LIMIT 1000
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query))
+        # Index en mémoire des noms normalisés (sans accents ni casse) :
+        # classement exact > début du nom > début de mot > sous-chaîne
+        if team_index.ready:
+            return json_response({"query": q, "teams": team_index.search(q, limit)})
+        
+        # Index pas encore construit : scan parallèle de toutes les équipes et filtrage
+        # côté application (alternative à LIKE qui nécessite un index secondaire en Cassandra)
+        # Le scan s'arrête dès que `limit` équipes correspondent
         teams = []
-        search_term = q.lower()
-        count = 0
+        search_term = normalize(q)
         
-        for row in result:
-            if count >= limit:
-                break
-                
-            team_name_lower = row.team_name.lower() if row.team_name else ""
-            if search_term in team_name_lower:
+        rows = dao.scan_table_async('team_details_by_id', ['team_id', 'team_name', 'country', 'city'], ['team_id'])
+        async for row in rows:
+            if search_term and search_term in normalize(row.team_name):
                 teams.append({
                     "team_id": row.team_id,
                     "team_name": row.team_name,
                     "country": row.country,
                     "city": row.city
                 })
-                count += 1
+                if len(teams) >= limit:
+                    await rows.aclose()
+                    break
         
         return {"query": q, "teams": teams}
         
@@ -655,27 +655,12 @@ async def get_team_details(team_id: str):
     Get team details
     """
     try:
-        query = """
-        SELECT team_id, team_name, country, city, founded
-        FROM team_details_by_id 
-        WHERE team_id = ?
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query), (team_id,))
-        rows = list(result)
+        rows = await dao.execute_statement_async('get_team_details', (team_id,), tuples=settings.FAST_JSON)
         
         if not rows:
             raise HTTPException(status_code=404, detail="Team not found")
         
-        row = rows[0]
-        
-        return {
-            "team_id": row.team_id,
-            "team_name": row.team_name,
-            "country": row.country,
-            "city": row.city,
-            "founded": row.founded
-        }
+        return json_response(row_json('get_team_details', rows[0]))
         
     except HTTPException:
         raise
@@ -683,19 +668,32 @@ async def get_team_details(team_id: str):
         logger.error(f"Error getting team details: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.post("/teams/details")
+async def get_teams_details(request: TeamIds):
+    """
+    Détails de plusieurs équipes en une requête (lectures de partition concurrentes, sans IN)
+    Les identifiants inconnus valent null et sont listés dans "missing"
+    """
+    check_bulk_ids(request.team_ids)
+    try:
+        rows = await dao.lookup_many('get_team_details', request.team_ids, tuples=settings.FAST_JSON)
+        
+        return json_response({
+            "teams": {team_id: row_json('get_team_details', row) for team_id, row in rows.items()},
+            "missing": [team_id for team_id, row in rows.items() if row is None]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting teams details: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.get("/team/{team_id}/children")
 async def get_team_children(team_id: str):
     """
     Get team children (youth teams, reserves, etc.)
     """
     try:
-        query = """
-        SELECT child_team_id, child_team_name, relation
-        FROM team_children_by_parent 
-        WHERE parent_team_id = ?
-        """
-        
-        result = dao.session.execute(dao.session.prepare(query), (team_id,))
+        result = await dao.execute_statement_async('get_team_children', (team_id,))
         children = []
         
         for row in result:
@@ -721,19 +719,9 @@ async def get_team_competitions(
     """
     try:
         if season:
-            query = """
-            SELECT season, competition
-            FROM team_competitions_by_team_season 
-            WHERE team_id = ? AND season = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (team_id, season))
+            result = await dao.execute_statement_async('get_team_competitions_season', (team_id, season))
         else:
-            query = """
-            SELECT season, competition
-            FROM team_competitions_by_team_season 
-            WHERE team_id = ?
-            """
-            result = dao.session.execute(dao.session.prepare(query), (team_id,))
+            result = await dao.execute_statement_async('get_team_competitions', (team_id,))
         
         competitions = []
         for row in result:
@@ -762,163 +750,153 @@ class AdvancedSearchFilters(BaseModel):
     min_market_value: Optional[int] = None
     max_market_value: Optional[int] = None
 
+def search_result(row, filters: AdvancedSearchFilters, current_year: int) -> Optional[Dict[str, Any]]:
+    """
+    Applique les filtres côté client à une ligne des tables de recherche
+    
+    Returns:
+        Le joueur formaté, ou None si la ligne ne passe pas les filtres
+    """
+    # Filtrage par nom (si pas utilisé comme partition key)
+    if filters.name and filters.name.lower() not in (row.player_name or '').lower():
+        return None
+        
+    # Filtrage par position (si pas utilisé comme partition key)
+    if filters.position and row.position != filters.position:
+        return None
+        
+    # Filtrage par nationalité (si pas utilisé comme partition key)
+    if filters.nationality and row.nationality != filters.nationality:
+        return None
+        
+    # Filtrage par équipe
+    if filters.team_id and row.team_id != filters.team_id:
+        return None
+        
+    # Filtrage par âge
+    age = None
+    if row.birth_date:
+        try:
+            # Gérer différents types de dates (datetime.date, datetime.datetime, etc.)
+            if hasattr(row.birth_date, 'year'):
+                birth_year = row.birth_date.year
+            elif hasattr(row.birth_date, 'date'):
+                birth_year = row.birth_date.date().year
+            else:
+                # Essayer de convertir en date si c'est une string
+                birth_year = int(str(row.birth_date)[:4])
+            
+            age = current_year - birth_year
+            
+            if filters.min_age and age < filters.min_age:
+                return None
+            if filters.max_age and age > filters.max_age:
+                return None
+        except (AttributeError, ValueError, TypeError):
+            # Si on ne peut pas calculer l'âge, on ignore ce filtre
+            if filters.min_age or filters.max_age:
+                return None
+            
+    elif filters.min_age or filters.max_age:
+        # Pas de date de naissance mais filtre d'âge demandé -> exclure
+        return None
+            
+    # Filtrage par valeur marchande
+    if filters.min_market_value and (not row.market_value_eur or row.market_value_eur < filters.min_market_value):
+        return None
+    if filters.max_market_value and (not row.market_value_eur or row.market_value_eur > filters.max_market_value):
+        return None
+    
+    # Formatage de la date de naissance
+    birth_date_str = None
+    if row.birth_date:
+        try:
+            if hasattr(row.birth_date, 'isoformat'):
+                birth_date_str = row.birth_date.isoformat()
+            else:
+                # Pour les objets Date de Cassandra, convertir en string
+                birth_date_str = str(row.birth_date)
+        except (AttributeError, TypeError):
+            birth_date_str = str(row.birth_date)
+    
+    return {
+        "player_id": row.player_id,
+        "player_name": row.player_name,
+        "position": row.position,
+        "nationality": row.nationality,
+        "team_id": row.team_id,
+        "team_name": row.team_name,
+        "age": age,
+        "birth_date": birth_date_str,
+        "market_value_eur": row.market_value_eur
+    }
+
+def search_buckets_page(buckets: List[str], transform, page_size: int, fetch_size: int,
+                        cursor: Optional[str], name_lower: str = '', name_end: Optional[str] = None):
+    """
+    Lit plusieurs buckets de players_search_index en parallèle, fusionnés dans l'ordre
+    des noms, jusqu'à remplir la page. Le curseur est la clé (nom, player_id) de la
+    dernière ligne examinée.
+    """
+    if name_end is not None:
+        stmt_name = 'search_bucket_range'
+        param_sets = lambda after: [(bucket, *after, name_end, '') for bucket in buckets]
+    else:
+        stmt_name = 'search_bucket_after'
+        param_sets = lambda after: [(bucket, *after) for bucket in buckets]
+    
+    return dao.fill_merged_page_async(
+        stmt_name, param_sets, key=lambda row: (row.player_name_lower, row.player_id),
+        transform=transform, page_size=page_size, cursor=cursor, start=(name_lower, ''),
+        fetch_size=fetch_size
+    )
+
 @app.post("/players/search")
 async def advanced_player_search(
     filters: AdvancedSearchFilters,
     page_size: int = Query(20, ge=1, le=100),
-    paging_state: Optional[str] = Query(None)
+    paging_state: Optional[str] = Query(None),
+    sort: Optional[str] = Query(None, description="market_value_desc : valeur marchande décroissante (avec position ou nationalité)")
 ):
     """
     Recherche avancée de joueurs avec filtres multiples
     Démontre différentes stratégies de requête NoSQL selon les filtres actifs
-    """
+    
+    Les pages Cassandra sont lues à la suite jusqu'à avoir page_size joueurs
+    (ou settings.SEARCH_SCAN_BUDGET lignes examinées) : paging_state reprend
+    à la première ligne non examinée, aucune ligne n'est sautée.
+    """
+    if sort is not None and sort != SORT_MARKET_VALUE_DESC:
+        raise HTTPException(status_code=400, detail=f"Unknown sort: {sort} (expected {SORT_MARKET_VALUE_DESC})")
+    
+    current_year = datetime.now().year
     try:
-        results = []
-        current_year = datetime.now().year
-        
-        # Stratégie 1: Recherche par position (utilise la partition key optimisée)
-        if filters.position and not filters.nationality:
-            query = """
-            SELECT player_id, player_name, position, nationality, team_id, team_name, 
-                   birth_date, market_value_eur
-            FROM players_by_position 
-            WHERE position = ?
-            """
-            
-            rows, next_paging_state = dao.get_paginated_results(
-                query, (filters.position,), page_size * 3, paging_state  # Get more to filter
-            )
-            
-        # Stratégie 2: Recherche par nationalité (utilise la partition key optimisée)  
-        elif filters.nationality and not filters.position:
-            query = """
-            SELECT player_id, player_name, position, nationality, team_id, team_name, 
-                   birth_date, market_value_eur
-            FROM players_by_nationality 
-            WHERE nationality = ?
-            """
-            
-            rows, next_paging_state = dao.get_paginated_results(
-                query, (filters.nationality,), page_size * 3, paging_state
-            )
-            
-        # Stratégie 3: Recherche par nom (utilise l'index de recherche)
-        elif filters.name:
-            name_lower = filters.name.lower()
-            query = """
-            SELECT player_id, player_name, position, nationality, team_id, team_name, 
-                   birth_date, market_value_eur
-            FROM players_search_index 
-            WHERE search_partition = ? AND player_name_lower >= ? AND player_name_lower < ?
-            """
-            
-            # Create range for prefix search
-            name_end = name_lower[:-1] + chr(ord(name_lower[-1]) + 1) if name_lower else 'z'
-            
-            rows, next_paging_state = dao.get_paginated_results(
-                query, ('all', name_lower, name_end), page_size * 3, paging_state
+        # Choix de la table dont la lecture est la plus petite pour les filtres actifs :
+        # équipe > position + nationalité > préfixe de nom / nationalité > position > tous les buckets,
+        # les plages de valeur marchande et d'âge lisant une tranche des partitions position /
+        # nationalité triées par valeur ou année de naissance (les autres filtres sont appliqués
+        # côté client)
+        plan = plan_search(filters, current_year, sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        transform = lambda row: search_result(row, filters, current_year)
+        
+        if plan.merged:
+            # Plusieurs buckets de l'index des noms, lus en parallèle et fusionnés
+            buckets, name_lower, name_end = plan.params
+            fetch_size = page_size * (3 if plan.strategy == 'name' else 5)  # Get more for filtering
+            results, next_paging_state = await search_buckets_page(
+                buckets, transform, page_size, fetch_size, paging_state, name_lower, name_end
             )
-            
-        # Stratégie 4: Recherche générale (scan avec filtrage côté application)
         else:
-            query = """
-            SELECT player_id, player_name, position, nationality, team_id, team_name, 
-                   birth_date, market_value_eur
-            FROM players_search_index 
-            WHERE search_partition = ?
-            """
-            
-            rows, next_paging_state = dao.get_paginated_results(
-                query, ('all',), page_size * 5, paging_state  # Get more for filtering
+            results, next_paging_state = await dao.fill_page_async(
+                plan.stmt_name, plan.params, transform, page_size, paging_state,
+                fetch_size=page_size * 3  # Get more to filter
             )
         
-        # Application des filtres côté client
-        filtered_results = []
-        
-        for row in rows:
-            # Filtrage par nom (si pas utilisé comme partition key)
-            if filters.name and filters.name.lower() not in (row.player_name or '').lower():
-                continue
-                
-            # Filtrage par position (si pas utilisé comme partition key)
-            if filters.position and row.position != filters.position:
-                continue
-                
-            # Filtrage par nationalité (si pas utilisé comme partition key)
-            if filters.nationality and row.nationality != filters.nationality:
-                continue
-                
-            # Filtrage par équipe
-            if filters.team_id and row.team_id != filters.team_id:
-                continue
-                
-            # Filtrage par âge
-            age = None
-            if row.birth_date:
-                try:
-                    # Gérer différents types de dates (datetime.date, datetime.datetime, etc.)
-                    if hasattr(row.birth_date, 'year'):
-                        birth_year = row.birth_date.year
-                    elif hasattr(row.birth_date, 'date'):
-                        birth_year = row.birth_date.date().year
-                    else:
-                        # Essayer de convertir en date si c'est une string
-                        birth_year = int(str(row.birth_date)[:4])
-                    
-                    age = current_year - birth_year
-                    
-                    if filters.min_age and age < filters.min_age:
-                        continue
-                    if filters.max_age and age > filters.max_age:
-                        continue
-                except (AttributeError, ValueError, TypeError):
-                    # Si on ne peut pas calculer l'âge, on ignore ce filtre
-                    if filters.min_age or filters.max_age:
-                        continue
-                    
-            elif filters.min_age or filters.max_age:
-                # Pas de date de naissance mais filtre d'âge demandé -> exclure
-                continue
-                    
-            # Filtrage par valeur marchande
-            if filters.min_market_value and (not row.market_value_eur or row.market_value_eur < filters.min_market_value):
-                continue
-            if filters.max_market_value and (not row.market_value_eur or row.market_value_eur > filters.max_market_value):
-                continue
-            
-            # Formatage de la date de naissance
-            birth_date_str = None
-            if row.birth_date:
-                try:
-                    if hasattr(row.birth_date, 'isoformat'):
-                        birth_date_str = row.birth_date.isoformat()
-                    else:
-                        # Pour les objets Date de Cassandra, convertir en string
-                        birth_date_str = str(row.birth_date)
-                except (AttributeError, TypeError):
-                    birth_date_str = str(row.birth_date)
-            
-            filtered_results.append({
-                "player_id": row.player_id,
-                "player_name": row.player_name,
-                "position": row.position,
-                "nationality": row.nationality,
-                "team_id": row.team_id,
-                "team_name": row.team_name,
-                "age": age,
-                "birth_date": birth_date_str,
-                "market_value_eur": row.market_value_eur
-            })
-            
-            # Limite des résultats après filtrage
-            if len(filtered_results) >= page_size:
-                break
-        
-        return PaginatedResponse(
-            data=filtered_results,
-            paging_state=next_paging_state if len(filtered_results) == page_size else None,
-            has_more=next_paging_state is not None and len(filtered_results) == page_size
-        )
+        return paginated_response(results, next_paging_state)
         
     except Exception as e:
         logger.error(f"Error in advanced search: {e}")
@@ -928,47 +906,40 @@ async def advanced_player_search(
 async def get_search_suggestions():
     """
     Récupère les suggestions pour la recherche avancée (positions, nationalités, équipes)
+    Une seule partition de search_facets (compteurs tenus à jour par l'ingestion et
+    /market/add) donne les valeurs avec leur nombre de joueurs, les plus fréquentes
+    d'abord : toutes les positions et nationalités, et les
+    settings.SUGGESTION_TEAMS premières équipes (leurs noms sont lus un par un)
     """
     try:
-        suggestions = {
-            "positions": [],
-            "nationalities": [],
-            "teams": []
-        }
-        
-        # Positions populaires - utilise une table avec position comme clé de partition
-        pos_query = """
-        SELECT position FROM players_by_position LIMIT 1000
-        """
-        pos_result = dao.session.execute(dao.session.prepare(pos_query))
-        positions_set = set()
-        for row in pos_result:
-            if row.position and len(positions_set) < 50:
-                positions_set.add(row.position)
-        suggestions["positions"] = sorted(list(positions_set))
-        
-        # Nationalités populaires - utilise une table avec nationality comme clé de partition
-        nat_query = """
-        SELECT nationality FROM players_by_nationality LIMIT 1000
-        """
-        nat_result = dao.session.execute(dao.session.prepare(nat_query))
-        nationalities_set = set()
-        for row in nat_result:
-            if row.nationality and len(nationalities_set) < 100:
-                nationalities_set.add(row.nationality)
-        suggestions["nationalities"] = sorted(list(nationalities_set))
-        
-        # Top équipes
-        team_query = """
-        SELECT team_id, team_name FROM team_details_by_id LIMIT 50
-        """
-        team_result = dao.session.execute(dao.session.prepare(team_query))
-        suggestions["teams"] = [
-            {"team_id": row.team_id, "team_name": row.team_name} 
-            for row in team_result if row.team_name
-        ]
-        
-        return suggestions
+        counts = {facet: {} for facet in ('position', 'nationality', 'team')}
+        for row in await dao.execute_statement_async('get_search_facets', (FACET_SCOPE,)):
+            if row.player_count > 0 and row.facet in counts:
+                counts[row.facet][row.value] = row.player_count
+        
+        def ranked(facet):
+            return sorted(counts[facet].items(), key=lambda item: (-item[1], item[0]))
+        
+        positions = ranked('position')
+        nationalities = ranked('nationality')
+        
+        # Top équipes (noms lus en parallèle, servis par le cache)
+        top_teams = ranked('team')[:settings.SUGGESTION_TEAMS]
+        teams = await dao.lookup_many('get_team_details', [team_id for team_id, _ in top_teams])
+        
+        return json_response({
+            "positions": [value for value, _ in positions],
+            "nationalities": [value for value, _ in nationalities],
+            "teams": [
+                {"team_id": team_id, "team_name": teams[team_id].team_name, "player_count": count}
+                for team_id, count in top_teams
+                if teams[team_id] is not None and teams[team_id].team_name
+            ],
+            "counts": {
+                "positions": dict(positions),
+                "nationalities": dict(nationalities)
+            }
+        })
         
     except Exception as e:
         logger.error(f"Error getting search suggestions: {e}")
@@ -0,0 +1,490 @@
+"""
+Player search tables: partitioning, denormalized writes and query planning
+
+- players_search_index is split into buckets named after the first letters of the
+  lowercase player name, instead of a single 'all' partition: a name prefix only
+  reads its bucket(s), and a search without prefix reads every bucket in parallel
+  and merges them back into name order.
+- Every search table holds the same player record under a different partition key
+  (position, nationality, (position, nationality), team, name bucket). search_writes()
+  is the single list of those writes, used by ingestion and by the API write paths.
+- The clustered tables (CLUSTERED_TABLES) also order each position and nationality
+  partition by market value (descending) or birth year, so value and age ranges are
+  read as clustering slices and "sort by market value" comes straight from the table.
+- A change of position, nationality, team, name, market value or birth date moves
+  the player's rows: the primary keys it no longer has (SEARCH_KEYS) are deleted.
+- search_facets counts the players of each position, nationality and team in one
+  small counter partition (FACET_SCOPE), for the search suggestions.
+- plan_search() picks the table whose read is expected to be the smallest for
+  the active filters; the other filters are applied client-side.
+"""
+import asyncio
+import itertools
+import string
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import settings
+
+# Characters that get their own bucket; any other character (accents, digits,
+# punctuation, missing letters of short names) goes to OTHER
+BUCKET_ALPHABET = string.ascii_lowercase
+OTHER = '_'
+
+# Expected rows per partition, used to rank the plans (rough sizes for ~90k players:
+# a squad, a nationality within a position, a nationality, a position)
+ESTIMATED_ROWS = {
+    'team': 40,
+    'position_nationality': 500,
+    'nationality': 2000,
+    'position': 25000,
+    # name prefix of one letter; each further letter divides it by NAME_PREFIX_SELECTIVITY
+    'name': 4000,
+}
+NAME_PREFIX_SELECTIVITY = 15
+# Share of a partition expected in a market value or age range
+RANGE_SELECTIVITY = 0.25
+
+MIN_BIGINT, MAX_BIGINT = -2 ** 63, 2 ** 63 - 1
+MIN_INT, MAX_INT = -2 ** 31, 2 ** 31 - 1
+
+# Search tables clustered by a value of the record: columns in the order of their
+# insert_<table> statement, the first three being the primary key
+CLUSTERED_TABLES = {
+    'players_by_position_value': (
+        'position', 'market_value_eur', 'player_id',
+        'player_name', 'nationality', 'team_id', 'team_name', 'birth_date'
+    ),
+    'players_by_nationality_value': (
+        'nationality', 'market_value_eur', 'player_id',
+        'player_name', 'position', 'team_id', 'team_name', 'birth_date'
+    ),
+    'players_by_position_birth_year': (
+        'position', 'birth_year', 'player_id',
+        'player_name', 'nationality', 'team_id', 'team_name', 'birth_date', 'market_value_eur'
+    ),
+    'players_by_nationality_birth_year': (
+        'nationality', 'birth_year', 'player_id',
+        'player_name', 'position', 'team_id', 'team_name', 'birth_date', 'market_value_eur'
+    ),
+}
+
+# Primary key of every search table: (partition key, clustering columns), which are
+# also the first params of the table's row in search_rows()
+SEARCH_KEYS = {
+    'players_by_position': (('position',), ('player_id',)),
+    'players_by_nationality': (('nationality',), ('player_id',)),
+    'players_by_position_nationality': (('position', 'nationality'), ('player_id',)),
+    'players_search_by_team': (('team_id',), ('player_id',)),
+    'players_search_index': (('search_partition',), ('player_name_lower', 'player_id')),
+    **{table: (columns[:1], columns[1:3]) for table, columns in CLUSTERED_TABLES.items()},
+}
+
+# Insert statement of each search table (insert_<table> for the clustered tables)
+INSERT_STATEMENTS = {
+    'players_by_position': 'insert_player_by_position',
+    'players_by_nationality': 'insert_player_by_nationality',
+    'players_by_position_nationality': 'insert_player_by_position_nationality',
+    'players_search_by_team': 'insert_player_search_by_team',
+    'players_search_index': 'insert_player_search_index',
+    **{table: f"insert_{table}" for table in CLUSTERED_TABLES},
+}
+
+# Values of the sort parameter of /players/search
+SORT_MARKET_VALUE_DESC = 'market_value_desc'
+
+# Partition of search_facets holding every facet
+FACET_SCOPE = 'players'
+
+# player_id -> [lock, refreshes holding or waiting for it] (refresh_player)
+_refresh_locks: Dict[str, list] = {}
+
+
+def search_bucket(name_lower: str) -> str:
+    """
+    search_partition of a lowercase name ("zidane" -> "z", "émile" -> "_")
+    """
+    head = name_lower[:settings.SEARCH_BUCKET_CHARS].ljust(settings.SEARCH_BUCKET_CHARS, OTHER)
+    return ''.join(c if c in BUCKET_ALPHABET else OTHER for c in head)
+
+
+def all_buckets() -> List[str]:
+    return [''.join(chars) for chars in
+            itertools.product(OTHER + BUCKET_ALPHABET, repeat=settings.SEARCH_BUCKET_CHARS)]
+
+
+def search_buckets(prefix: str = '') -> List[str]:
+    """
+    Buckets that can hold the names starting with a lowercase prefix
+    (a single one once the prefix is SEARCH_BUCKET_CHARS long, all of them for '')
+    """
+    if len(prefix) >= settings.SEARCH_BUCKET_CHARS:
+        return [search_bucket(prefix)]
+    known = ''.join(c if c in BUCKET_ALPHABET else OTHER for c in prefix)
+    return [bucket for bucket in all_buckets() if bucket.startswith(known)]
+
+
+# ----------------------------------------
+# Search records
+# ----------------------------------------
+
+def clean_nationality(nationality):
+    """Clean and normalize nationality values"""
+    if not nationality or nationality == 'None':
+        return 'Unknown'
+
+    # Remove any weird characters and normalize
+    cleaned = str(nationality).strip()
+
+    # Skip entries that look like IDs or contain numbers/special chars
+    if any(char.isdigit() for char in cleaned):
+        return 'Unknown'
+
+    if len(cleaned) < 2 or len(cleaned) > 50:
+        return 'Unknown'
+
+    # Common problematic values to filter out
+    problematic = ['null', 'none', 'n/a', 'na', 'unknown', '']
+    if cleaned.lower() in problematic:
+        return 'Unknown'
+
+    return cleaned
+
+
+def clean_position(position):
+    """Clean and normalize position values"""
+    if not position or position == 'None':
+        return 'Unknown'
+
+    # Common position mappings
+    position_map = {
+        'Defender': 'Defender',
+        'Midfielder': 'Midfielder',
+        'Forward': 'Forward',
+        'Goalkeeper': 'Goalkeeper',
+        'Centre-Back': 'Defender',
+        'Left-Back': 'Defender',
+        'Right-Back': 'Defender',
+        'Defensive Midfield': 'Midfielder',
+        'Central Midfield': 'Midfielder',
+        'Attacking Midfield': 'Midfielder',
+        'Left Winger': 'Forward',
+        'Right Winger': 'Forward',
+        'Centre-Forward': 'Forward',
+        'Left Midfield': 'Midfielder',
+        'Right Midfield': 'Midfielder'
+    }
+
+    cleaned = str(position).strip()
+    return position_map.get(cleaned, cleaned if len(cleaned) < 30 else 'Unknown')
+
+
+def search_record(profile, team_name: Optional[str], market_value_eur: Optional[int]) -> Dict[str, Any]:
+    """
+    Search record of a player from its player_profiles_by_id row
+    """
+    return {
+        'player_id': profile.player_id,
+        'player_name': profile.player_name or 'Unknown',
+        'nationality': clean_nationality(profile.nationality),
+        'birth_date': profile.birth_date,
+        'position': clean_position(profile.main_position),
+        'team_id': profile.current_team_id,
+        'team_name': team_name,
+        'market_value_eur': market_value_eur
+    }
+
+
+def birth_year(birth_date) -> Optional[int]:
+    """
+    Year of a datetime.date or of a cassandra.util.Date (None if missing)
+    """
+    if birth_date is None:
+        return None
+    return birth_date.year if hasattr(birth_date, 'year') else birth_date.date().year
+
+
+def clustered_rows(player: Dict[str, Any]) -> Dict[str, tuple]:
+    """
+    {clustered table: row params} of a search record; a table is left out when its
+    clustering value is missing (no market value, no birth date)
+    """
+    record = dict(player, birth_year=birth_year(player['birth_date']))
+    return {
+        table: tuple(record[column] for column in columns)
+        for table, columns in CLUSTERED_TABLES.items()
+        if record[columns[1]] is not None
+    }
+
+
+def primary_key(table: str) -> List[str]:
+    """
+    Primary key columns of a search table, partition key first
+    """
+    partition_key, clustering = SEARCH_KEYS[table]
+    return [*partition_key, *clustering]
+
+
+def search_rows(player: Dict[str, Any]) -> Dict[str, tuple]:
+    """
+    {search table: row params} of a search record, in the column order of the
+    table's insert statement
+    """
+    details = (player['team_id'], player['team_name'], player['birth_date'], player['market_value_eur'])
+    player_name_lower = player['player_name'].lower() if player['player_name'] else ''
+    rows = {
+        'players_by_position': (
+            player['position'], player['player_id'], player['player_name'], player['nationality'], *details
+        ),
+        'players_by_nationality': (
+            player['nationality'], player['player_id'], player['player_name'], player['position'], *details
+        ),
+        'players_by_position_nationality': (
+            player['position'], player['nationality'], player['player_id'], player['player_name'], *details
+        ),
+        # Partition = bucket of the name prefix
+        'players_search_index': (
+            search_bucket(player_name_lower), player_name_lower, player['player_id'], player['player_name'],
+            player['position'], player['nationality'], *details
+        ),
+    }
+    # Players without a club are only found through the other tables
+    if player['team_id']:
+        rows['players_search_by_team'] = (
+            player['team_id'], player['player_id'], player['player_name'], player['position'],
+            player['nationality'], player['team_name'], player['birth_date'], player['market_value_eur']
+        )
+    rows.update(clustered_rows(player))
+    return rows
+
+
+def search_writes(player: Dict[str, Any]) -> List[Tuple[str, tuple]]:
+    """
+    (statement name, params) writing a search record to every search table
+    """
+    return [(INSERT_STATEMENTS[table], row) for table, row in search_rows(player).items()]
+
+
+def search_keys(player: Dict[str, Any]) -> set:
+    """
+    {(search table, primary key)} of a search record
+    """
+    return {(table, row[:len(primary_key(table))]) for table, row in search_rows(player).items()}
+
+
+def facet_values(player: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    (facet, value) counted for a search record
+    """
+    facets = [('position', player['position']), ('nationality', player['nationality'])]
+    if player['team_id']:
+        facets.append(('team', player['team_id']))
+    return facets
+
+
+def facet_increments(counts: Dict[Tuple[str, str], int]) -> List[Tuple[str, tuple]]:
+    """
+    (statement name, params) adding {(facet, value): delta} to the search_facets counters
+    """
+    return [
+        ('increment_search_facet', (delta, FACET_SCOPE, facet, value))
+        for (facet, value), delta in counts.items() if delta
+    ]
+
+
+def stale_deletes(dao, previous: set, player: Optional[Dict[str, Any]]) -> List[Tuple[str, tuple]]:
+    """
+    (statement name, params) deleting the search rows in `previous` (search_keys of
+    the player's previous records) that the new search record (None: player removed)
+    no longer has
+    """
+    current = search_keys(player) if player else set()
+    return [(dao.prepare_delete(table, primary_key(table)), key) for table, key in previous - current]
+
+
+# Columns of players_by_position read back as a search record (with its position)
+SEARCH_RECORD_COLUMNS = ['position', 'player_id', 'player_name', 'nationality', 'team_id', 'team_name',
+                         'birth_date', 'market_value_eur']
+
+
+async def previous_search_records(dao, records: List[Dict[str, Any]], positions) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    player_id -> search records already written for these players, read back from
+    players_by_position: under the record's position first, then under every other
+    position of `positions` for the players not found there (new player, position
+    changed). At most settings.BULK_CONCURRENCY reads in flight
+    """
+    slots = asyncio.Semaphore(settings.BULK_CONCURRENCY)
+
+    async def lookup(player_id, position):
+        async with slots:
+            rows = await dao.execute_statement_async(
+                'get_search_record_by_position', (position, player_id), cache=False
+            )
+        return [dict(row._asdict(), position=position) for row in rows]
+
+    async def read(lookups):
+        for (player_id, _), rows in zip(lookups, await asyncio.gather(*(lookup(*key) for key in lookups))):
+            found[player_id].extend(rows)
+
+    found = {record['player_id']: [] for record in records}
+    await read([(record['player_id'], record['position']) for record in records])
+    await read([
+        (record['player_id'], position)
+        for record in records if not found[record['player_id']]
+        for position in positions if position != record['position']
+    ])
+    return found
+
+
+async def refresh_player(dao, player_id: str) -> bool:
+    """
+    Rewrite a player's rows in every search table from its profile, team and latest
+    market value (after an API write changed one of them)
+
+    Refreshes of the same player run one at a time (per API process): two of them
+    reading the same previous record would both move its facet counts
+
+    Returns:
+        False if the player has no profile
+    """
+    entry = _refresh_locks.setdefault(player_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await _refresh_player(dao, player_id)
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _refresh_locks[player_id]
+
+
+async def _refresh_player(dao, player_id: str) -> bool:
+    profiles = await dao.execute_statement_async('get_player_profile', (player_id,), cache=False)
+    if not profiles:
+        return False
+    profile = profiles[0]
+    record = search_record(profile, None, None)
+
+    # Previous records, to delete the rows whose key changed (position, nationality,
+    # team, name, value...): the profile may have changed position since the search
+    # tables were written, so every known position (search_facets) can be looked up
+    facets = await dao.execute_statement_async('get_search_facets', (FACET_SCOPE,), cache=False)
+    positions = {row.value for row in facets if row.facet == 'position'}
+    previous_records = (await previous_search_records(dao, [record], positions))[player_id]
+    previous_keys = set().union(*(search_keys(previous) for previous in previous_records))
+    previous_record = previous_records[0] if previous_records else None
+
+    team_name, market_value_eur = None, None
+    if profile.current_team_id:
+        teams = await dao.execute_statement_async('get_team_details', (profile.current_team_id,))
+        team_name = teams[0].team_name if teams else None
+    values = await dao.execute_statement_async('get_latest_market_value', (player_id,), cache=False)
+    if values:
+        market_value_eur = values[0].market_value_eur
+
+    record = search_record(profile, team_name, market_value_eur)
+    writes = stale_deletes(dao, previous_keys, record) + search_writes(record)
+    await asyncio.gather(*(dao.execute_statement_async(stmt_name, params) for stmt_name, params in writes))
+
+    # Facet counters, once the rows are rewritten: the player leaves its previous
+    # facets and joins the new ones (unchanged facets cancel out and are not written)
+    counts = {facet: 1 for facet in facet_values(record)}
+    for facet in facet_values(previous_record) if previous_record else ():
+        counts[facet] = counts.get(facet, 0) - 1
+    increments = facet_increments(counts)
+    await asyncio.gather(*(dao.execute_statement_async(stmt_name, params) for stmt_name, params in increments))
+    return True
+
+
+# ----------------------------------------
+# Query planning
+# ----------------------------------------
+
+class SearchPlan(NamedTuple):
+    """
+    Table read for a search: a single paginated statement, or name-index buckets
+    merged in name order (merged=True, params = (buckets, name_lower, name_end))
+    """
+    strategy: str
+    stmt_name: Optional[str]
+    params: tuple
+    estimated_rows: float
+    merged: bool = False
+
+
+def value_range(filters) -> Optional[Tuple[int, int]]:
+    """
+    (min, max) market value of the filters, None without value filter
+    (a row without market value never passes one: the range starts at 1)
+    """
+    if not filters.min_market_value and not filters.max_market_value:
+        return None
+    return max(filters.min_market_value or 1, 1), filters.max_market_value or MAX_BIGINT
+
+
+def birth_year_range(filters, current_year: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) birth year matching the age filters, None without age filter
+    """
+    if not filters.min_age and not filters.max_age:
+        return None
+    first = current_year - filters.max_age if filters.max_age else MIN_INT
+    last = current_year - filters.min_age if filters.min_age else MAX_INT
+    return first, last
+
+
+def plan_search(filters, current_year: int, sort: Optional[str] = None) -> SearchPlan:
+    """
+    Cheapest plan for the filters of /players/search (smallest expected read)
+
+    With sort=SORT_MARKET_VALUE_DESC only the tables clustered by market value qualify
+    (ValueError without position or nationality filter to read them by)
+    """
+    plans = []
+    values = value_range(filters)
+    years = birth_year_range(filters, current_year)
+    for column in ('position', 'nationality'):
+        key = getattr(filters, column)
+        if not key:
+            continue
+        # Partition sliced on its clustering column (market value, birth year)
+        if values or sort == SORT_MARKET_VALUE_DESC:
+            low, high = values or (MIN_BIGINT, MAX_BIGINT)
+            plans.append(SearchPlan(f"{column}_value", f"search_by_{column}_value", (key, low, high),
+                                    ESTIMATED_ROWS[column] * (RANGE_SELECTIVITY if values else 1)))
+        if years:
+            plans.append(SearchPlan(f"{column}_birth_year", f"search_by_{column}_birth_year", (key, *years),
+                                    ESTIMATED_ROWS[column] * RANGE_SELECTIVITY))
+
+    if sort == SORT_MARKET_VALUE_DESC:
+        sorted_plans = [plan for plan in plans if plan.strategy.endswith('_value')]
+        if not sorted_plans:
+            raise ValueError("Sorting by market value requires a position or nationality filter")
+        return min(sorted_plans, key=lambda plan: plan.estimated_rows)
+
+    if filters.team_id:
+        plans.append(SearchPlan('team', 'search_by_team', (filters.team_id,), ESTIMATED_ROWS['team']))
+    if filters.position and filters.nationality:
+        plans.append(SearchPlan('position_nationality', 'search_by_position_nationality',
+                                (filters.position, filters.nationality), ESTIMATED_ROWS['position_nationality']))
+    if filters.nationality:
+        plans.append(SearchPlan('nationality', 'search_by_nationality', (filters.nationality,),
+                                ESTIMATED_ROWS['nationality']))
+    if filters.position:
+        plans.append(SearchPlan('position', 'search_by_position', (filters.position,),
+                                ESTIMATED_ROWS['position']))
+    if filters.name:
+        name_lower = filters.name.lower()
+        # Create range for prefix search
+        name_end = name_lower[:-1] + chr(ord(name_lower[-1]) + 1)
+        buckets = search_buckets(name_lower)
+        estimated = ESTIMATED_ROWS['name'] / NAME_PREFIX_SELECTIVITY ** (len(name_lower) - 1)
+        if len(buckets) == 1:
+            # A single bucket holds the prefix: driver-paged read of its partition
+            plans.append(SearchPlan('name', 'search_by_name_prefix', (buckets[0], name_lower, name_end), estimated))
+        else:
+            plans.append(SearchPlan('name', 'search_bucket_range', (buckets, name_lower, name_end),
+                                    estimated, merged=True))
+    if not plans:
+        return SearchPlan('all', 'search_bucket_after', (all_buckets(), '', None), float('inf'), merged=True)
+    return min(plans, key=lambda plan: plan.estimated_rows)
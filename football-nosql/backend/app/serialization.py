@@ -0,0 +1,108 @@
+"""
+Fast JSON path of the API responses (settings.FAST_JSON)
+Rows are turned into dicts by a RowEncoder built once per statement: the converter
+of each column is chosen from the CQL type of the result metadata, so only the
+date/uuid/decimal columns cost a call per value (dates come from a cache of ISO
+strings keyed by day). Responses are encoded directly by orjson (json when it is
+not installed) instead of going through pydantic and FastAPI's jsonable_encoder.
+orjson is optional.
+"""
+import json
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=1 << 16)
+def _iso_day(days_from_epoch: int) -> str:
+    return date.fromordinal(_EPOCH_ORDINAL + days_from_epoch).isoformat()
+
+
+def iso_date(value) -> Optional[str]:
+    """Date Cassandra (cassandra.util.Date) au format ISO"""
+    return _iso_day(value.days_from_epoch) if value else None
+
+
+# CQL type name -> JSON value (types not listed are already JSON values)
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'date': iso_date,
+    'timestamp': lambda value: value.isoformat(),
+    'time': str,
+    'uuid': str,
+    'timeuuid': str,
+    'decimal': float,
+}
+
+
+def dumps(content: Any) -> bytes:
+    """
+    UTF-8 JSON of content, same output as Starlette's JSONResponse
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by dumps(): content must already hold JSON values
+    (returned as is by the endpoint, FastAPI does not run jsonable_encoder on it)
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RowEncoder:
+    """
+    Rows of one statement (tuples or named tuples, in the order of its columns)
+    to JSON-ready dicts
+
+    Args:
+        result_metadata: (column name, cql type) of the statement's result
+        columns: columns to keep, in output order (all of them by default)
+    """
+
+    def __init__(self, result_metadata: Sequence[Tuple[str, Any]], columns: Sequence[str] = None):
+        names = [name for name, _ in result_metadata]
+        types = dict(result_metadata)
+        self.columns = list(columns or names)
+        indexes = [names.index(column) for column in self.columns]
+
+        self._pick = None
+        if indexes != list(range(len(names))):
+            self._pick = itemgetter(*indexes) if len(indexes) > 1 else lambda row: (row[indexes[0]],)
+        self._converters = [
+            (column, CONVERTERS[types[column].typename]) for column in self.columns
+            if getattr(types[column], 'typename', None) in CONVERTERS
+        ]
+
+    def __call__(self, row) -> Dict[str, Any]:
+        record = dict(zip(self.columns, self._pick(row) if self._pick else row))
+        for column, convert in self._converters:
+            value = record[column]
+            if value is not None:
+                record[column] = convert(value)
+        return record
+
+    def many(self, rows) -> List[Dict[str, Any]]:
+        columns, pick, converters = self.columns, self._pick, self._converters
+        records = [dict(zip(columns, pick(row) if pick else row)) for row in rows]
+        for column, convert in converters:
+            for record in records:
+                value = record[column]
+                if value is not None:
+                    record[column] = convert(value)
+        return records
@@ -0,0 +1,216 @@
+"""
+Columnar staging cache for the source CSVs
+Each CSV of settings.CSV is converted once into an Arrow IPC file holding only the
+columns referenced in settings.MAP. Later runs memory-map that file instead of
+re-parsing the CSV, as long as the source is unchanged (mtime and size, then
+content hash). The CSV is staged chunk by chunk (settings.CSV_CHUNK_SIZE rows), by one
+process at a time. pyarrow is optional: without it read_source() reads the CSV.
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+# Add backend to path for imports
+backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_path)
+
+import settings
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: concurrent stagings then both write the file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# settings.CSV keys whose column mapping is stored under another settings.MAP key
+MAP_KEYS = {
+    'market_latest': 'market',
+    'market_history': 'market'
+}
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_meta(meta_path: str) -> dict:
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _tmp_path(path: str) -> str:
+    """
+    Temporary file of this process, renamed over path once complete
+    (ingest_all runs several stages reading the same CSV at the same time)
+    """
+    return f"{path}.{os.getpid()}.tmp"
+
+
+@contextmanager
+def _staging_lock(path: str):
+    """
+    Exclusive lock on path.lock, held while a process stages path
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _save_meta(meta_path: str, meta: dict) -> None:
+    tmp_path = _tmp_path(meta_path)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def staged_columns(key: str, **read_options) -> List[str]:
+    """
+    Columns of the CSV referenced in settings.MAP, in file order
+    """
+    wanted = set(settings.MAP[MAP_KEYS.get(key, key)].values())
+    header = pd.read_csv(settings.CSV[key], nrows=0, **read_options).columns
+    return [column for column in header if column in wanted]
+
+
+def stage(key: str, **read_options) -> str:
+    """
+    Make sure the staged Arrow file of settings.CSV[key] is up to date
+    read_options are passed to pd.read_csv and are part of the cache key
+
+    Returns:
+        Path of the staged file
+    """
+    csv_path = settings.CSV[key]
+    options = json.dumps(read_options, sort_keys=True, default=str)
+    # One staged file per set of read options (e.g. IDs read as text or not)
+    suffix = f"-{hashlib.blake2b(options.encode(), digest_size=4).hexdigest()}" if read_options else ""
+    path = os.path.join(settings.STAGING_DIR, f"{key}{suffix}.arrow")
+    meta_path = f"{path}.json"
+
+    stat = os.stat(csv_path)
+    columns = staged_columns(key, **read_options)
+    fresh, digest = _check_staged(path, meta_path, csv_path, stat, columns, options)
+    if fresh:
+        return path
+
+    os.makedirs(settings.STAGING_DIR, exist_ok=True)
+    with _staging_lock(path):
+        # Another process may have staged it while this one waited for the lock
+        fresh, digest = _check_staged(path, meta_path, csv_path, stat, columns, options, digest)
+        if fresh:
+            return path
+
+        logger.info(f"Staging {csv_path} ({len(columns)} columns) -> {path}")
+        tmp_path = _tmp_path(path)
+        try:
+            _write_staged(csv_path, tmp_path, columns, read_options)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        _save_meta(meta_path, {
+            'columns': columns,
+            'options': options,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': digest or _file_hash(csv_path)
+        })
+    return path
+
+
+def _check_staged(path: str, meta_path: str, csv_path: str, stat: os.stat_result,
+                  columns: List[str], options: str, digest: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Whether the staged file matches the CSV, and the CSV hash if it was computed
+    """
+    meta = _load_meta(meta_path)
+    if not (os.path.exists(path) and meta.get('columns') == columns
+            and meta.get('options') == options and meta.get('size') == stat.st_size):
+        return False, digest
+    if meta.get('mtime') == stat.st_mtime_ns:
+        return True, digest
+
+    # Touched but maybe not modified: compare contents before re-parsing
+    digest = digest or _file_hash(csv_path)
+    if meta.get('hash') == digest:
+        meta['mtime'] = stat.st_mtime_ns
+        _save_meta(meta_path, meta)
+        return True, digest
+    return False, digest
+
+
+def _write_staged(csv_path: str, tmp_path: str, columns: List[str], read_options: dict) -> None:
+    """
+    Convert the CSV into an Arrow IPC file, one record batch per chunk: the schema
+    is the one of the first chunk, a later chunk that does not fit it (e.g. floats
+    in an integer column) raises pa.ArrowInvalid
+    """
+    chunks = pd.read_csv(csv_path, usecols=columns, chunksize=settings.CSV_CHUNK_SIZE, **read_options)
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        writer = schema = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(sink, schema)
+                writer.write_table(table)
+            if writer is None:
+                # Header only
+                empty = pd.read_csv(csv_path, usecols=columns, nrows=0, **read_options)
+                writer = pa.ipc.new_file(sink, pa.Table.from_pandas(empty, preserve_index=False).schema)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def read_source(key: str, chunksize: int = None, **read_options):
+    """
+    Drop-in replacement for pd.read_csv(settings.CSV[key], ...)
+    Reads the staged Arrow file (memory-mapped) when settings.STAGING_MODE is on and
+    pyarrow is installed; only the columns referenced in settings.MAP are loaded
+
+    Returns:
+        A DataFrame, or an iterator of DataFrames of chunksize rows
+    """
+    if not settings.STAGING_MODE or pa is None:
+        return pd.read_csv(settings.CSV[key], chunksize=chunksize, **read_options)
+
+    try:
+        path = stage(key, **read_options)
+    except (pa.ArrowException, OSError, TypeError, ValueError) as e:
+        # e.g. a column mixing types that Arrow cannot store, or an unwritable staging dir
+        logger.warning(f"Could not stage {key}, reading the CSV instead: {e}")
+        return pd.read_csv(settings.CSV[key], chunksize=chunksize, **read_options)
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    if chunksize is None:
+        return table.to_pandas()
+    return (batch.to_pandas() for batch in table.to_batches(max_chunksize=chunksize))
@@ -0,0 +1,186 @@
+"""
+In-memory search index of team names (used by /teams/search)
+Names are normalized (accents and case folded, punctuation turned into spaces).
+Matches at the start of the name or of one of its words come from sorted arrays
+(a bisect gives them already in order, so a broad query stops after `limit` teams);
+other substring matches come from a trigram index whose postings are intersected.
+The index is loaded by a full scan and then kept in sync by applying the
+differences found by later scans.
+"""
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Trigram index: shorter queries only match the start of a word
+GRAM = 3
+
+
+def normalize(text: str) -> str:
+    """
+    Accent-folded, case-folded form of a name, words separated by single spaces
+    ("Atlético  São-Paulo" -> "atletico sao paulo")
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    folded = ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+    return _SEPARATORS.sub(' ', folded).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def word_suffixes(text: str) -> List[str]:
+    """
+    The text from each word after the first ("fc sao paulo" -> ["sao paulo", "paulo"])
+    """
+    return [text[i + 1:] for i, c in enumerate(text) if c == ' ']
+
+
+def _starting_with(entries: List[Tuple[str, str]], query: str) -> Iterator[str]:
+    """
+    team_ids of the sorted (text, team_id) entries whose text starts with query, in order
+    """
+    for i in range(bisect_left(entries, (query,)), len(entries)):
+        text, team_id = entries[i]
+        if not text.startswith(query):
+            return
+        yield team_id
+
+
+def _discard(entries: List[Tuple[str, str]], entry: Tuple[str, str]) -> None:
+    i = bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+
+
+class TeamNameIndex:
+    """
+    Name and trigram index of team names with the record returned for each team
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._names: Dict[str, str] = {}
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # Sorted (normalized name, team_id) and (word suffix, team_id)
+        self._sorted_names: List[Tuple[str, str]] = []
+        self._sorted_words: List[Tuple[str, str]] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def upsert(self, team_id: str, name: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._upsert(team_id, name, record)
+
+    def remove(self, team_id: str) -> None:
+        with self._lock:
+            self._remove(team_id)
+
+    def sync(self, records: Dict[str, Tuple[str, Dict[str, Any]]]) -> Tuple[int, int]:
+        """
+        Bring the index in line with a full listing {team_id: (name, record)}:
+        only new, changed and vanished teams touch the index
+
+        Returns:
+            (teams added or updated, teams removed)
+        """
+        with self._lock:
+            loading = not self._records
+            updated = 0
+            for team_id, (name, record) in records.items():
+                if self._records.get(team_id) != record:
+                    self._upsert(team_id, name, record, sort=not loading)
+                    updated += 1
+            removed = [team_id for team_id in self._records if team_id not in records]
+            for team_id in removed:
+                self._remove(team_id)
+            if loading:
+                # First load: append everything, then sort once
+                self._sorted_names.sort()
+                self._sorted_words.sort()
+            self.ready = True
+        return updated, len(removed)
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Best `limit` teams whose normalized name contains the normalized query:
+        exact name, then names starting with it, then names with a word starting
+        with it (each alphabetical), then names containing it (shortest first).
+        Queries of 1-2 characters only match the start of a word.
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+
+        with self._lock:
+            found: Dict[str, None] = {}
+            for source in (self._sorted_names, self._sorted_words):
+                for team_id in _starting_with(source, query):
+                    found.setdefault(team_id)
+                    if len(found) >= limit:
+                        return [self._records[team_id] for team_id in found]
+
+            if len(query) >= GRAM:
+                postings = sorted((self._grams.get(gram, set()) for gram in trigrams(query)), key=len)
+                candidates = set.intersection(*postings) if postings else set()
+                inside = [(len(self._names[team_id]), self._names[team_id], team_id) for team_id in candidates
+                          if team_id not in found and query in self._names[team_id]]
+                for _, _, team_id in heapq.nsmallest(limit - len(found), inside):
+                    found.setdefault(team_id)
+            return [self._records[team_id] for team_id in found]
+
+    async def refresh(self, dao) -> None:
+        """
+        Scan team_details_by_id (parallel token ranges) and apply the differences
+        """
+        records = {}
+        rows = dao.scan_table_async('team_details_by_id', ['team_id', 'team_name', 'country', 'city'], ['team_id'])
+        async for row in rows:
+            if row.team_name:
+                records[row.team_id] = (row.team_name, {
+                    "team_id": row.team_id,
+                    "team_name": row.team_name,
+                    "country": row.country,
+                    "city": row.city
+                })
+        updated, removed = self.sync(records)
+        logger.info(f"Team name index: {len(self)} teams ({updated} added or updated, {removed} removed)")
+
+    def _upsert(self, team_id: str, name: str, record: Dict[str, Any], sort: bool = True) -> None:
+        normalized = normalize(name)
+        if self._names.get(team_id) != normalized:
+            self._remove(team_id)
+            self._names[team_id] = normalized
+            add = insort if sort else list.append
+            add(self._sorted_names, (normalized, team_id))
+            for suffix in word_suffixes(normalized):
+                add(self._sorted_words, (suffix, team_id))
+            for gram in trigrams(normalized):
+                self._grams.setdefault(gram, set()).add(team_id)
+        self._records[team_id] = record
+
+    def _remove(self, team_id: str) -> None:
+        normalized = self._names.pop(team_id, None)
+        self._records.pop(team_id, None)
+        if normalized is None:
+            return
+        _discard(self._sorted_names, (normalized, team_id))
+        for suffix in word_suffixes(normalized):
+            _discard(self._sorted_words, (suffix, team_id))
+        for gram in trigrams(normalized):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(team_id)
+                if not postings:
+                    del self._grams[gram]
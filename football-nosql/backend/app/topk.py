@@ -0,0 +1,99 @@
+"""
+Streaming top-K per group with bounded heaps
+Used for the top_transfers_by_season pre-aggregation, both at ingestion and when a
+transfer is added through the API
+"""
+import heapq
+from functools import total_ordering
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+@total_ordering
+class Descending:
+    """
+    Wraps a value so that it sorts in reverse order (e.g. a string tie-breaker)
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other) -> bool:
+        return other.value < self.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+
+def transfer_rank(row: tuple) -> tuple:
+    """
+    Rank of a top_transfers_by_season row (season, fee_eur, player_id, ...)
+    Higher is better: fee descending, then player_id ascending (the table's clustering order)
+    """
+    return row[1], Descending(row[2])
+
+
+class TopK:
+    """
+    Keeps the k best items of each group in O(k) memory per group
+
+    Each group is a min-heap of ranks (the worst kept item on top), so a push costs
+    O(log k) and items that cannot make the top k are rejected with one comparison.
+    Items with the same rank are the same entry (same primary key): the last one
+    pushed replaces the previous one, like a Cassandra upsert.
+    """
+
+    def __init__(self, k: int, key: Callable[[Any], Any]):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.key = key
+        self._heaps: Dict[Hashable, list] = {}
+        self._items: Dict[Hashable, dict] = {}
+
+    def push(self, group: Hashable, item: Any) -> Tuple[bool, List[Any]]:
+        """
+        Offer an item to a group
+
+        Returns:
+            (admitted, evicted items that fell out of the top k)
+        """
+        rank = self.key(item)
+        heap = self._heaps.setdefault(group, [])
+        items = self._items.setdefault(group, {})
+
+        if rank in items:
+            items[rank] = item
+            return True, []
+
+        if len(heap) < self.k:
+            heapq.heappush(heap, rank)
+            items[rank] = item
+            return True, []
+
+        if not heap[0] < rank:
+            return False, []
+
+        evicted_rank = heapq.heapreplace(heap, rank)
+        items[rank] = item
+        return True, [items.pop(evicted_rank)]
+
+    def groups(self) -> List[Hashable]:
+        return list(self._heaps)
+
+    def items(self, group: Hashable = None) -> List[Any]:
+        """
+        Kept items of one group (or of every group), best first
+        """
+        groups = [group] if group is not None else self.groups()
+        result = []
+        for name in groups:
+            items = self._items.get(name, {})
+            result.extend(items[rank] for rank in sorted(items, reverse=True))
+        return result
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self._heaps.values())
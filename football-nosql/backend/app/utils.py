@@ -2,10 +2,24 @@
 Utility functions for data parsing and validation
 Handles type conversion, date parsing, and data cleaning
 """
+import re
 from datetime import datetime, date
-from typing import Optional, Any
+from typing import Optional, Any, Iterator, List
+import numpy as np
 import pandas as pd
 
+# Formats tried by parse_date, in order (the first one that matches wins)
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y", "%d-%m-%Y"]
+
+# Distinct values looked at by detect_date_format
+DATE_SAMPLE_SIZE = 200
+
+# ID written as an integral float ("11.0"), as pandas reads an integer column with gaps
+INTEGRAL_FLOAT = re.compile(r'^(-?\d+)\.0+$')
+
+# Rows converted at a time by iter_frame_params
+PARAMS_CHUNK_SIZE = 10000
+
 
 def parse_date(value: Any) -> Optional[date]:
     """
@@ -20,7 +34,7 @@ def parse_date(value: Any) -> Optional[date]:
         if isinstance(value, str):
             value = value.strip()
             # Common date formats
-            for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%Y", "%d-%m-%Y"]:
+            for fmt in DATE_FORMATS:
                 try:
                     return datetime.strptime(value, fmt).date()
                 except ValueError:
@@ -92,11 +106,13 @@ def nz(value: Any, default: str = "") -> str:
 def clean_id(value: Any) -> Optional[str]:
     """
     Clean and validate ID values
+    Integral floats are written as integers ("11.0" -> "11"): a numeric ID column with
+    missing values is read as float, and every table must use the same key
     """
     cleaned = nz(value)
     if not cleaned or cleaned.lower() in ['none', 'null', 'nan', '']:
         return None
-    return cleaned
+    return INTEGRAL_FLOAT.sub(r'\1', cleaned)
 
 
 def extract_season_from_date(date_val: Optional[date]) -> Optional[str]:
@@ -137,4 +153,198 @@ def validate_required_fields(row: pd.Series, column_map: dict, required_fields:
         value = safe_get_mapped_column(row, column_map, field)
         if not value or (isinstance(value, str) and not value.strip()) or pd.isna(value):
             return False
-    return True
\ No newline at end of file
+    return True
+
+
+# ========================================
+# COLUMN-WISE CLEANING (vectorized counterparts)
+# ========================================
+
+def _none_for_missing(series: pd.Series) -> pd.Series:
+    """
+    Return an object Series where missing values are None (ready to bind)
+    """
+    series = series.astype(object)
+    return series.where(series.notna(), None)
+
+
+def _text_column(series: pd.Series) -> pd.Series:
+    """
+    Convert a column to stripped strings, keeping missing values as NaN
+    Mirrors str(value).strip() as used by nz()
+    """
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind == 'empty':
+        return pd.Series(np.nan, index=series.index, dtype=object)
+    
+    if kind == 'string':
+        text = series.astype(object)
+    elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        text = series.astype(str).astype(object).where(series.notna())
+    else:
+        text = series.map(str, na_action='ignore').astype(object)
+    
+    return text.str.strip()
+
+
+def mapped_column(df: pd.DataFrame, column_map: dict, key: str, default: Any = None) -> pd.Series:
+    """
+    Column-wise equivalent of safe_get_mapped_column
+    Returns a Series filled with default when the mapped column doesn't exist
+    """
+    mapped_col = column_map.get(key)
+    if mapped_col is None or mapped_col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    
+    return df[mapped_col]
+
+
+def required_fields_mask(df: pd.DataFrame, column_map: dict, required_fields: list) -> pd.Series:
+    """
+    Column-wise equivalent of validate_required_fields
+    Returns a boolean mask of rows where all required fields are non-empty
+    """
+    mask = pd.Series(True, index=df.index)
+    for field in required_fields:
+        series = mapped_column(df, column_map, field)
+        valid = series.notna() & (series != 0)
+        if not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)):
+            text = _text_column(series)
+            valid &= text.notna() & (text != '')
+        mask &= valid
+    return mask
+
+
+def nz_column(series: pd.Series, default: str = "") -> pd.Series:
+    """
+    Column-wise equivalent of nz()
+    """
+    text = _text_column(series)
+    return text.where(text.notna() & (text != ''), default)
+
+
+def clean_id_column(series: pd.Series) -> pd.Series:
+    """
+    Column-wise equivalent of clean_id()
+    Invalid IDs become None
+    """
+    text = nz_column(series)
+    invalid = text.str.lower().isin(['none', 'null', 'nan', ''])
+    return text.str.replace(INTEGRAL_FLOAT, r'\1', regex=True).where(~invalid, None)
+
+
+def to_int_column(series: pd.Series, default: int = 0) -> pd.Series:
+    """
+    Column-wise equivalent of to_int()
+    Returns an int64 Series
+    """
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    
+    if kind == 'empty':
+        return pd.Series(default, index=series.index, dtype='int64')
+    
+    if kind == 'string':
+        # Same rule as to_int(): keep only digits and minus signs
+        digits = series.astype(object).str.strip().str.replace(r'[^0-9-]', '', regex=True)
+        values = pd.to_numeric(digits, errors='coerce')
+    elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        values = series.astype(float)
+    else:
+        # Mixed object column - rare, fall back to the scalar rule
+        return series.map(lambda value: to_int(value, default)).astype('int64')
+    
+    values = values.astype(float)
+    valid = np.isfinite(values)
+    return np.trunc(values.where(valid, default)).astype('int64')
+
+
+def to_bigint_column(series: pd.Series, default: int = 0) -> pd.Series:
+    """
+    Column-wise equivalent of to_bigint()
+    """
+    return to_int_column(series, default)
+
+
+def detect_date_format(values: pd.Series) -> Optional[str]:
+    """
+    Pick the DATE_FORMATS entry that parses the most values of a sample of strings
+    Ties go to the format parse_date() tries first; None if nothing matches
+    """
+    sample = values.iloc[:DATE_SAMPLE_SIZE]
+    best_format, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+    return best_format
+
+
+def parse_date_column(series: pd.Series) -> pd.Series:
+    """
+    Column-wise equivalent of parse_date()
+    Each distinct value is parsed once. Strings are parsed in one vectorized pass
+    with the format detected from a sample; values that don't match it (outliers,
+    non-strings) fall back to parse_date().
+    Returns an object Series of date objects (None for invalid dates)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return _none_for_missing(series.dt.date.where(series.notna()))
+    
+    # Dates repeat a lot: work on distinct values, codes map them back (-1 = missing)
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.Series(None, index=uniques.index, dtype=object)
+    
+    if pd.api.types.infer_dtype(uniques, skipna=True) == 'string':
+        is_text = pd.Series(True, index=uniques.index)
+    else:
+        is_text = uniques.map(lambda value: isinstance(value, str)).astype(bool)
+    text = uniques[is_text].str.strip()
+    
+    fmt = detect_date_format(text[text != ''])
+    if fmt is not None:
+        timestamps = pd.to_datetime(text, format=fmt, errors='coerce')
+        
+        # parse_date keeps the first format that matches: values also valid in an
+        # earlier format (e.g. 05/06/2020 for %m/%d/%Y) take that reading instead
+        for earlier in reversed(DATE_FORMATS[:DATE_FORMATS.index(fmt)]):
+            matched = timestamps.notna()
+            reread = pd.to_datetime(text[matched], format=earlier, errors='coerce').dropna()
+            timestamps[reread.index] = reread
+        
+        matched = timestamps.notna()
+        parsed[matched[matched].index] = timestamps[matched].dt.date
+    
+    # Per-value fallback for whatever the vectorized pass didn't parse
+    rest = parsed.isna()
+    parsed[rest] = uniques[rest].map(parse_date)
+    
+    values = np.append(parsed.to_numpy(dtype=object), None)
+    return _none_for_missing(pd.Series(values[codes], index=series.index, dtype=object))
+
+
+def column_params(*columns: pd.Series, mask: Optional[pd.Series] = None) -> List[tuple]:
+    """
+    Zip cleaned columns into ready-to-bind parameter tuples
+    Values are converted to native Python types (no numpy scalars)
+    Rows where mask is False are dropped
+    """
+    if mask is not None:
+        columns = [column[mask] for column in columns]
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def frame_params(frame: pd.DataFrame) -> List[tuple]:
+    """
+    Parameter tuples from a cleaned DataFrame, in column order
+    """
+    return column_params(*(frame[column] for column in frame.columns))
+
+
+def iter_frame_params(frame: pd.DataFrame, chunk_size: int = PARAMS_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Same tuples as frame_params, yielded lazily: only chunk_size rows are
+    converted to Python values at a time
+    """
+    for start in range(0, len(frame), chunk_size):
+        yield from frame_params(frame.iloc[start:start + chunk_size])
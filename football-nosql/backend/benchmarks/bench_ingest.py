@@ -0,0 +1,287 @@
+"""
+Ingestion throughput benchmark
+Runs every ingest_* function of ingest_all.STAGES against synthetic CSVs and an
+in-memory session (no Cassandra needed), and reports rows/sec with the split
+between parse (CSV or staged file read, table scans), transform (cleaning in
+pandas) and write (binding and sending statements, waiting for the flush).
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest --rows 10000 100000 --latency 0.002
+    python -m benchmarks.bench_ingest --rows 100000 --json current.json --baseline main.json
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Add backend and app to path
+backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_path)
+sys.path.append(os.path.join(backend_path, 'app'))
+
+import settings
+from app.dao import dao
+from ingest_all import STAGES
+from benchmarks.fake_session import FakeSession
+from benchmarks.synthetic import generate_csvs
+
+logger = logging.getLogger(__name__)
+
+# Tables read back by later stages (ingest_advanced_search scans them)
+STORED_TABLES = ['team_details_by_id', 'player_profiles_by_id', 'latest_market_value_by_player']
+
+
+class StageTimer:
+    """
+    Time spent reading input and writing statements during one ingest function
+    """
+
+    def __init__(self):
+        self.parse = 0.0
+        self.write = 0.0
+        self.rows = 0
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self, phase, getattr(self, phase) + time.perf_counter() - start)
+
+    def frames(self, chunks):
+        """
+        Time each chunk of a chunked read as parse time
+        """
+        iterator = iter(chunks)
+        while True:
+            with self.measure('parse'):
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            self.rows += len(chunk)
+            yield chunk
+
+    def rows_of(self, rows):
+        """
+        Time a streamed table scan as parse time
+        """
+        iterator = iter(rows)
+        sentinel = object()
+        while True:
+            with self.measure('parse'):
+                row = next(iterator, sentinel)
+            if row is sentinel:
+                return
+            self.rows += 1
+            yield row
+
+
+class TimedWriter:
+    """
+    Proxy around a dao writer accounting every call as write time
+    """
+
+    def __init__(self, writer, timer: StageTimer):
+        self._writer = writer
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    def submit(self, stmt_name, params):
+        with self._timer.measure('write'):
+            return self._writer.submit(stmt_name, params)
+
+    def submit_many(self, statements_with_params):
+        with self._timer.measure('write'):
+            return self._writer.submit_many(statements_with_params)
+
+    def flush(self):
+        with self._timer.measure('write'):
+            return self._writer.flush()
+
+    def __enter__(self):
+        self._writer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._timer.measure('write'):
+            return self._writer.__exit__(exc_type, exc, tb)
+
+
+@contextmanager
+def instrumented(module, timer: StageTimer):
+    """
+    Route the module's reads and dao writes through the timer for the duration
+    """
+    patches = []
+
+    def patch(owner, name, replacement):
+        patches.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, replacement)
+
+    if hasattr(module, 'read_source'):
+        read_source = module.read_source
+
+        def timed_read_source(*args, **kwargs):
+            with timer.measure('parse'):
+                result = read_source(*args, **kwargs)
+            if isinstance(result, pd.DataFrame):
+                timer.rows += len(result)
+                return result
+            return timer.frames(result)
+
+        patch(module, 'read_source', timed_read_source)
+
+    writer, scan_table, scan_aggregate = dao.writer, dao.scan_table, dao.scan_aggregate
+
+    def timed_scan_aggregate(*args, **kwargs):
+        with timer.measure('parse'):
+            return scan_aggregate(*args, **kwargs)
+
+    patch(dao, 'writer', lambda *args, **kwargs: TimedWriter(writer(*args, **kwargs), timer))
+    patch(dao, 'scan_table', lambda *args, **kwargs: timer.rows_of(scan_table(*args, **kwargs)))
+    patch(dao, 'scan_aggregate', timed_scan_aggregate)
+    try:
+        yield
+    finally:
+        for owner, name, original in reversed(patches):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+
+def run_benchmark(rows: int, work_dir: str, latency: float = 0.0, stages=None, seed: int = 0):
+    """
+    Generate data for `rows` players, run the ingest functions and time them
+
+    Returns:
+        List of result dicts, one per ingest function
+    """
+    paths = generate_csvs(os.path.join(work_dir, f"data-{rows}-{seed}"), rows, seed)
+    settings.CSV.update(paths)
+    settings.STAGING_DIR = os.path.join(work_dir, f"staging-{rows}-{seed}")
+    settings.DELTA_MANIFEST_DIR = os.path.join(work_dir, f"manifests-{rows}-{seed}")
+    if dao.cache is not None:
+        dao.cache.epoch_file = os.path.join(work_dir, f"cache-epoch-{rows}-{seed}")
+
+    session = FakeSession(keyspace=settings.KEYSPACE, latency=latency, store_tables=STORED_TABLES, seed=seed)
+    dao.session = session
+    dao.prepared_statements = {}
+    dao.queries = {}
+    dao.create_tables()
+    dao._prepare_statements()
+
+    results = []
+    try:
+        for stage_name in stages or STAGES:
+            stage = STAGES[stage_name]
+            module = importlib.import_module(stage['module'])
+            for function_name in stage['functions']:
+                timer = StageTimer()
+                written = sum(session.writes.values())
+
+                with instrumented(module, timer):
+                    start = time.perf_counter()
+                    getattr(module, function_name)()
+                    total = time.perf_counter() - start
+
+                results.append({
+                    'function': f"{stage['module']}.{function_name}",
+                    'rows': rows,
+                    'input_rows': timer.rows,
+                    'statements': sum(session.writes.values()) - written,
+                    'seconds': total,
+                    'parse': timer.parse,
+                    'transform': max(total - timer.parse - timer.write, 0.0),
+                    'write': timer.write,
+                    'rows_per_sec': timer.rows / total if total else 0.0
+                })
+    finally:
+        session.shutdown()
+    return results
+
+
+def print_report(results) -> None:
+    header = f"{'function':<55} {'rows':>9} {'in rows':>10} {'stmts':>10} {'rows/s':>10} " \
+             f"{'total s':>8} {'parse':>7} {'transf.':>7} {'write':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        total = r['seconds'] or 1.0
+        print(f"{r['function']:<55} {r['rows']:>9} {r['input_rows']:>10} {r['statements']:>10} "
+              f"{r['rows_per_sec']:>10.0f} {r['seconds']:>8.2f} {r['parse'] / total:>7.0%} "
+              f"{r['transform'] / total:>7.0%} {r['write'] / total:>7.0%}")
+
+
+def compare(results, baseline_path: str, tolerance: float) -> list:
+    """
+    Functions whose rows/sec dropped by more than tolerance against a baseline JSON report
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['function'], r['rows']): r for r in json.load(f)}
+
+    regressions = []
+    for r in results:
+        previous = baseline.get((r['function'], r['rows']))
+        if previous and previous['rows_per_sec'] and \
+                r['rows_per_sec'] < previous['rows_per_sec'] * (1 - tolerance):
+            regressions.append((r['function'], r['rows'], previous['rows_per_sec'], r['rows_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput on synthetic data")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000],
+                        help="players per run (other files scale from it), e.g. 10000 1000000")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="simulated latency of each request in seconds (default: 0)")
+    parser.add_argument('--stages', nargs='*', default=None,
+                        help=f"stages to run (default: all): {', '.join(STAGES)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', default=None,
+                        help="where data is generated and cached (default: a temporary directory)")
+    parser.add_argument('--json', default=None, help="write the results to this JSON file")
+    parser.add_argument('--baseline', default=None, help="JSON results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed rows/sec drop against the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.stages or [] if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        results = []
+        for rows in args.rows:
+            results.extend(run_benchmark(rows, work_dir, args.latency, args.stages, args.seed))
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for function, rows, before, after in regressions:
+            print(f"REGRESSION {function} ({rows} rows): {before:.0f} -> {after:.0f} rows/s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,585 @@
+"""
+In-memory stand-in for a Cassandra session (cassandra.cluster.Session)
+
+Learns the tables from the CREATE TABLE statements it executes and prepares real
+driver PreparedStatements, so bind() serializes values and computes routing keys
+exactly as against a cluster. Every write is counted (and optionally recorded) and
+answered after a configurable latency. Tables listed in store_tables keep their
+rows, so later stages can read them back with token-range scans or partition
+lookups (SELECT support is limited to what the ingestion scripts and the API need:
+equality, single-column and tuple clustering slices, LIMIT; rows come back in token
+then clustering order, built by the row factory of the execution profile).
+"""
+import hashlib
+import heapq
+import itertools
+import random
+import re
+import struct
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Optional
+
+from cassandra import OperationTimedOut, cqltypes
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, ExecutionProfile
+from cassandra.murmur3 import murmur3
+from cassandra.protocol import ColumnMetadata
+from cassandra.query import BatchStatement, BoundStatement, PreparedStatement
+
+PROTOCOL_VERSION = 4
+
+_TABLE_NAME = re.compile(r"\b(?:INTO|FROM|UPDATE|TABLE(?:\s+IF\s+NOT\s+EXISTS)?)\s+(?:\w+\.)?(\w+)", re.I)
+_INSERT_COLUMNS = re.compile(r"INSERT\s+INTO\s+[\w.]+\s*\(([^)]*)\)", re.I)
+_BEFORE_MARKER = re.compile(
+    r"(?P<counter>\w+)\s*=\s*(?P=counter)\s*(?P<sign>[+-])\s*$"
+    r"|(?:(?P<token>token\s*\([^)]*\))|(?P<column>\w+))\s*(?P<op>=|<=|>=|<|>)\s*$"
+    r"|(?P<keyword>LIMIT|TTL|TIMESTAMP)\s*$",
+    re.I
+)
+# Marker inside the right-hand tuple of "(a, b) > (?, ?)"
+_TUPLE_MARKER = re.compile(
+    r"\((?P<columns>\s*\w+(?:\s*,\s*\w+)*\s*)\)\s*(?P<op>=|<=|>=|<|>)\s*\((?P<before>[?\s,]*)$"
+)
+_CLUSTERING_ORDER = re.compile(r"CLUSTERING\s+ORDER\s+BY\s*\(([^)]*)\)", re.I)
+_COMPARE = {
+    '=': lambda a, b: a == b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+class Table:
+    """
+    Column types and primary key of one table, parsed from its CREATE TABLE statement
+    """
+
+    def __init__(self, name: str, columns: Dict[str, type], partition_key: List[str],
+                 clustering: List[str], descending: Iterable[str] = ()):
+        self.name = name
+        self.columns = columns
+        self.partition_key = partition_key
+        self.clustering = clustering
+        self.descending = set(descending)
+
+    @property
+    def primary_key(self) -> List[str]:
+        return self.partition_key + self.clustering
+
+    @classmethod
+    def parse(cls, statement: str) -> 'Table':
+        name = _TABLE_NAME.search(statement).group(1)
+        body = _balanced(statement, statement.index('('))
+
+        columns = {}
+        partition_key, clustering = [], []
+        for definition in _split_top_level(body):
+            words = definition.split()
+            if words[0].upper() == 'PRIMARY':
+                key = _split_top_level(_balanced(definition, definition.index('(')))
+                if key[0].startswith('('):
+                    partition_key = _split_top_level(key[0][1:-1])
+                else:
+                    partition_key = [key[0]]
+                clustering = key[1:]
+            else:
+                columns[words[0]] = cqltypes._cqltypes[words[1].lower()]
+                if len(words) > 2 and words[2].upper() == 'PRIMARY':
+                    partition_key = [words[0]]
+
+        order = _CLUSTERING_ORDER.search(statement)
+        descending = [words.split()[0] for words in order.group(1).split(',')
+                      if words.split()[-1].upper() == 'DESC'] if order else []
+        return cls(name, columns, partition_key, clustering, descending)
+
+
+def _balanced(text: str, start: int) -> str:
+    """
+    Content of the parenthesis opened at text[start]
+    """
+    depth = 0
+    for position in range(start, len(text)):
+        if text[position] == '(':
+            depth += 1
+        elif text[position] == ')':
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:position]
+    raise ValueError(f"Unbalanced parenthesis in {text!r}")
+
+
+def _split_top_level(text: str) -> List[str]:
+    """
+    Split on commas that are not inside parentheses
+    """
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        depth += (char == '(') - (char == ')')
+        current.append(char)
+    parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+
+def _selection(query: str, table: 'Table') -> tuple:
+    """
+    (DISTINCT or not, selected columns) of a SELECT (None for COUNT(*))
+    """
+    selection = re.search(r"SELECT\s+(.*?)\s+FROM\b", query, re.I | re.S).group(1).strip()
+    distinct = selection.upper().startswith('DISTINCT ')
+    if distinct:
+        selection = selection[len('DISTINCT '):]
+    if selection.upper() == 'COUNT(*)':
+        return distinct, None
+    return distinct, list(table.columns) if selection == '*' else [c.strip() for c in selection.split(',')]
+
+
+def _tuple_column(match) -> str:
+    """
+    Column bound by a marker of a tuple slice (from a _TUPLE_MARKER match)
+    """
+    columns = [column.strip() for column in match.group('columns').split(',')]
+    return columns[match.group('before').count('?')]
+
+
+def _routing_key(prepared: PreparedStatement, values: list) -> bytes:
+    """
+    Serialized partition key, as BoundStatement.routing_key computes it
+    """
+    parts = [values[index] for index in prepared.routing_key_indexes]
+    if len(parts) == 1:
+        return parts[0]
+    return b"".join(struct.pack(">H", len(part)) + part + b"\x00" for part in parts)
+
+
+class FakeResult:
+    """
+    Minimal ResultSet: pages of fetch_size rows (a single page when it is not set),
+    the paging state being the offset of the next page
+    """
+
+    def __init__(self, rows: Optional[list] = None, fetch_size: Optional[int] = None,
+                 paging_state: Optional[bytes] = None):
+        self._rows = rows or []
+        self._fetch_size = fetch_size or max(len(self._rows), 1)
+        self._offset = int(paging_state) if paging_state else 0
+        self._set_page()
+
+    def _set_page(self) -> None:
+        end = self._offset + self._fetch_size
+        self.current_rows = self._rows[self._offset:end]
+        self.has_more_pages = end < len(self._rows)
+        self.paging_state = str(end).encode() if self.has_more_pages else None
+
+    def fetch_next_page(self) -> None:
+        if self.has_more_pages:
+            self._offset += self._fetch_size
+            self._set_page()
+        else:
+            self.current_rows = []
+
+    def one(self):
+        return self.current_rows[0] if self.current_rows else None
+
+    def all(self) -> list:
+        return list(self)
+
+    def __iter__(self):
+        while True:
+            yield from self.current_rows
+            if not self.has_more_pages:
+                return
+            self.fetch_next_page()
+
+
+class FakeResponseFuture:
+    """
+    Minimal ResponseFuture: callbacks run on the latency thread (or inline when done)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._callbacks = []
+        self._registered = []
+        self._result = None
+        self._error = None
+
+    def _complete(self, result: FakeResult = None, error: Exception = None) -> None:
+        with self._lock:
+            self._result, self._error = result, error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._run(*callback)
+
+    def _run(self, callback, errback, callback_args, errback_args) -> None:
+        if self._error is None:
+            callback(self._result.current_rows, *callback_args)
+        else:
+            errback(self._error, *errback_args)
+
+    def add_callbacks(self, callback, errback, callback_args=(), callback_kwargs=None,
+                      errback_args=(), errback_kwargs=None) -> None:
+        with self._lock:
+            self._registered.append((callback, errback, callback_args, errback_args))
+            if not self._done.is_set():
+                self._callbacks.append((callback, errback, callback_args, errback_args))
+                return
+        self._run(callback, errback, callback_args, errback_args)
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self._result is not None and self._result.has_more_pages
+
+    def start_fetching_next_page(self) -> None:
+        """
+        Move to the next page and call the registered callbacks again (inline)
+        """
+        self._result.fetch_next_page()
+        for callback in list(self._registered):
+            self._run(*callback)
+
+    def result(self) -> FakeResult:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class FakeSession:
+    """
+    Session stand-in recording bound statements and simulating request latency
+
+    Args:
+        latency: seconds before each request completes (requests overlap, like a
+            cluster answering many in-flight requests)
+        error_rate: fraction of writes failing with OperationTimedOut (seeded)
+        store_tables: tables whose rows are kept for reads
+        record: keep every (query, serialized values) in self.statements
+        execution_profiles: {name: ExecutionProfile} as given to Cluster (only their
+            row_factory is used; named tuples by default)
+    """
+
+    def __init__(self, keyspace: str = 'football', latency: float = 0.0, error_rate: float = 0.0,
+                 store_tables: Iterable[str] = (), record: bool = False, seed: int = 0,
+                 execution_profiles: Dict[object, ExecutionProfile] = None):
+        self.keyspace = keyspace
+        self.latency = latency
+        self.error_rate = error_rate
+        self.store_tables = set(store_tables)
+        self.record = record
+        self.execution_profiles = {EXEC_PROFILE_DEFAULT: ExecutionProfile(), **(execution_profiles or {})}
+
+        self.tables = {}
+        self.statements = []
+        self.writes = Counter()
+        self.bytes_written = 0
+        self.failed = 0
+
+        self._prepared = {}
+        self._rows = {}
+        self._token_index = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._pending = []
+        self._sequence = itertools.count()
+        self._wakeup = threading.Condition()
+        self._timer = None
+
+    # Driver API
+
+    def set_keyspace(self, keyspace: str) -> None:
+        self.keyspace = keyspace
+
+    def prepare(self, query) -> PreparedStatement:
+        query = getattr(query, 'query_string', query)
+        table = self.tables[_TABLE_NAME.search(query).group(1)]
+        column_metadata = [
+            ColumnMetadata(self.keyspace, table.name, name, ctype)
+            for name, ctype in self._markers(query, table)
+        ]
+
+        # Routing key only when every partition key column is bound with =
+        bound_names = [column.name for column in column_metadata]
+        routing_indexes = None
+        if all(column in bound_names for column in table.partition_key):
+            routing_indexes = [bound_names.index(column) for column in table.partition_key]
+
+        result_metadata = []
+        if query.split(None, 1)[0].upper() == 'SELECT':
+            _, columns = _selection(query, table)
+            result_metadata = [
+                ColumnMetadata(self.keyspace, table.name, name, table.columns[name]) for name in columns
+            ] if columns is not None else [ColumnMetadata(self.keyspace, table.name, 'count', cqltypes.LongType)]
+
+        query_id = hashlib.md5(query.encode()).digest()
+        prepared = PreparedStatement(column_metadata, query_id, routing_indexes, query,
+                                     self.keyspace, PROTOCOL_VERSION, result_metadata, None)
+        self._prepared[query_id] = prepared
+        return prepared
+
+    def execute(self, query, parameters=None, **kwargs) -> FakeResult:
+        return self.execute_async(query, parameters, **kwargs).result()
+
+    def execute_async(self, query, parameters=None, paging_state=None,
+                      execution_profile=EXEC_PROFILE_DEFAULT, **kwargs) -> FakeResponseFuture:
+        future = FakeResponseFuture()
+        try:
+            result = self._handle(query, parameters)
+            if result is not None:
+                columns, rows = result
+                result = self._profile(execution_profile).row_factory(columns, rows)
+        except Exception as e:
+            future._complete(error=e)
+            return future
+
+        error = None
+        if self.error_rate and not isinstance(result, list):
+            with self._lock:
+                if self._random.random() < self.error_rate:
+                    self.failed += 1
+                    error = OperationTimedOut("simulated write timeout")
+
+        fetch_size = getattr(query, 'fetch_size', None)
+        result = FakeResult(result if isinstance(result, list) else None,
+                            fetch_size if isinstance(fetch_size, int) else None, paging_state)
+        if self.latency:
+            self._schedule(future, result, error)
+        else:
+            future._complete(result, error)
+        return future
+
+    def _profile(self, execution_profile) -> ExecutionProfile:
+        if isinstance(execution_profile, ExecutionProfile):
+            return execution_profile
+        if execution_profile not in self.execution_profiles:
+            raise ValueError(f"Invalid execution_profile: {execution_profile!r}")
+        return self.execution_profiles[execution_profile]
+
+    def shutdown(self) -> None:
+        with self._wakeup:
+            self._timer = None
+            self._wakeup.notify()
+
+    # Statement handling
+
+    def _handle(self, query, parameters):
+        """
+        Apply a statement; returns (columns, rows as tuples) for SELECTs, None otherwise
+        """
+        if isinstance(query, BatchStatement):
+            for _, query_id, values in query._statements_and_parameters:
+                self._apply(self._prepared[query_id], values)
+            return None
+
+        if isinstance(query, PreparedStatement):
+            query = query.bind(parameters or ())
+        if isinstance(query, BoundStatement):
+            return self._apply(query.prepared_statement, query.values)
+
+        query = getattr(query, 'query_string', query)
+        if re.match(r"\s*CREATE\s+TABLE", query, re.I):
+            table = Table.parse(query)
+            self.tables.setdefault(table.name, table)
+        return None
+
+    def _markers(self, query: str, table: Table) -> List[tuple]:
+        """
+        (column name, cql type) of each bind marker of a query, in order
+        """
+        markers = []
+        insert = _INSERT_COLUMNS.search(query)
+        insert_columns = [column.strip() for column in insert.group(1).split(',')] if insert else []
+
+        for match in re.finditer(r"\?", query):
+            if len(markers) < len(insert_columns):
+                name = insert_columns[len(markers)]
+                markers.append((name, table.columns[name]))
+                continue
+
+            in_tuple = _TUPLE_MARKER.search(query[:match.start()])
+            if in_tuple:
+                name = _tuple_column(in_tuple)
+                markers.append((name, table.columns[name]))
+                continue
+
+            context = _BEFORE_MARKER.search(query[:match.start()])
+            if context is None:
+                raise ValueError(f"Cannot type bind marker in {query!r}")
+            if context.group('counter'):
+                name = context.group('counter')
+                markers.append((name, table.columns[name]))
+            elif context.group('token'):
+                markers.append(('partition key token', cqltypes.LongType))
+            elif context.group('keyword'):
+                markers.append((f"[{context.group('keyword').lower()}]", cqltypes.Int32Type))
+            else:
+                name = context.group('column')
+                markers.append((name, table.columns[name]))
+        return markers
+
+    def _apply(self, prepared: PreparedStatement, values: list):
+        query = prepared.query_string
+        table = self.tables[prepared.column_metadata[0].table_name] if prepared.column_metadata \
+            else self.tables[_TABLE_NAME.search(query).group(1)]
+        verb = query.split(None, 1)[0].upper()
+
+        if verb == 'SELECT':
+            return self._select(table, prepared, values)
+
+        with self._lock:
+            self.writes[table.name] += 1
+            self.bytes_written += sum(len(value) for value in values if value is not None)
+            if self.record:
+                self.statements.append((query, values))
+
+        if table.name in self.store_tables:
+            self._store(table, verb, prepared, values)
+        return None
+
+    def _decode(self, prepared: PreparedStatement, values: list) -> List[tuple]:
+        return [
+            (column.name, column.op, column.type.from_binary(value, PROTOCOL_VERSION) if value is not None else None)
+            for column, value in zip(self._annotated(prepared), values)
+        ]
+
+    def _annotated(self, prepared: PreparedStatement) -> list:
+        """
+        Column metadata of the markers with their comparison operator (cached on the statement);
+        markers of a tuple slice get the operator ("tuple", op, columns, start of the tuple)
+        """
+        annotated = getattr(prepared, '_fake_markers', None)
+        if annotated is None:
+            Marker = namedtuple('Marker', 'name type op')
+            operators = []
+            for match in re.finditer(r"\?", prepared.query_string):
+                before = prepared.query_string[:match.start()]
+                in_tuple = _TUPLE_MARKER.search(before)
+                if in_tuple:
+                    columns = tuple(column.strip() for column in in_tuple.group('columns').split(','))
+                    operators.append(('tuple', in_tuple.group('op'), columns, in_tuple.start()))
+                    continue
+                context = _BEFORE_MARKER.search(before)
+                if context and context.group('sign'):
+                    operators.append(context.group('sign'))
+                    continue
+                operators.append(context.group('op') if context and context.group('op') else '=')
+            annotated = [Marker(column.name, column.type, op)
+                         for column, op in zip(prepared.column_metadata, operators)]
+            prepared._fake_markers = annotated
+        return annotated
+
+    def _store(self, table: Table, verb: str, prepared: PreparedStatement, values: list) -> None:
+        decoded = self._decode(prepared, values)
+        row = {name: value for name, op, value in decoded
+               if not name.startswith('[') and op not in ('+', '-')}
+        # Counter columns: "c = c + ?" adds to the stored value
+        increments = {name: value if op == '+' else -value for name, op, value in decoded if op in ('+', '-')}
+        partition = tuple(row[column] for column in table.partition_key)
+        token = murmur3(_routing_key(prepared, values))
+
+        with self._lock:
+            rows = self._rows.setdefault(table.name, {})
+            self._token_index.pop(table.name, None)
+            if verb == 'DELETE':
+                key = tuple(row.get(column) for column in table.primary_key)
+                if len(row) >= len(table.primary_key):
+                    rows.pop(key, None)
+                else:
+                    for stored in [k for k in rows if k[:len(partition)] == partition]:
+                        del rows[stored]
+                return
+
+            key = tuple(row[column] for column in table.primary_key)
+            stored = rows.setdefault(key, {'__token__': token})
+            stored.update(row)
+            for name, value in increments.items():
+                stored[name] = (stored.get(name) or 0) + value
+
+    def _sorted_rows(self, table: Table) -> tuple:
+        with self._lock:
+            index = self._token_index.get(table.name)
+            if index is None:
+                # Clustering order (stable sorts, last column first), then partitions by token
+                rows = list(self._rows.get(table.name, {}).values())
+                for column in reversed(table.clustering):
+                    rows.sort(key=lambda row: row[column], reverse=column in table.descending)
+                rows.sort(key=lambda row: (row['__token__'], tuple(row[c] for c in table.partition_key)))
+                index = ([row['__token__'] for row in rows], rows)
+                self._token_index[table.name] = index
+        return index
+
+    def _select(self, table: Table, prepared: PreparedStatement, values: list) -> tuple:
+        query = prepared.query_string
+        distinct, columns = _selection(query, table)
+
+        tokens, rows = self._sorted_rows(table)
+        limit = None
+        conditions = []
+        slices = {}
+        low, high = 0, len(rows)
+        for name, op, value in self._decode(prepared, values):
+            if name == 'partition key token':
+                if op in ('>', '>='):
+                    low = max(low, (bisect_right if op == '>' else bisect_left)(tokens, value))
+                else:
+                    high = min(high, (bisect_right if op == '<=' else bisect_left)(tokens, value))
+            elif name == '[limit]':
+                limit = value
+            elif isinstance(op, tuple):
+                _, tuple_op, columns, start = op
+                slices.setdefault(start, (columns, tuple_op, []))[2].append(value)
+            else:
+                conditions.append(((name,), op, (value,)))
+        conditions.extend((columns, op, tuple(bound)) for columns, op, bound in slices.values())
+
+        literal_limit = re.search(r"LIMIT\s+(\d+)", query, re.I)
+        if literal_limit:
+            limit = int(literal_limit.group(1))
+
+        matched = [row for row in rows[low:high]
+                   if all(_COMPARE[op](tuple(row.get(name) for name in names), bound)
+                          for names, op, bound in conditions)]
+
+        if columns is None:
+            return ['count'], [(len(matched),)]
+
+        if distinct:
+            seen = {}
+            for row in matched:
+                seen.setdefault(tuple(row[c] for c in table.partition_key), row)
+            matched = list(seen.values())
+        if limit is not None:
+            matched = matched[:limit]
+        return columns, [tuple(row.get(column) for column in columns) for row in matched]
+
+    # Latency simulation
+
+    def _schedule(self, future: FakeResponseFuture, result: FakeResult, error: Exception) -> None:
+        with self._wakeup:
+            heapq.heappush(self._pending, (time.monotonic() + self.latency, next(self._sequence),
+                                           future, result, error))
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._complete_due, daemon=True)
+                self._timer.start()
+            self._wakeup.notify()
+
+    def _complete_due(self) -> None:
+        while True:
+            with self._wakeup:
+                while self._timer is not None and (
+                        not self._pending or self._pending[0][0] > time.monotonic()):
+                    timeout = self._pending[0][0] - time.monotonic() if self._pending else None
+                    self._wakeup.wait(timeout)
+                if self._timer is None:
+                    return
+                _, _, future, result, error = heapq.heappop(self._pending)
+            future._complete(result, error)
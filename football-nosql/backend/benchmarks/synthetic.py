@@ -0,0 +1,245 @@
+"""
+Deterministic synthetic CSVs for every file of settings.CSV
+Column names come from settings.MAP, so the generated files follow the mapping.
+Sizes scale linearly with `rows` (10k to 10M); files are written chunk by chunk so
+memory stays flat. About 1% of the values are missing or malformed, like the real
+exports, to exercise the cleaning code paths.
+"""
+import os
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Add backend to path for imports
+backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_path)
+
+import settings
+from app.staging import MAP_KEYS
+
+CHUNK_ROWS = 500000
+
+COUNTRIES = ['France', 'Spain', 'England', 'Germany', 'Italy', 'Portugal', 'Brazil', 'Argentina',
+             'Netherlands', 'Belgium', 'Côte d\'Ivoire', 'Sénégal', 'Türkiye', 'México', 'Japan',
+             'United States', 'Colombia', 'Uruguay', 'Croatia', 'Morocco']
+CITIES = ['Paris', 'Madrid', 'London', 'München', 'Milano', 'Lisboa', 'São Paulo', 'Buenos Aires',
+          'Amsterdam', 'Bruxelles', 'Abidjan', 'Dakar', 'İstanbul', 'Ciudad de México', 'Tokyo',
+          'Saint-Étienne', 'Medellín', 'Montevideo', 'Zagreb', 'Casablanca']
+CLUB_PREFIXES = ['FC', 'AS', 'Real', 'Sporting', 'Olympique', 'Atlético', 'Racing', 'Dynamo', 'Union', 'Inter']
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfield', 'Attack', 'Centre-Back', 'Left-Back', 'Right-Back',
+             'Defensive Midfield', 'Central Midfield', 'Attacking Midfield', 'Left Winger',
+             'Right Winger', 'Centre-Forward']
+FEET = ['right', 'left', 'both']
+INJURIES = ['Knee injury', 'Hamstring injury', 'Ankle injury', 'Muscle injury', 'Illness',
+            'Groin strain', 'Cruciate ligament tear', 'Fracture']
+COMPETITIONS = ['Ligue 1', 'LaLiga', 'Premier League', 'Bundesliga', 'Serie A', 'Champions League',
+                'Europa League', 'Coupe de France']
+RELATIONS = ['Reserve', 'Youth', 'Women', 'Related']
+
+
+def sizes(rows: int) -> Dict[str, int]:
+    """
+    Row count of each settings.CSV file for a benchmark of `rows` players
+    """
+    teams = max(rows // 100, 10)
+    return {
+        'profiles': rows,
+        'market_latest': rows,
+        'market_history': rows * 2,
+        'injuries': rows,
+        'transfers': rows,
+        'club_perf': rows * 2,
+        'nat_perf': rows // 2,
+        'teammates': rows * 2,
+        'team_details': teams,
+        'team_children': teams,
+        'team_comp_seasons': teams * 4
+    }
+
+
+class _Generator:
+    """
+    Column generators for one chunk of one file
+    """
+
+    def __init__(self, rng: np.random.Generator, start: int, n: int, players: int, teams: int):
+        self.rng = rng
+        self.start = start
+        self.n = n
+        self.players = players
+        self.teams = teams
+
+    def sequence(self) -> np.ndarray:
+        return np.arange(self.start + 1, self.start + self.n + 1)
+
+    def choice(self, values: list) -> np.ndarray:
+        return np.asarray(values, dtype=object)[self.rng.integers(0, len(values), self.n)]
+
+    def player_ids(self) -> np.ndarray:
+        return self.rng.integers(1, self.players + 1, self.n)
+
+    def team_ids(self, missing: float = 0.0) -> pd.Series:
+        return self.with_missing(self.rng.integers(1, self.teams + 1, self.n), missing)
+
+    def integers(self, low: int, high: int, missing: float = 0.0) -> pd.Series:
+        return self.with_missing(self.rng.integers(low, high, self.n), missing)
+
+    def dates(self, first_year: int, last_year: int, missing: float = 0.01) -> pd.Series:
+        days = self.rng.integers(0, (last_year - first_year + 1) * 365, self.n)
+        dates = (np.datetime64(f'{first_year}-01-01') + days.astype('timedelta64[D]')).astype(str)
+        dates = pd.Series(dates, dtype=object)
+        # A few malformed values for the per-value fallback
+        dates[self.rng.random(self.n) < missing / 10] = 'unknown'
+        return self.with_missing(dates, missing)
+
+    def seasons(self) -> np.ndarray:
+        years = self.rng.integers(2000, 2025, self.n)
+        start = np.char.zfill((years % 100).astype(str), 2)
+        end = np.char.zfill(((years + 1) % 100).astype(str), 2)
+        return np.char.add(np.char.add(start, '/'), end)
+
+    def with_missing(self, values, missing: float) -> pd.Series:
+        series = pd.Series(values)
+        if missing:
+            series = series.astype(object)
+            series[self.rng.random(self.n) < missing] = None
+        return series
+
+
+def _columns(key: str, g: _Generator) -> Dict[str, object]:
+    """
+    Values of one chunk of settings.CSV[key], keyed by settings.MAP field
+    """
+    if key == 'profiles':
+        ids = g.sequence()
+        return {
+            'player_id': g.with_missing(ids, 0.001),
+            'player_name': np.char.add('Player ', ids.astype(str)),
+            'nationality': g.with_missing(g.choice(COUNTRIES), 0.01),
+            'birth_date': g.dates(1975, 2007),
+            'height_cm': g.integers(160, 206, 0.05),
+            'preferred_foot': g.with_missing(g.choice(FEET), 0.05),
+            'main_position': g.with_missing(g.choice(POSITIONS), 0.01),
+            'current_team_id': g.team_ids(0.1)
+        }
+    if key in ('market_history', 'market_latest'):
+        return {
+            'player_id': g.sequence() if key == 'market_latest' else g.player_ids(),
+            'date': g.dates(2004, 2024, 0.001),
+            'market_value_eur': g.with_missing(g.rng.integers(1, 2000, g.n) * 25000, 0.01),
+            'source': g.choice(['transfermarkt'])
+        }
+    if key == 'injuries':
+        return {
+            'player_id': g.player_ids(),
+            'start_date': g.dates(2005, 2024),
+            'injury_type': g.with_missing(g.choice(INJURIES), 0.02),
+            'end_date': g.dates(2005, 2024, 0.1),
+            'games_missed': g.integers(0, 40, 0.1)
+        }
+    if key == 'transfers':
+        return {
+            'player_id': g.player_ids(),
+            'transfer_date': g.dates(2000, 2024),
+            'from_team_id': g.team_ids(0.05),
+            'to_team_id': g.team_ids(0.05),
+            'fee_eur': g.with_missing(g.rng.integers(0, 4000, g.n) * 50000, 0.3),
+            'contract_years': g.integers(1, 6, 0.5),
+            'season': g.seasons()
+        }
+    if key == 'club_perf':
+        return {
+            'player_id': g.player_ids(),
+            'season': g.seasons(),
+            'team_id': g.team_ids(),
+            'matches': g.integers(0, 50),
+            'goals': g.integers(0, 30),
+            'assists': g.integers(0, 20),
+            'minutes': g.integers(0, 4500)
+        }
+    if key == 'nat_perf':
+        return {
+            'player_id': g.player_ids(),
+            'season': g.choice(['CURRENT_NATIONAL_PLAYER', 'FORMER_NATIONAL_PLAYER', 'RECALLED']),
+            'national_team': g.team_ids(),
+            'matches': g.integers(0, 150),
+            'goals': g.integers(0, 80)
+        }
+    if key == 'teammates':
+        teammates = g.player_ids()
+        return {
+            'player_id': g.player_ids(),
+            'teammate_id': teammates,
+            'teammate_name': np.char.add('Player ', teammates.astype(str)),
+            'matches_together': np.round(g.rng.random(g.n) * 3, 2)
+        }
+    if key == 'team_details':
+        ids = g.sequence()
+        return {
+            'team_id': ids,
+            'team_name': np.char.add(np.char.add(g.choice(CLUB_PREFIXES).astype(str), ' '),
+                                     np.char.add(g.choice(CITIES).astype(str), np.char.add(' ', ids.astype(str)))),
+            'country': g.choice(COUNTRIES),
+            'city': g.with_missing(g.choice(CITIES), 0.05),
+            'founded': g.integers(1857, 2020, 0.2)
+        }
+    if key == 'team_children':
+        children = g.team_ids()
+        return {
+            'parent_team_id': g.team_ids(),
+            'child_team_id': children,
+            'child_team_name': np.char.add('Team ', children.astype(str)),
+            'relation': g.with_missing(g.choice(RELATIONS), 0.2)
+        }
+    if key == 'team_comp_seasons':
+        return {
+            'team_id': g.team_ids(),
+            'season': g.seasons(),
+            'competition': g.choice(COMPETITIONS)
+        }
+    raise KeyError(f"No synthetic generator for {key}")
+
+
+def generate_csv(key: str, path: str, rows: int, seed: int = 0) -> int:
+    """
+    Write the synthetic version of settings.CSV[key] for a benchmark of `rows` players
+    Returns the number of rows written
+    """
+    counts = sizes(rows)
+    column_map = settings.MAP[MAP_KEYS.get(key, key)]
+    total = counts[key]
+    key_index = sorted(counts).index(key)
+
+    for chunk_index, start in enumerate(range(0, max(total, 1), CHUNK_ROWS)):
+        n = min(CHUNK_ROWS, total - start)
+        rng = np.random.default_rng([seed, key_index, chunk_index])
+        generator = _Generator(rng, start, n, counts['profiles'], counts['team_details'])
+
+        # Several fields may map to the same CSV column: the first one wins
+        frame = {}
+        for field, values in _columns(key, generator).items():
+            frame.setdefault(column_map.get(field, field), values)
+        pd.DataFrame({column: pd.Series(values).to_numpy() for column, values in frame.items()}).to_csv(
+            path, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0, index=False
+        )
+    return total
+
+
+def generate_csvs(directory: str, rows: int, seed: int = 0) -> Dict[str, str]:
+    """
+    Generate every file of settings.CSV into directory (reused if already complete)
+
+    Returns:
+        {settings.CSV key: path}
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {key: os.path.join(directory, os.path.basename(path)) for key, path in settings.CSV.items()}
+    marker = os.path.join(directory, f".complete-{rows}-{seed}")
+
+    if not os.path.exists(marker):
+        for key, path in paths.items():
+            generate_csv(key, path, rows, seed)
+        open(marker, 'w').close()
+    return paths
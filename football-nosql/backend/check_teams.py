@@ -27,7 +27,8 @@ def main():
             for row in teams:
                 print(f"Team ID: {row.team_id} - Name: {row.team_name}")
         
-        print(f"\n📊 Total équipes dans team_details_by_id: {len(teams)}")
+        # Comptage exact : un COUNT(*) par sous-plage de tokens, en parallèle
+        print(f"\n📊 Total équipes dans team_details_by_id: {dao.count_rows('team_details_by_id', ['team_id'])}")
         
         print("\n=== 👥 JOUEURS PAR ÉQUIPE (10 premiers) ===")
         result = dao.session.execute("SELECT team_id, player_id, player_name FROM players_by_team LIMIT 10")
@@ -40,7 +41,7 @@ def main():
             for row in players:
                 print(f"Team: {row.team_id} - Player: {row.player_name} ({row.player_id})")
         
-        print(f"\n📊 Total joueurs dans players_by_team: {len(players)}")
+        print(f"\n📊 Total joueurs dans players_by_team: {dao.count_rows('players_by_team', ['team_id'])}")
         
         # Test avec une équipe spécifique si on en trouve une
         if teams:
@@ -62,22 +63,24 @@ def main():
         print("\n🔍 Recherche d'équipes connues...")
         popular_teams = ['barcelona', 'madrid', 'manchester', 'liverpool', 'bayern', 'psg', 'juventus']
         
-        for team_name in popular_teams:
-            query = dao.session.prepare(
-                "SELECT team_id, team_name FROM team_details_by_id WHERE team_name LIKE ? LIMIT 5 ALLOW FILTERING"
-            )
-            result = dao.session.execute(query, (f'%{team_name}%',))
-            found_teams = list(result)
+        # Un seul scan parallèle de team_details_by_id pour tous les noms
+        # (LIKE nécessiterait un index SASI)
+        found = {team_name: [] for team_name in popular_teams}
+        for team in dao.scan_table('team_details_by_id', ['team_id', 'team_name'], ['team_id']):
+            team_name_lower = team.team_name.lower() if team.team_name else ""
+            for team_name in popular_teams:
+                if team_name in team_name_lower and len(found[team_name]) < 5:
+                    found[team_name].append(team)
+        
+        count_query = dao.session.prepare("SELECT COUNT(*) FROM players_by_team WHERE team_id = ?")
+        for team_name, found_teams in found.items():
             if found_teams:
                 print(f"\n🏆 Équipes contenant '{team_name}':")
                 for team in found_teams:
                     print(f"  ID: {team.team_id} - Name: {team.team_name}")
                     
                     # Vérifier si cette équipe a des joueurs
-                    player_result = dao.session.execute(
-                        "SELECT COUNT(*) FROM players_by_team WHERE team_id = ?", 
-                        (team.team_id,)
-                    )
+                    player_result = dao.session.execute(count_query, (team.team_id,))
                     count = player_result.one()
                     if hasattr(count, 'count'):
                         player_count = count.count
@@ -1,264 +1,197 @@
 """
 Ingestion script for advanced player search tables
-Populates players_by_position, players_by_nationality, and players_search_index
+Populates players_by_position, players_by_nationality, players_by_position_nationality,
+players_search_by_team, players_search_index, the tables clustered by market value
+and birth year, and the search_facets counters
+(the rows written per player are listed by app.search_index.search_writes)
 """
+import asyncio
 import sys
 import os
+from collections import Counter
+from itertools import islice
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import pandas as pd
-from cassandra.query import BatchStatement, SimpleStatement
-from cassandra import ConsistencyLevel
 import logging
 
 import settings
 from app.dao import dao
+from app.search_index import (SEARCH_KEYS, SEARCH_RECORD_COLUMNS, FACET_SCOPE, facet_increments, facet_values,
+                              previous_search_records, search_keys, search_record, search_writes,
+                              stale_deletes)
 from app.utils import *
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_search_tables():
-    """Create the advanced search tables if they don't exist"""
-    statements = [
-        """
-        CREATE TABLE IF NOT EXISTS players_by_position (
-          position text,
-          player_id text,
-          player_name text,
-          nationality text,
-          team_id text,
-          team_name text,
-          birth_date date,
-          market_value_eur bigint,
-          PRIMARY KEY (position, player_id)
-        );
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS players_by_nationality (
-          nationality text,
-          player_id text,
-          player_name text,
-          position text,
-          team_id text,
-          team_name text,
-          birth_date date,
-          market_value_eur bigint,
-          PRIMARY KEY (nationality, player_id)
-        );
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS players_search_index (
-          search_partition text,
-          player_name_lower text,
-          player_id text,
-          player_name text,
-          position text,
-          nationality text,
-          team_id text,
-          team_name text,
-          birth_date date,
-          market_value_eur bigint,
-          PRIMARY KEY (search_partition, player_name_lower, player_id)
-        ) WITH CLUSTERING ORDER BY (player_name_lower ASC, player_id ASC);
-        """
-    ]
-    
-    for statement in statements:
-        try:
-            dao.session.execute(SimpleStatement(statement, consistency_level=ConsistencyLevel.ONE))
-            logger.info("Table created successfully")
-        except Exception as e:
-            logger.warning(f"Table creation warning (may already exist): {e}")
+    """Create the advanced search tables if they don't exist (DDL of dao.create_tables)"""
+    dao.create_tables([*SEARCH_KEYS, 'search_facets'])
 
-def clean_nationality(nationality):
-    """Clean and normalize nationality values"""
-    if not nationality or nationality == 'None':
-        return 'Unknown'
-    
-    # Remove any weird characters and normalize
-    cleaned = str(nationality).strip()
-    
-    # Skip entries that look like IDs or contain numbers/special chars
-    if any(char.isdigit() for char in cleaned):
-        return 'Unknown'
-    
-    if len(cleaned) < 2 or len(cleaned) > 50:
-        return 'Unknown'
-        
-    # Common problematic values to filter out
-    problematic = ['null', 'none', 'n/a', 'na', 'unknown', '']
-    if cleaned.lower() in problematic:
-        return 'Unknown'
-    
-    return cleaned
+def load_team_names():
+    """
+    Bulk-load team_id -> team_name from a single parallel scan of team_details_by_id
+    """
+    team_names = {
+        row.team_id: row.team_name
+        for row in dao.scan_table('team_details_by_id', ['team_id', 'team_name'], ['team_id'])
+    }
+    logger.info(f"Loaded {len(team_names)} team names")
+    return team_names
 
-def clean_position(position):
-    """Clean and normalize position values"""
-    if not position or position == 'None':
-        return 'Unknown'
-    
-    # Common position mappings
-    position_map = {
-        'Defender': 'Defender',
-        'Midfielder': 'Midfielder', 
-        'Forward': 'Forward',
-        'Goalkeeper': 'Goalkeeper',
-        'Centre-Back': 'Defender',
-        'Left-Back': 'Defender',
-        'Right-Back': 'Defender',
-        'Defensive Midfield': 'Midfielder',
-        'Central Midfield': 'Midfielder',
-        'Attacking Midfield': 'Midfielder',
-        'Left Winger': 'Forward',
-        'Right Winger': 'Forward',
-        'Centre-Forward': 'Forward',
-        'Left Midfield': 'Midfielder',
-        'Right Midfield': 'Midfielder'
+def load_latest_market_values():
+    """
+    Bulk-load player_id -> latest market value with concurrent token-range scans
+    """
+    market_values = {
+        row.player_id: row.market_value_eur
+        for row in dao.scan_table('latest_market_value_by_player',
+                                  ['player_id', 'market_value_eur'], ['player_id'])
     }
-    
-    cleaned = str(position).strip()
-    return position_map.get(cleaned, cleaned if len(cleaned) < 30 else 'Unknown')
+    logger.info(f"Loaded {len(market_values)} latest market values")
+    return market_values
 
 def get_enhanced_player_data():
     """
     Collect player data from multiple sources to create comprehensive search records
-    """
-    logger.info("Collecting player profiles...")
+    Streams profiles (token-range scan) and joins them with in-memory team and
+    market value lookups - no per-player query
     
-    # Get basic player profiles
-    profiles_query = """
-    SELECT player_id, player_name, nationality, birth_date, main_position, current_team_id
-    FROM player_profiles_by_id
+    Yields:
+        One search record dict per player
     """
-    profiles_result = dao.session.execute(profiles_query)
-    
-    players_data = []
-    
-    for row in profiles_result:
-        player_data = {
-            'player_id': row.player_id,
-            'player_name': row.player_name or 'Unknown',
-            'nationality': clean_nationality(row.nationality),
-            'birth_date': row.birth_date,
-            'position': clean_position(row.main_position),
-            'team_id': row.current_team_id,
-            'team_name': None,
-            'market_value_eur': None
-        }
-        
-        # Try to get team name
-        if row.current_team_id:
-            try:
-                team_query = """
-                SELECT team_name FROM team_details_by_id WHERE team_id = ?
-                """
-                team_result = list(dao.session.execute(dao.session.prepare(team_query), (row.current_team_id,)))
-                if team_result:
-                    player_data['team_name'] = team_result[0].team_name
-            except Exception as e:
-                logger.debug(f"Could not get team name for {row.current_team_id}: {e}")
-        
-        # Try to get latest market value
-        try:
-            market_query = """
-            SELECT market_value_eur FROM latest_market_value_by_player WHERE player_id = ?
-            """
-            market_result = list(dao.session.execute(dao.session.prepare(market_query), (row.player_id,)))
-            if market_result:
-                player_data['market_value_eur'] = market_result[0].market_value_eur
-        except Exception as e:
-            logger.debug(f"Could not get market value for {row.player_id}: {e}")
-        
-        players_data.append(player_data)
-    
-    logger.info(f"Collected data for {len(players_data)} players")
-    return players_data
+    team_names = load_team_names()
+    market_values = load_latest_market_values()
+    
+    logger.info("Streaming player profiles...")
+    profiles = dao.scan_table(
+        'player_profiles_by_id',
+        ['player_id', 'player_name', 'nationality', 'birth_date', 'main_position', 'current_team_id'],
+        ['player_id']
+    )
+    
+    for row in profiles:
+        yield search_record(
+            row,
+            team_names.get(row.current_team_id) if row.current_team_id else None,
+            market_values.get(row.player_id)
+        )
 
-def ingest_search_tables(players_data):
+def known_positions():
     """
-    Insert player data into the search-optimized tables
+    Positions of players_by_position (its distinct partition keys), where a player
+    whose position changed since the last run is looked for
     """
-    logger.info("Starting ingestion into search tables...")
-    
-    # Prepare statements
-    position_stmt = dao.session.prepare("""
-        INSERT INTO players_by_position (position, player_id, player_name, nationality, team_id, team_name, birth_date, market_value_eur)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """)
+    return {row.position for row in dao.scan_table('players_by_position', ['position'], ['position'], distinct=True)}
+
+def chunked(items, size):
+    """
+    Lists of `size` consecutive items of any iterable (the last one may be shorter)
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def ingest_search_tables(players_data, facets=None):
+    """
+    Insert player data into the search-optimized tables
+    players_data can be any iterable (writes are emitted as records arrive)
+    facets: Counter updated with the (facet, value) of every player written
     
-    nationality_stmt = dao.session.prepare("""
-        INSERT INTO players_by_nationality (nationality, player_id, player_name, position, team_id, team_name, birth_date, market_value_eur)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """)
+    Stale rows (keys the new record no longer has) are found chunk by chunk: the
+    previous record of each player is read back from players_by_position, so only
+    the IDs of the players written are kept until the final sweep, which deletes
+    the players no longer in the profiles
     
-    search_index_stmt = dao.session.prepare("""
-        INSERT INTO players_search_index (search_partition, player_name_lower, player_id, player_name, position, nationality, team_id, team_name, birth_date, market_value_eur)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """)
+    Returns:
+        Number of players written
+    """
+    logger.info("Starting ingestion into search tables...")
     
-    # Batch processing
-    batch_size = 50
-    batch = BatchStatement()
     processed = 0
-    
-    for player in players_data:
-        try:
-            # Insert into players_by_position
-            batch.add(position_stmt, (
-                player['position'],
-                player['player_id'],
-                player['player_name'],
-                player['nationality'],
-                player['team_id'],
-                player['team_name'],
-                player['birth_date'],
-                player['market_value_eur']
-            ))
-            
-            # Insert into players_by_nationality  
-            batch.add(nationality_stmt, (
-                player['nationality'],
-                player['player_id'],
-                player['player_name'],
-                player['position'],
-                player['team_id'],
-                player['team_name'],
-                player['birth_date'],
-                player['market_value_eur']
-            ))
-            
-            # Insert into search index
-            player_name_lower = player['player_name'].lower() if player['player_name'] else ''
-            batch.add(search_index_stmt, (
-                'all',  # Fixed partition key
-                player_name_lower,
-                player['player_id'],
-                player['player_name'],
-                player['position'],
-                player['nationality'],
-                player['team_id'],
-                player['team_name'],
-                player['birth_date'],
-                player['market_value_eur']
-            ))
-            
-            processed += 1
-            
-            # Execute batch when it reaches the limit
-            if len(batch) >= batch_size * 3:  # 3 inserts per player
-                dao.session.execute(batch)
-                batch = BatchStatement()
-                logger.info(f"Processed {processed} players...")
-                
-        except Exception as e:
-            logger.error(f"Error processing player {player['player_id']}: {e}")
-    
-    # Execute remaining batch
-    if len(batch) > 0:
-        dao.session.execute(batch)
+    positions = known_positions()
+    written = set()
+    
+    with dao.writer() as writer:
+        for chunk in chunked(players_data, settings.SEARCH_REFRESH_CHUNK):
+            previous = asyncio.run(previous_search_records(dao, chunk, positions))
+            for player in chunk:
+                try:
+                    # Rows moved by a new position, nationality, team, name, market value or birth date
+                    previous_keys = set().union(*(search_keys(record) for record in previous[player['player_id']]))
+                    for stmt_name, params in stale_deletes(dao, previous_keys, player):
+                        writer.submit(stmt_name, params)
+                    
+                    # One row per search table (position, nationality, position + nationality,
+                    # team, name bucket, clustered tables)
+                    for stmt_name, params in search_writes(player):
+                        writer.submit(stmt_name, params)
+                    
+                    if facets is not None:
+                        facets.update(facet_values(player))
+                    
+                    written.add(player['player_id'])
+                    processed += 1
+                    
+                    if processed % 1000 == 0:
+                        logger.info(f"Processed {processed} players...")
+                        
+                except Exception as e:
+                    logger.error(f"Error processing player {player['player_id']}: {e}")
+        
+        # Players no longer in the profiles: every row of their previous record
+        for row in dao.scan_table('players_by_position', SEARCH_RECORD_COLUMNS, ['position']):
+            if row.player_id not in written:
+                for stmt_name, params in stale_deletes(dao, search_keys(row._asdict()), None):
+                    writer.submit(stmt_name, params)
     
     logger.info(f"Successfully ingested {processed} players into search tables")
+    return processed
+
+def ingest_search_facets(facets):
+    """
+    Bring the search_facets counters to the counts of this run
+    Counters can only be incremented: the difference with the stored counts is added
+    (values that vanished go down to 0 and are skipped by the suggestions)
+    """
+    current = {
+        (row.facet, row.value): row.player_count
+        for row in dao.execute_statement('get_search_facets', (FACET_SCOPE,))
+    }
+    deltas = {key: facets.get(key, 0) - current.get(key, 0) for key in set(facets) | set(current)}
+    
+    # One statement each: counter updates cannot share a batch with other writes.
+    # Never retried: an increment that timed out may still have been applied, and
+    # sending it again would add its delta twice. Failed counters are reported and
+    # set right by the next run, whose deltas start from the stored counts
+    increments = facet_increments(deltas)
+    writer = dao.writer(mode='async', max_retries=0)
+    try:
+        with writer:
+            for stmt_name, params in increments:
+                writer.submit(stmt_name, params)
+    except RuntimeError as e:
+        logger.warning(f"Search facets: {len(writer.failures)} counter updates failed, "
+                       f"re-run the ingestion to recompute them ({e})")
+        return
+    logger.info(f"Search facets: {len(facets)} values, {len(increments)} counters updated")
+
+def drop_legacy_search_partition():
+    """
+    Delete the single 'all' partition written before players_search_index was bucketed
+    (no bucket can be named 'all'). One-time migration: the partition is only deleted
+    while it still holds rows, so later runs do not add a tombstone each time
+    """
+    dao.register('get_legacy_search_row',
+                 "SELECT player_id FROM players_search_index WHERE search_partition = ? LIMIT 1")
+    if dao.execute_statement('get_legacy_search_row', ('all',)).one() is None:
+        return
+    dao.register('delete_legacy_search_partition', "DELETE FROM players_search_index WHERE search_partition = ?")
+    dao.execute_statement('delete_legacy_search_partition', ('all',))
+    logger.info("Deleted the legacy 'all' partition of players_search_index")
 
 def verify_ingestion():
     """
@@ -266,55 +199,48 @@ def verify_ingestion():
     """
     logger.info("Verifying ingestion...")
     
-    # Count records in each table
-    tables = [
-        'players_by_position',
-        'players_by_nationality', 
-        'players_search_index'
-    ]
-    
-    for table in tables:
+    # Count records in each search table
+    for table, (partition_key, _) in SEARCH_KEYS.items():
         try:
-            if table == 'players_search_index':
-                query = f"SELECT COUNT(*) FROM {table} WHERE search_partition = ?"
-                result = dao.session.execute(dao.session.prepare(query), ('all',))
-            else:
-                # Note: COUNT(*) without WHERE is not recommended in Cassandra for large tables
-                # This is just for verification with small datasets
-                query = f"SELECT COUNT(*) FROM {table}"
-                result = dao.session.execute(query)
-            
-            count = list(result)[0].count
+            # Exact count: one COUNT(*) per token sub-range, run in parallel
+            count = dao.count_rows(table, list(partition_key))
             logger.info(f"{table}: {count} records")
             
         except Exception as e:
             logger.error(f"Error counting {table}: {e}")
 
+def ingest_advanced_search():
+    """
+    Build the search tables from already ingested profiles, teams and market values
+    """
+    logger.info("Starting advanced search ingestion...")
+    
+    # Create tables
+    create_search_tables()
+    drop_legacy_search_partition()
+    
+    # Stream enhanced player data straight into the search tables
+    facets = Counter()
+    processed = ingest_search_tables(get_enhanced_player_data(), facets)
+    
+    if not processed:
+        logger.warning("No player data found. Make sure basic ingestion scripts have been run first.")
+        return
+    
+    ingest_search_facets(facets)
+    
+    # Verify ingestion
+    verify_ingestion()
+
 def main():
     """
     Main ingestion function
     """
     try:
-        logger.info("Starting advanced search ingestion...")
-        
         # Connect to database
         dao.connect()
         
-        # Create tables
-        create_search_tables()
-        
-        # Get enhanced player data
-        players_data = get_enhanced_player_data()
-        
-        if not players_data:
-            logger.warning("No player data found. Make sure basic ingestion scripts have been run first.")
-            return
-        
-        # Ingest into search tables
-        ingest_search_tables(players_data)
-        
-        # Verify ingestion
-        verify_ingestion()
+        ingest_advanced_search()
         
         logger.info("Advanced search ingestion completed successfully!")
         
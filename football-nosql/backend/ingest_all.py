@@ -0,0 +1,182 @@
+"""
+Ingestion orchestrator
+Runs every ingest_* script in a process pool, respecting dependencies between them
+Independent stages run concurrently, so a full reload takes as long as the slowest chain
+"""
+import argparse
+import importlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Add backend and app to path
+backend_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(backend_path)
+sys.path.append(os.path.join(backend_path, 'app'))
+
+import settings
+from app.dao import dao
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Stage name -> module, functions to call in order, stages that must finish first
+STAGES = {
+    'teams': {
+        'module': 'ingest_teams',
+        'functions': ['ingest_team_details', 'ingest_team_children', 'ingest_team_competitions'],
+        'depends_on': []
+    },
+    'player_profiles': {
+        'module': 'ingest_player_profiles',
+        'functions': ['ingest_player_profiles'],
+        'depends_on': []
+    },
+    'market_values': {
+        'module': 'ingest_market_values',
+        'functions': ['ingest_market_history'],
+        'depends_on': []
+    },
+    'latest_market_values': {
+        'module': 'ingest_market_values',
+        'functions': ['rebuild_latest_market_values'],
+        'depends_on': []
+    },
+    'transfers': {
+        'module': 'ingest_transfers',
+        'functions': ['ingest_transfers'],
+        'depends_on': []
+    },
+    'injuries': {
+        'module': 'ingest_injuries',
+        'functions': ['ingest_injuries'],
+        'depends_on': []
+    },
+    'performances': {
+        'module': 'ingest_performances',
+        'functions': ['ingest_club_performances', 'ingest_national_performances'],
+        'depends_on': []
+    },
+    'teammates': {
+        'module': 'ingest_teammates',
+        'functions': ['ingest_teammates'],
+        'depends_on': []
+    },
+    'advanced_search': {
+        'module': 'ingest_advanced_search',
+        'functions': ['ingest_advanced_search'],
+        'depends_on': ['teams', 'player_profiles', 'latest_market_values']
+    },
+}
+
+
+def _init_worker():
+    """
+    Open one Cassandra session per worker process (schema already created by the parent)
+    """
+    dao.connect(create_schema=False)
+
+
+def _run_stage(name):
+    """
+    Run one stage inside a worker process and return its wall time in seconds
+    """
+    stage = STAGES[name]
+    module = importlib.import_module(stage['module'])
+
+    start = time.perf_counter()
+    for function_name in stage['functions']:
+        getattr(module, function_name)()
+    return time.perf_counter() - start
+
+
+def run_stages(stage_names, workers=None):
+    """
+    Run the given stages concurrently, starting each one when its dependencies are done
+    Dependencies outside stage_names are assumed to be already ingested
+
+    Returns:
+        Tuple of ({stage: wall_time_seconds}, {stage: error_message})
+    """
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count()
+    pending = {
+        name: {dep for dep in STAGES[name]['depends_on'] if dep in stage_names}
+        for name in stage_names
+    }
+    timings = {}
+    errors = {}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        running = {}
+
+        while pending or running:
+            # Submit every stage whose dependencies are satisfied
+            for name in [name for name, deps in pending.items() if not deps]:
+                del pending[name]
+                logger.info(f"Starting stage {name}")
+                running[pool.submit(_run_stage, name)] = name
+
+            if not running:
+                # Remaining stages depend on a failed stage
+                for name in pending:
+                    errors[name] = "skipped (dependency failed)"
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    timings[name] = future.result()
+                    logger.info(f"Stage {name} finished in {timings[name]:.1f}s")
+                except Exception as e:
+                    errors[name] = str(e)
+                    logger.error(f"Stage {name} failed: {e}")
+                    continue
+
+                for deps in pending.values():
+                    deps.discard(name)
+
+    return timings, errors
+
+
+def main():
+    """
+    Main orchestration function
+    """
+    parser = argparse.ArgumentParser(description="Run ingestion stages in parallel")
+    parser.add_argument('stages', nargs='*',
+                        help=f"stages to run (default: all): {', '.join(STAGES)}")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: settings.INGEST_WORKERS or CPU count)")
+    args = parser.parse_args()
+    stage_names = args.stages or list(STAGES)
+    unknown = [name for name in stage_names if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    try:
+        # Create keyspace and tables once, before forking workers
+        dao.connect()
+    finally:
+        dao.close()
+
+    start = time.perf_counter()
+    timings, errors = run_stages(stage_names, args.workers)
+    total = time.perf_counter() - start
+
+    logger.info("Ingestion summary:")
+    for name in stage_names:
+        if name in timings:
+            logger.info(f"  {name:<16} {timings[name]:8.1f}s")
+        else:
+            logger.info(f"  {name:<16} FAILED: {errors.get(name)}")
+    logger.info(f"Wall time {total:.1f}s (sequential would be ~{sum(timings.values()):.1f}s)")
+
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
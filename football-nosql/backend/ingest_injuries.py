@@ -15,6 +15,8 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,47 +33,39 @@ def ingest_injuries():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['injuries'])
+        df = read_source('injuries')
         logger.info(f"Loaded {len(df)} injury records")
         
         column_map = settings.MAP['injuries']
-        processed = 0
-        batch_statements = []
         
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['player_id', 'start_date']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            if not player_id:
-                continue
-            
-            start_date = parse_date(safe_get_mapped_column(row, column_map, 'start_date'))
-            if not start_date:
-                continue
-            
-            injury_type = nz(safe_get_mapped_column(row, column_map, 'injury_type'),
-                            settings.DEFAULTS.get('injury_type', 'Unknown'))
-            end_date = parse_date(safe_get_mapped_column(row, column_map, 'end_date'))
-            games_missed = to_int(safe_get_mapped_column(row, column_map, 'games_missed'))
-            
-            # Insert injury record
-            batch_statements.append((
-                'insert_injury',
-                (player_id, start_date, injury_type, end_date, games_missed)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['player_id', 'start_date'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+        start_date = parse_date_column(mapped_column(df, column_map, 'start_date'))
         
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        injury_type = nz_column(mapped_column(df, column_map, 'injury_type'),
+                                settings.DEFAULTS.get('injury_type', 'Unknown'))
+        end_date = parse_date_column(mapped_column(df, column_map, 'end_date'))
+        games_missed = to_int_column(mapped_column(df, column_map, 'games_missed'))
+        
+        injuries = pd.DataFrame({
+            'player_id': player_id,
+            'start_date': start_date,
+            'injury_type': injury_type,
+            'end_date': end_date,
+            'games_missed': games_missed
+        })[player_id.notna() & start_date.notna()]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('injuries_by_player', ['player_id', 'start_date'])
+        injuries = manifest.filter(injuries)
+        processed = len(injuries)
+        
+        with dao.writer() as writer:
+            for params in frame_params(injuries):
+                writer.submit('insert_injury', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} injury records")
         
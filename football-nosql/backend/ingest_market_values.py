@@ -3,6 +3,8 @@ Market values ingestion script
 Ingests market value history and maintains latest market values
 Demonstrates time-series data and materialized view patterns
 """
+import argparse
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -17,120 +19,191 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def ingest_market_values():
+def get_market_files():
     """
-    Ingest market value history and determine latest values per player
+    Return the (file_type, settings.CSV key) market value CSVs that exist, history first
     """
-    logger.info("Starting market values ingestion...")
-    
-    # Try to load both market value files
     files_to_process = []
     
     # Historical market values
     if os.path.exists(settings.CSV['market_history']):
-        files_to_process.append(('history', settings.CSV['market_history']))
+        files_to_process.append(('history', 'market_history'))
     
     # Latest market values
     if os.path.exists(settings.CSV['market_latest']):
-        files_to_process.append(('latest', settings.CSV['market_latest']))
+        files_to_process.append(('latest', 'market_latest'))
+    
+    return files_to_process
+
+
+def clean_market_frame(df, file_type):
+    """
+    Clean a raw market value DataFrame (or chunk) column-wise
+    Returns a DataFrame with the market_value_by_player columns
+    """
+    column_map = settings.MAP['market']
+    
+    # Validate required fields
+    df = df[required_fields_mask(df, column_map, ['player_id', 'date'])]
+    player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+    date_val = parse_date_column(mapped_column(df, column_map, 'date'))
+    
+    market_value = to_bigint_column(mapped_column(df, column_map, 'market_value_eur'))
+    source = nz_column(mapped_column(df, column_map, 'source'), file_type)
+    
+    keep = player_id.notna() & date_val.notna()
+    return pd.DataFrame({
+        'player_id': player_id,
+        'as_of_date': date_val,
+        'market_value_eur': market_value,
+        'source': source
+    })[keep]
+
+
+def latest_market_rows(market):
+    """
+    Most recent row per player of a market value DataFrame (first one on ties)
+    Grouped arg-max over typed arrays: player codes and dates as day numbers are
+    lexsorted once and the first row of each player group is kept
+    """
+    if market.empty:
+        return market
+    
+    codes, _ = pd.factorize(market['player_id'])
+    days = market['as_of_date'].to_numpy(dtype='datetime64[D]').view('int64')
+    
+    # Stable sort by player, then date descending (original order kept on ties)
+    order = np.lexsort((-days, codes))
+    sorted_codes = codes[order]
+    first = np.empty(len(order), dtype=bool)
+    first[0] = True
+    first[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    return market.iloc[order[first]]
+
+
+def ingest_market_values():
+    """
+    Ingest market value history and determine latest values per player
+    Loads every file in memory - see ingest_market_values_streaming for large files
+    """
+    logger.info("Starting market values ingestion...")
+    
+    # Try to load both market value files
+    files_to_process = get_market_files()
     
     if not files_to_process:
         logger.error("No market value CSV files found")
         return
     
     try:
-        all_market_data = []
-        column_map = settings.MAP['market']
+        market_frames = []
         
         # Load and combine data from all files
-        for file_type, file_path in files_to_process:
-            logger.info(f"Loading {file_type} market values from {file_path}")
-            df = pd.read_csv(file_path)
+        for file_type, csv_key in files_to_process:
+            logger.info(f"Loading {file_type} market values from {settings.CSV[csv_key]}")
+            df = read_source(csv_key)
             logger.info(f"Loaded {len(df)} {file_type} market value records")
             
-            for idx, row in df.iterrows():
-                # Validate required fields
-                if not validate_required_fields(row, column_map, ['player_id', 'date']):
-                    continue
-                
-                player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-                if not player_id:
-                    continue
-                
-                date_val = parse_date(safe_get_mapped_column(row, column_map, 'date'))
-                if not date_val:
-                    continue
-                
-                market_value = to_bigint(safe_get_mapped_column(row, column_map, 'market_value_eur'))
-                source = nz(safe_get_mapped_column(row, column_map, 'source'), file_type)
-                
-                all_market_data.append({
-                    'player_id': player_id,
-                    'date': date_val,
-                    'market_value': market_value,
-                    'source': source
-                })
+            market_frames.append(clean_market_frame(df, file_type))
         
+        all_market_data = pd.concat(market_frames, ignore_index=True)
         logger.info(f"Total market value records to process: {len(all_market_data)}")
         
-        # Sort by date for processing
-        all_market_data.sort(key=lambda x: x['date'])
-        
-        # Track latest value per player for materialized view
-        latest_values = {}
+        # Latest value per player for materialized view
+        latest = latest_market_rows(all_market_data)
         
-        # Process in batches
-        processed = 0
-        batch_statements = []
-        
-        for record in all_market_data:
-            # Insert into time-series table
-            batch_statements.append((
-                'insert_market_value',
-                (record['player_id'], record['date'], record['market_value'], record['source'])
-            ))
-            
-            # Track latest value per player
-            player_id = record['player_id']
-            if player_id not in latest_values or record['date'] > latest_values[player_id]['date']:
-                latest_values[player_id] = record
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('market_value_by_player', ['player_id', 'as_of_date'])
+        changed = manifest.filter(all_market_data)
+        processed = len(changed)
         
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        # Insert into time-series table
+        with dao.writer() as writer:
+            for params in frame_params(changed):
+                writer.submit('insert_market_value', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} market value records")
         
         # Now insert latest values into materialized view
         logger.info("Updating latest market values...")
-        batch_statements = []
+        write_latest_market_values(latest)
+        
+        logger.info(f"Successfully updated latest market values for {len(latest)} players")
         
-        for player_id, latest_record in latest_values.items():
-            batch_statements.append((
-                'upsert_latest_market_value',
-                (player_id, latest_record['date'], latest_record['market_value'], latest_record['source'])
-            ))
+    except Exception as e:
+        logger.error(f"Error ingesting market values: {e}")
+        raise
+
+
+def ingest_market_values_streaming(chunk_size=None, latest=True):
+    """
+    Streaming variant of ingest_market_values
+    Reads the CSVs in chunks of chunk_size rows and writes each chunk straight away.
+    Only the latest row per player seen so far is kept, so memory does not grow
+    with the history file (in delta mode the manifest still keeps one fingerprint
+    per row). With latest=False only the history is written (see
+    rebuild_latest_market_values for the latest values).
+    """
+    chunk_size = chunk_size or settings.CSV_CHUNK_SIZE
+    logger.info(f"Starting streaming market values ingestion (chunks of {chunk_size} rows)...")
+    
+    files_to_process = get_market_files()
+    
+    if not files_to_process:
+        logger.error("No market value CSV files found")
+        return
+    
+    try:
+        # Latest row per player seen so far
+        latest_values = None
+        processed = 0
+        
+        # Read IDs as text so every chunk formats them the same way
+        # (a chunk with a missing ID would otherwise be parsed as float)
+        id_dtype = {settings.MAP['market']['player_id']: str}
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('market_value_by_player', ['player_id', 'as_of_date'])
+        
+        with dao.writer() as writer:
+            for file_type, csv_key in files_to_process:
+                logger.info(f"Streaming {file_type} market values from {settings.CSV[csv_key]}")
+                
+                for chunk in read_source(csv_key, chunksize=chunk_size, dtype=id_dtype):
+                    market = clean_market_frame(chunk, file_type)
+                    
+                    # Insert chunk into time-series table
+                    changed = manifest.filter(market)
+                    for params in frame_params(changed):
+                        writer.submit('insert_market_value', params)
+                    processed += len(changed)
+                    
+                    # Fold the chunk into the latest rows (earlier rows first: they win ties)
+                    if latest:
+                        latest_values = merge_latest(latest_values, market)
+                    
+                    logger.info(f"Processed {processed} market value records...")
             
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
+            manifest.submit_deletes(writer)
+        manifest.save()
+        
+        logger.info(f"Successfully ingested {processed} market value records")
         
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        if not latest or latest_values is None:
+            return
+        
+        # Now insert latest values into materialized view
+        logger.info("Updating latest market values...")
+        write_latest_market_values(latest_values)
         
         logger.info(f"Successfully updated latest market values for {len(latest_values)} players")
         
@@ -139,16 +212,99 @@ def ingest_market_values():
         raise
 
 
+def ingest_market_history():
+    """
+    Write the market value history only (latest values are a separate stage)
+    """
+    ingest_market_values_streaming(latest=False)
+
+
+def merge_latest(latest, market):
+    """
+    Latest row per player of the rows already kept (latest, may be None) and a new chunk
+    """
+    chunk_latest = latest_market_rows(market)
+    if latest is None:
+        return chunk_latest
+    return latest_market_rows(pd.concat([latest, chunk_latest], ignore_index=True))
+
+
+def rebuild_latest_market_values(source='csv', chunk_size=None):
+    """
+    Rebuild latest_market_value_by_player without re-writing the history
+    
+    Args:
+        source: 'csv' to read the market value CSVs, 'table' to scan market_value_by_player
+        chunk_size: rows per chunk (memory stays bounded by the number of players)
+    """
+    chunk_size = chunk_size or settings.CSV_CHUNK_SIZE
+    logger.info(f"Rebuilding latest market values from {source}...")
+    latest = None
+    
+    if source == 'csv':
+        id_dtype = {settings.MAP['market']['player_id']: str}
+        for file_type, csv_key in get_market_files():
+            for chunk in read_source(csv_key, chunksize=chunk_size, dtype=id_dtype):
+                latest = merge_latest(latest, clean_market_frame(chunk, file_type))
+    
+    elif source == 'table':
+        columns = ['player_id', 'as_of_date', 'market_value_eur', 'source']
+        rows = dao.scan_table('market_value_by_player', columns, ['player_id'])
+        while True:
+            batch = [
+                (row.player_id, row.as_of_date.date(), row.market_value_eur, row.source)
+                for _, row in zip(range(chunk_size), rows)
+            ]
+            if not batch:
+                break
+            latest = merge_latest(latest, pd.DataFrame(batch, columns=columns, dtype=object))
+    
+    else:
+        raise ValueError(f"Unknown source: {source}")
+    
+    if latest is None:
+        logger.warning("No market values found")
+        return
+    
+    write_latest_market_values(latest)
+    logger.info(f"Successfully rebuilt latest market values for {len(latest)} players")
+
+
+def write_latest_market_values(latest):
+    """
+    Upsert a DataFrame of (player_id, as_of_date, market_value_eur, source) rows into
+    latest_market_value_by_player
+    """
+    # Only players whose latest value changed in delta mode (settings.DELTA_MODE)
+    manifest = DeltaManifest('latest_market_value_by_player', ['player_id'])
+    latest = manifest.filter(latest)
+    
+    with dao.writer() as writer:
+        for params in frame_params(latest):
+            writer.submit('upsert_latest_market_value', params)
+        manifest.submit_deletes(writer)
+    manifest.save()
+
+
 def main():
     """
     Main ingestion function
     """
+    parser = argparse.ArgumentParser(description="Ingest market values")
+    parser.add_argument('--latest-only', choices=['csv', 'table'], default=None,
+                        help="only rebuild latest_market_value_by_player, from the CSVs or "
+                             "from a scan of market_value_by_player")
+    args = parser.parse_args()
+    
     try:
         # Connect to database
         dao.connect()
         
-        # Ingest market values
-        ingest_market_values()
+        if args.latest_only:
+            rebuild_latest_market_values(args.latest_only)
+        else:
+            # Ingest market values chunk by chunk (flat memory on large history files)
+            ingest_market_values_streaming()
         
         logger.info("Market values ingestion completed successfully!")
         
@@ -15,6 +15,8 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,46 +33,42 @@ def ingest_club_performances():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['club_perf'])
+        df = read_source('club_perf')
         logger.info(f"Loaded {len(df)} club performance records")
         
         column_map = settings.MAP['club_perf']
-        processed = 0
-        batch_statements = []
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['player_id', 'season']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            season = nz(safe_get_mapped_column(row, column_map, 'season'))
-            
-            if not player_id or not season:
-                continue
-            
-            team_id = clean_id(safe_get_mapped_column(row, column_map, 'team_id'))
-            matches = to_int(safe_get_mapped_column(row, column_map, 'matches'))
-            goals = to_int(safe_get_mapped_column(row, column_map, 'goals'))
-            assists = to_int(safe_get_mapped_column(row, column_map, 'assists'))
-            minutes = to_int(safe_get_mapped_column(row, column_map, 'minutes'))
-            
-            # Insert club performance record
-            batch_statements.append((
-                'insert_club_performance',
-                (player_id, season, team_id, matches, goals, assists, minutes)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['player_id', 'season'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+        season = nz_column(mapped_column(df, column_map, 'season'))
+        
+        team_id = clean_id_column(mapped_column(df, column_map, 'team_id'))
+        matches = to_int_column(mapped_column(df, column_map, 'matches'))
+        goals = to_int_column(mapped_column(df, column_map, 'goals'))
+        assists = to_int_column(mapped_column(df, column_map, 'assists'))
+        minutes = to_int_column(mapped_column(df, column_map, 'minutes'))
+        
+        performances = pd.DataFrame({
+            'player_id': player_id,
+            'season': season,
+            'team_id': team_id,
+            'matches': matches,
+            'goals': goals,
+            'assists': assists,
+            'minutes': minutes
+        })[player_id.notna() & (season != '')]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('club_performances_by_player_season', ['player_id', 'season'])
+        performances = manifest.filter(performances)
+        processed = len(performances)
+        
+        with dao.writer() as writer:
+            for params in frame_params(performances):
+                writer.submit('insert_club_performance', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} club performance records")
         
@@ -90,46 +88,42 @@ def ingest_national_performances():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['nat_perf'])
+        df = read_source('nat_perf')
         logger.info(f"Loaded {len(df)} national performance records")
         
         column_map = settings.MAP['nat_perf']
-        processed = 0
-        batch_statements = []
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['player_id', 'season']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            season = nz(safe_get_mapped_column(row, column_map, 'season'))
-            
-            if not player_id or not season:
-                continue
-            
-            national_team = nz(safe_get_mapped_column(row, column_map, 'national_team'))
-            matches = to_int(safe_get_mapped_column(row, column_map, 'matches'))
-            goals = to_int(safe_get_mapped_column(row, column_map, 'goals'))
-            assists = to_int(safe_get_mapped_column(row, column_map, 'assists'))
-            minutes = to_int(safe_get_mapped_column(row, column_map, 'minutes'))
-            
-            # Insert national performance record
-            batch_statements.append((
-                'insert_national_performance',
-                (player_id, season, national_team, matches, goals, assists, minutes)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['player_id', 'season'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+        season = nz_column(mapped_column(df, column_map, 'season'))
+        
+        national_team = nz_column(mapped_column(df, column_map, 'national_team'))
+        matches = to_int_column(mapped_column(df, column_map, 'matches'))
+        goals = to_int_column(mapped_column(df, column_map, 'goals'))
+        assists = to_int_column(mapped_column(df, column_map, 'assists'))
+        minutes = to_int_column(mapped_column(df, column_map, 'minutes'))
+        
+        performances = pd.DataFrame({
+            'player_id': player_id,
+            'season': season,
+            'national_team': national_team,
+            'matches': matches,
+            'goals': goals,
+            'assists': assists,
+            'minutes': minutes
+        })[player_id.notna() & (season != '')]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('national_performances_by_player_season', ['player_id', 'season'])
+        performances = manifest.filter(performances)
+        processed = len(performances)
+        
+        with dao.writer() as writer:
+            for params in frame_params(performances):
+                writer.submit('insert_national_performance', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} national performance records")
         
@@ -15,6 +15,8 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,57 +34,64 @@ def ingest_player_profiles():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['profiles'], encoding='utf-8')
+        df = read_source('profiles', encoding='utf-8')
         logger.info(f"Loaded {len(df)} player profile records")
         
         column_map = settings.MAP['profiles']
-        processed = 0
-        batch_statements = []
         
-        for idx, row in df.iterrows():
-            # Validate required fields (player_id is minimum requirement)
-            if not validate_required_fields(row, column_map, ['player_id']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            if not player_id:
-                continue
-            
-            # Extract player data
-            player_name = nz(safe_get_mapped_column(row, column_map, 'player_name'))
-            nationality = nz(safe_get_mapped_column(row, column_map, 'nationality'), 
-                           settings.DEFAULTS.get('nationality', 'Unknown'))
-            birth_date = parse_date(safe_get_mapped_column(row, column_map, 'birth_date'))
-            height_cm = to_int(safe_get_mapped_column(row, column_map, 'height_cm'))
-            preferred_foot = nz(safe_get_mapped_column(row, column_map, 'preferred_foot'))
-            main_position = nz(safe_get_mapped_column(row, column_map, 'main_position'),
-                              settings.DEFAULTS.get('position', 'N/A'))
-            current_team_id = clean_id(safe_get_mapped_column(row, column_map, 'current_team_id'))
-            
-            # Insert into player_profiles_by_id
-            batch_statements.append((
-                'insert_player_profile',
-                (player_id, player_name, nationality, birth_date, height_cm, 
-                 preferred_foot, main_position, current_team_id)
-            ))
-            
-            # If player has a current team, also insert into players_by_team
-            if current_team_id:
-                batch_statements.append((
-                    'insert_player_by_team',
-                    (current_team_id, player_id, player_name, main_position, nationality)
-                ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
+        # Validate required fields (player_id is minimum requirement)
+        df = df[required_fields_mask(df, column_map, ['player_id'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
         
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        # Extract player data column-wise
+        player_name = nz_column(mapped_column(df, column_map, 'player_name'))
+        nationality = nz_column(mapped_column(df, column_map, 'nationality'),
+                                settings.DEFAULTS.get('nationality', 'Unknown'))
+        birth_date = parse_date_column(mapped_column(df, column_map, 'birth_date'))
+        height_cm = to_int_column(mapped_column(df, column_map, 'height_cm'))
+        preferred_foot = nz_column(mapped_column(df, column_map, 'preferred_foot'))
+        main_position = nz_column(mapped_column(df, column_map, 'main_position'),
+                                  settings.DEFAULTS.get('position', 'N/A'))
+        current_team_id = clean_id_column(mapped_column(df, column_map, 'current_team_id'))
+        
+        keep = player_id.notna()
+        profiles = pd.DataFrame({
+            'player_id': player_id,
+            'player_name': player_name,
+            'nationality': nationality,
+            'birth_date': birth_date,
+            'height_cm': height_cm,
+            'preferred_foot': preferred_foot,
+            'main_position': main_position,
+            'current_team_id': current_team_id
+        })[keep]
+        
+        # Players with a current team also go into players_by_team
+        team_players = pd.DataFrame({
+            'team_id': current_team_id,
+            'player_id': player_id,
+            'player_name': player_name,
+            'position': main_position,
+            'nationality': nationality
+        })[keep & current_team_id.notna()]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        # A player who changes team vanishes from the old team's players_by_team partition
+        profiles_manifest = DeltaManifest('player_profiles_by_id', ['player_id'])
+        team_manifest = DeltaManifest('players_by_team', ['team_id', 'player_id'])
+        profiles = profiles_manifest.filter(profiles)
+        team_players = team_manifest.filter(team_players)
+        processed = len(profiles)
+        
+        with dao.writer() as writer:
+            for params in frame_params(profiles):
+                writer.submit('insert_player_profile', params)
+            for params in frame_params(team_players):
+                writer.submit('insert_player_by_team', params)
+            profiles_manifest.submit_deletes(writer)
+            team_manifest.submit_deletes(writer)
+        profiles_manifest.save()
+        team_manifest.save()
         
         logger.info(f"Successfully ingested {processed} player profiles")
         
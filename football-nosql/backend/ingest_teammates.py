@@ -15,6 +15,8 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,43 +33,36 @@ def ingest_teammates():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['teammates'])
+        df = read_source('teammates')
         logger.info(f"Loaded {len(df)} teammate records")
         
         column_map = settings.MAP['teammates']
-        processed = 0
-        batch_statements = []
         
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['player_id', 'teammate_id']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            teammate_id = clean_id(safe_get_mapped_column(row, column_map, 'teammate_id'))
-            
-            if not player_id or not teammate_id or player_id == teammate_id:
-                continue
-            
-            teammate_name = nz(safe_get_mapped_column(row, column_map, 'teammate_name'))
-            matches_together = to_int(safe_get_mapped_column(row, column_map, 'matches_together'))
-            
-            # Insert teammate relationship
-            batch_statements.append((
-                'insert_teammate',
-                (player_id, teammate_id, teammate_name, matches_together)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['player_id', 'teammate_id'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+        teammate_id = clean_id_column(mapped_column(df, column_map, 'teammate_id'))
         
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        teammate_name = nz_column(mapped_column(df, column_map, 'teammate_name'))
+        matches_together = to_int_column(mapped_column(df, column_map, 'matches_together'))
+        
+        teammates = pd.DataFrame({
+            'player_id': player_id,
+            'teammate_id': teammate_id,
+            'teammate_name': teammate_name,
+            'matches_together': matches_together
+        })[player_id.notna() & teammate_id.notna() & (player_id != teammate_id)]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('teammates_by_player', ['player_id', 'teammate_id'])
+        teammates = manifest.filter(teammates)
+        processed = len(teammates)
+        
+        with dao.writer() as writer:
+            for params in frame_params(teammates):
+                writer.submit('insert_teammate', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} teammate relationships")
         
@@ -15,6 +15,8 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,43 +33,38 @@ def ingest_team_details():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['team_details'], encoding='utf-8')
+        df = read_source('team_details', encoding='utf-8')
         logger.info(f"Loaded {len(df)} team detail records")
         
         column_map = settings.MAP['team_details']
-        processed = 0
-        batch_statements = []
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['team_id']):
-                continue
-            
-            team_id = clean_id(safe_get_mapped_column(row, column_map, 'team_id'))
-            if not team_id:
-                continue
-            
-            team_name = nz(safe_get_mapped_column(row, column_map, 'team_name'))
-            country = nz(safe_get_mapped_column(row, column_map, 'country'))
-            city = nz(safe_get_mapped_column(row, column_map, 'city'))
-            founded = to_int(safe_get_mapped_column(row, column_map, 'founded'))
-            
-            # Add to batch
-            batch_statements.append((
-                'insert_team_details',
-                (team_id, team_name, country, city, founded)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['team_id'])]
+        team_id = clean_id_column(mapped_column(df, column_map, 'team_id'))
+        
+        team_name = nz_column(mapped_column(df, column_map, 'team_name'))
+        country = nz_column(mapped_column(df, column_map, 'country'))
+        city = nz_column(mapped_column(df, column_map, 'city'))
+        founded = to_int_column(mapped_column(df, column_map, 'founded'))
+        
+        teams = pd.DataFrame({
+            'team_id': team_id,
+            'team_name': team_name,
+            'country': country,
+            'city': city,
+            'founded': founded
+        })[team_id.notna()]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('team_details_by_id', ['team_id'])
+        teams = manifest.filter(teams)
+        processed = len(teams)
+        
+        with dao.writer() as writer:
+            for params in frame_params(teams):
+                writer.submit('insert_team_details', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} team details")
         
@@ -87,44 +84,37 @@ def ingest_team_children():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['team_children'])
+        df = read_source('team_children')
         logger.info(f"Loaded {len(df)} team children records")
         
         column_map = settings.MAP['team_children']
-        processed = 0
-        batch_statements = []
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['parent_team_id', 'child_team_id']):
-                continue
-            
-            parent_team_id = clean_id(safe_get_mapped_column(row, column_map, 'parent_team_id'))
-            child_team_id = clean_id(safe_get_mapped_column(row, column_map, 'child_team_id'))
-            
-            if not parent_team_id or not child_team_id:
-                continue
-            
-            child_team_name = nz(safe_get_mapped_column(row, column_map, 'child_team_name'))
-            relation = nz(safe_get_mapped_column(row, column_map, 'relation'), 
-                         settings.DEFAULTS.get('relation', 'Related'))
-            
-            # Add to batch
-            batch_statements.append((
-                'insert_team_child',
-                (parent_team_id, child_team_id, child_team_name, relation)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['parent_team_id', 'child_team_id'])]
+        parent_team_id = clean_id_column(mapped_column(df, column_map, 'parent_team_id'))
+        child_team_id = clean_id_column(mapped_column(df, column_map, 'child_team_id'))
+        
+        child_team_name = nz_column(mapped_column(df, column_map, 'child_team_name'))
+        relation = nz_column(mapped_column(df, column_map, 'relation'),
+                             settings.DEFAULTS.get('relation', 'Related'))
+        
+        children = pd.DataFrame({
+            'parent_team_id': parent_team_id,
+            'child_team_id': child_team_id,
+            'child_team_name': child_team_name,
+            'relation': relation
+        })[parent_team_id.notna() & child_team_id.notna()]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('team_children_by_parent', ['parent_team_id', 'child_team_id'])
+        children = manifest.filter(children)
+        processed = len(children)
+        
+        with dao.writer() as writer:
+            for params in frame_params(children):
+                writer.submit('insert_team_child', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} team children relationships")
         
@@ -144,41 +134,33 @@ def ingest_team_competitions():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['team_comp_seasons'])
+        df = read_source('team_comp_seasons')
         logger.info(f"Loaded {len(df)} team competition records")
         
         column_map = settings.MAP['team_comp_seasons']
-        processed = 0
-        batch_statements = []
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['team_id', 'season', 'competition']):
-                continue
-            
-            team_id = clean_id(safe_get_mapped_column(row, column_map, 'team_id'))
-            season = nz(safe_get_mapped_column(row, column_map, 'season'))
-            competition = nz(safe_get_mapped_column(row, column_map, 'competition'))
-            
-            if not team_id or not season or not competition:
-                continue
-            
-            # Add to batch
-            batch_statements.append((
-                'insert_team_competition',
-                (team_id, season, competition)
-            ))
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['team_id', 'season', 'competition'])]
+        team_id = clean_id_column(mapped_column(df, column_map, 'team_id'))
+        season = nz_column(mapped_column(df, column_map, 'season'))
+        competition = nz_column(mapped_column(df, column_map, 'competition'))
+        
+        competitions = pd.DataFrame({
+            'team_id': team_id,
+            'season': season,
+            'competition': competition
+        })[team_id.notna() & (season != '') & (competition != '')]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('team_competitions_by_team_season', ['team_id', 'season', 'competition'])
+        competitions = manifest.filter(competitions)
+        processed = len(competitions)
+        
+        with dao.writer() as writer:
+            for params in frame_params(competitions):
+                writer.submit('insert_team_competition', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} team competition participations")
         
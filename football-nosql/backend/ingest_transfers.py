@@ -7,7 +7,6 @@ import pandas as pd
 import sys
 import os
 import logging
-from collections import defaultdict
 
 # Add backend and app to path
 backend_path = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +16,9 @@ sys.path.append(os.path.join(backend_path, 'app'))
 import settings
 from app.dao import dao
 from app.utils import *
+from app.delta import DeltaManifest
+from app.staging import read_source
+from app.topk import TopK, transfer_rank
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,97 +35,84 @@ def ingest_transfers():
         return
     
     try:
-        df = pd.read_csv(settings.CSV['transfers'])
+        df = read_source('transfers')
         logger.info(f"Loaded {len(df)} transfer records")
         
         column_map = settings.MAP['transfers']
-        processed = 0
-        batch_statements = []
-        
-        # Track transfers by season for pre-aggregation
-        transfers_by_season = defaultdict(list)
-        
-        for idx, row in df.iterrows():
-            # Validate required fields
-            if not validate_required_fields(row, column_map, ['player_id', 'transfer_date']):
-                continue
-            
-            player_id = clean_id(safe_get_mapped_column(row, column_map, 'player_id'))
-            if not player_id:
-                continue
-            
-            transfer_date = parse_date(safe_get_mapped_column(row, column_map, 'transfer_date'))
-            if not transfer_date:
-                continue
-            
-            from_team_id = clean_id(safe_get_mapped_column(row, column_map, 'from_team_id'))
-            to_team_id = clean_id(safe_get_mapped_column(row, column_map, 'to_team_id'))
-            fee_eur = to_bigint(safe_get_mapped_column(row, column_map, 'fee_eur'))
-            contract_years = to_int(safe_get_mapped_column(row, column_map, 'contract_years'))
-            
-            # Get season from CSV or extract from date
-            season = nz(safe_get_mapped_column(row, column_map, 'season'))
-            if not season:
-                season = extract_season_from_date(transfer_date)
-            
-            # Insert into transfers_by_player
-            batch_statements.append((
-                'insert_transfer',
-                (player_id, transfer_date, from_team_id, to_team_id, fee_eur, contract_years)
-            ))
-            
-            # Track for pre-aggregation if we have season and fee
-            if season and fee_eur > 0:
-                transfers_by_season[season].append({
-                    'player_id': player_id,
-                    'transfer_date': transfer_date,
-                    'from_team_id': from_team_id,
-                    'to_team_id': to_team_id,
-                    'fee_eur': fee_eur
-                })
-            
-            processed += 1
-            
-            # Execute batch when reaching batch size
-            if len(batch_statements) >= settings.BATCH_SIZE:
-                dao.execute_batch(batch_statements)
-                batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
+        
+        # Validate required fields
+        df = df[required_fields_mask(df, column_map, ['player_id', 'transfer_date'])]
+        player_id = clean_id_column(mapped_column(df, column_map, 'player_id'))
+        transfer_date = parse_date_column(mapped_column(df, column_map, 'transfer_date'))
+        
+        from_team_id = clean_id_column(mapped_column(df, column_map, 'from_team_id'))
+        to_team_id = clean_id_column(mapped_column(df, column_map, 'to_team_id'))
+        fee_eur = to_bigint_column(mapped_column(df, column_map, 'fee_eur'))
+        contract_years = to_int_column(mapped_column(df, column_map, 'contract_years'))
+        
+        # Get season from CSV or extract from date
+        season = nz_column(mapped_column(df, column_map, 'season'))
+        missing_season = season == ''
+        season = season.where(~missing_season, transfer_date[missing_season].map(extract_season_from_date))
+        
+        keep = player_id.notna() & transfer_date.notna()
+        transfers = pd.DataFrame({
+            'player_id': player_id,
+            'transfer_date': transfer_date,
+            'from_team_id': from_team_id,
+            'to_team_id': to_team_id,
+            'fee_eur': fee_eur,
+            'contract_years': contract_years
+        })[keep]
+        
+        # Only new or changed rows in delta mode (settings.DELTA_MODE)
+        manifest = DeltaManifest('transfers_by_player', ['player_id', 'transfer_date'])
+        transfers = manifest.filter(transfers)
+        processed = len(transfers)
+        
+        # Insert into transfers_by_player
+        with dao.writer() as writer:
+            for params in frame_params(transfers):
+                writer.submit('insert_transfer', params)
+            manifest.submit_deletes(writer)
+        manifest.save()
         
         logger.info(f"Successfully ingested {processed} transfer records")
         
         # Create pre-aggregated top transfers by season
         logger.info("Creating pre-aggregated top transfers by season...")
-        batch_statements = []
-        total_top_transfers = 0
-        
-        for season, transfers in transfers_by_season.items():
-            # Sort transfers by fee (descending) and take top transfers
-            sorted_transfers = sorted(transfers, key=lambda x: (-x['fee_eur'], x['player_id']))
-            
-            # Insert top transfers for this season (limit to reasonable number)
-            for transfer in sorted_transfers[:100]:  # Top 100 per season
-                batch_statements.append((
-                    'insert_top_transfer',
-                    (season, transfer['fee_eur'], transfer['player_id'], 
-                     transfer['to_team_id'], transfer['from_team_id'], transfer['transfer_date'])
-                ))
-                
-                total_top_transfers += 1
-                
-                # Execute batch when reaching batch size
-                if len(batch_statements) >= settings.BATCH_SIZE:
-                    dao.execute_batch(batch_statements)
-                    batch_statements = []
-        
-        # Execute remaining statements
-        if batch_statements:
-            dao.execute_batch(batch_statements)
-        
-        logger.info(f"Successfully created {total_top_transfers} pre-aggregated top transfer records across {len(transfers_by_season)} seasons")
+        
+        # Track for pre-aggregation if we have season and fee
+        paid = pd.DataFrame({
+            'season': season,
+            'fee_eur': fee_eur,
+            'player_id': player_id,
+            'to_team_id': to_team_id,
+            'from_team_id': from_team_id,
+            'transfer_date': transfer_date
+        })[keep & season.notna() & (fee_eur > 0)]
+        
+        # Stream paid transfers through a bounded heap per season: O(K) memory per
+        # season, and transfers below a full season's K-th fee are rejected at once
+        top_k = TopK(settings.TOP_TRANSFERS_K, key=transfer_rank)
+        for params in iter_frame_params(paid):
+            top_k.push(params[0], params)
+        
+        top = pd.DataFrame(top_k.items(), columns=paid.columns, dtype=object)
+        total_top_transfers = len(top)
+        seasons_count = len(top_k.groups())
+        
+        # In delta mode, entries pushed out of a season's top list are deleted
+        top_manifest = DeltaManifest('top_transfers_by_season', ['season', 'fee_eur', 'player_id'])
+        top = top_manifest.filter(top)
+        
+        with dao.writer() as writer:
+            for params in frame_params(top):
+                writer.submit('insert_top_transfer', params)
+            top_manifest.submit_deletes(writer)
+        top_manifest.save()
+        
+        logger.info(f"Successfully created {total_top_transfers} pre-aggregated top transfer records across {seasons_count} seasons")
         
     except Exception as e:
         logger.error(f"Error ingesting transfers: {e}")
@@ -121,6 +121,92 @@ DEFAULTS = {
 # Batch sizes for ingestion (NoSQL best practice)
 BATCH_SIZE = 50
 
+# Transfers kept per season in top_transfers_by_season (ingestion and /transfer/add)
+TOP_TRANSFERS_K = 100
+
+# Worker processes used by ingest_all.py (None = one per CPU)
+INGEST_WORKERS = None
+
+# Delta ingestion: only write rows whose fingerprint changed since the last run
+# (manifests of row hashes per table are kept in DELTA_MANIFEST_DIR)
+DELTA_MODE = False
+DELTA_DELETES = False  # also delete rows that vanished from the source CSV
+DELTA_MANIFEST_DIR = os.path.join(DATA_PATH, ".manifests")
+
+# Rows per chunk when streaming large CSVs (pd.read_csv chunksize)
+CSV_CHUNK_SIZE = 100000
+
+# Columnar staging cache: each CSV is converted once into an Arrow file holding only
+# the columns used in MAP, then memory-mapped by later runs (requires pyarrow, optional)
+STAGING_MODE = True
+STAGING_DIR = os.path.join(DATA_PATH, ".staging")
+
+# execute_batch mode: "partition" groups statements by table and partition key into
+# UNLOGGED batches capped at BATCH_MAX_BYTES, "logged" sends one multi-partition LOGGED batch
+BATCH_MODE = "partition"
+BATCH_MAX_BYTES = 4 * 1024  # stays under Cassandra's batch_size_warn_threshold (5 KiB)
+
+# Write pipeline used by ingestion scripts through dao.writer()
+# "async" keeps WRITE_CONCURRENCY execute_async requests in flight, "batch" uses execute_batch
+WRITE_MODE = "async"
+WRITE_CONCURRENCY = 128
+WRITE_MAX_RETRIES = 3
+WRITE_RETRY_DELAY = 0.2  # seconds, doubled on each retry
+
+# Token-range parallel scans (dao.scan_table)
+SCAN_SPLITS = 64        # token sub-ranges per full-table scan
+SCAN_CONCURRENCY = 16   # sub-ranges read at the same time
+
+# Bulk lookups (POST /players/profiles, POST /teams/details)
+BULK_MAX_IDS = 500       # IDs accepted per request
+BULK_CONCURRENCY = 64    # single-partition reads in flight per request
+
+# Read-through cache of the API reads (app/cache.py), per API process: LRU bounded
+# to CACHE_MAX_ENTRIES results, TTL per table (tables not listed are never cached).
+# Writes through the DAO drop the cached reads of their partition; ingestion clears
+# every cache by rewriting CACHE_EPOCH_FILE, checked every CACHE_EPOCH_CHECK seconds
+# (API and ingestion must share this file, otherwise only the TTL applies)
+CACHE_ENABLED = True
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL = {
+    'team_details_by_id': 3600,
+    'player_profiles_by_id': 3600,
+    'latest_market_value_by_player': 300,
+    'transfers_by_player': 300,
+    'injuries_by_player': 300,
+    'top_transfers_by_season': 300,
+    'search_facets': 300
+}
+CACHE_EPOCH_FILE = os.path.join(DATA_PATH, ".cache-epoch")
+CACHE_EPOCH_CHECK = 5.0  # seconds
+
+# In-memory team name index used by /teams/search (app/team_index.py): loaded by a
+# full scan at startup, then re-scanned every TEAM_INDEX_REFRESH seconds and updated
+# with the differences
+TEAM_INDEX_REFRESH = 300
+
+# players_search_index partitions (app/search_index.py): one bucket per first
+# SEARCH_BUCKET_CHARS letters of the lowercase name (27 buckets for 1, 729 for 2).
+# Changing it requires re-running ingest_advanced_search.py
+SEARCH_BUCKET_CHARS = 1
+
+# Players whose previous search records ingest_advanced_search.py reads back at a time
+# (to delete their stale rows), at most BULK_CONCURRENCY reads in flight
+SEARCH_REFRESH_CHUNK = 1000
+
+# /players/search filters rows in Python: pages are read one after the other until the
+# page is full or SEARCH_SCAN_BUDGET rows were examined (the cursor then resumes there)
+SEARCH_SCAN_BUDGET = 5000
+
+# Teams returned by /players/search/suggestions (most players first); every position
+# and nationality is returned
+SUGGESTION_TEAMS = 50
+
+# Fast JSON path of the read endpoints (app/serialization.py): rows are read as plain
+# tuples (ROW_TUPLES execution profile) and responses encoded directly, by orjson when
+# installed, instead of going through pydantic and FastAPI's jsonable_encoder
+FAST_JSON = True
+
 # Pagination settings
 DEFAULT_PAGE_SIZE = 50
 MAX_PAGE_SIZE = 100
\ No newline at end of file
@@ -48,6 +48,24 @@ class ApiClient {
     return this.request(`/player/${playerId}/profile`);
   }
 
+  async getPlayerProfiles(playerIds) {
+    return this.request('/players/profiles', {
+      method: 'POST',
+      body: JSON.stringify({ player_ids: playerIds }),
+    });
+  }
+
+  // Every section of the player page in one call (sections: comma-separated list, default all)
+  async getPlayerDossier(playerId, sections = null, limits = {}) {
+    const params = new URLSearchParams();
+    if (sections) {
+      params.set('include', sections.join(','));
+    }
+    Object.entries(limits).forEach(([section, limit]) => params.set(`${section}_limit`, limit));
+    const query = params.toString();
+    return this.request(`/player/${playerId}/dossier${query ? `?${query}` : ''}`);
+  }
+
   // Market Values
   async getLatestMarketValue(playerId) {
     return this.request(`/player/${playerId}/market/latest`);
@@ -129,6 +147,13 @@ class ApiClient {
     return this.request(`/team/${teamId}/details`);
   }
 
+  async getTeamsDetails(teamIds) {
+    return this.request('/teams/details', {
+      method: 'POST',
+      body: JSON.stringify({ team_ids: teamIds }),
+    });
+  }
+
   async getTeamChildren(teamId) {
     return this.request(`/team/${teamId}/children`);
   }